@@ -0,0 +1,100 @@
+# query_cache.py
+# In-memory LRU cache of SQL editor results
+# --------------------------------------------------------------
+# Keyed by the normalized SQL text (comments dropped, whitespace
+# collapsed, keywords and identifiers lower-cased; string literals kept
+# as written) plus the version of every table the query reads, so
+# reloading a table changes the key of every query over it.
+# - results are stored as pyarrow Tables; least-recently-used entries
+#   are dropped once their total size passes ``max_bytes``
+# - invalidate() frees entries over an old version of a table straight
+#   away instead of waiting for them to age out
+# - one cache is shared by every session (guarded by a lock)
+# --------------------------------------------------------------
+
+import re
+import threading
+from collections import OrderedDict
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+_TOKENS = re.compile(r"""'(?:[^']|'')*'|"(?:[^"]|"")*"|--[^\n]*|/\*.*?\*/|\s+|[^'"\s]""", re.S)
+# Results of these can change without any table changing
+VOLATILE = re.compile(r"\b(random|uuid|gen_random_uuid|now|today|current_date|current_time|current_timestamp|"
+                      r"read_\w+|glob|getenv)\b")
+
+
+def normalize_sql(sql) -> str:
+    """Canonical text of a query: no comments, single spaces, no trailing semicolons, lower case outside strings."""
+    parts = []
+    for token in _TOKENS.findall(sql):
+        if token.startswith("--") or token.startswith("/*") or token.isspace():
+            if parts and parts[-1] != " ":
+                parts.append(" ")
+        elif token.startswith("'"):
+            parts.append(token)
+        else:
+            parts.append(token.lower())
+    return "".join(parts).strip().rstrip(";").strip()
+
+
+def is_volatile(normalized_sql) -> bool:
+    """True when the query reads files or calls time / random functions."""
+    return VOLATILE.search(normalized_sql) is not None
+
+
+class QueryCache:
+    """Size-bounded LRU of Arrow results keyed by (normalized SQL, table versions)."""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = int(max_bytes)
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> pyarrow.Table
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(normalized_sql, table_versions) -> tuple:
+        return normalized_sql, tuple(sorted(table_versions.items()))
+
+    def get(self, key):
+        """Cached pyarrow Table for ``key``, or None (counted as a hit / miss)."""
+        with self._lock:
+            table = self._entries.get(key)
+            if table is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return table
+
+    def put(self, key, table):
+        if table.nbytes > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key).nbytes
+            self._entries[key] = table
+            self._bytes += table.nbytes
+            while self._bytes > self.max_bytes:
+                self._bytes -= self._entries.popitem(last=False)[1].nbytes
+
+    def invalidate(self, table_name, current_version=None):
+        """Drop entries that read ``table_name`` at any version other than ``current_version``."""
+        with self._lock:
+            stale = [key for key in self._entries
+                     if any(name == table_name and version != current_version for name, version in key[1])]
+            for key in stale:
+                self._bytes -= self._entries.pop(key).nbytes
+        return len(stale)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
@@ -0,0 +1,66 @@
+# query_profile.py
+# DuckDB profiling for SQL editor queries
+# --------------------------------------------------------------
+# Every query cursor collects a few query-level metrics (rows scanned,
+# peak buffer memory) through DuckDB's profiler; with ``operators`` it
+# collects the full operator tree with per-operator timings and row
+# counts - what EXPLAIN ANALYZE prints - from the query's own run, so
+# nothing is executed twice.
+# DuckDB only finalizes a profile when the query has finished, i.e.
+# once its result has been read to the end.
+# --------------------------------------------------------------
+
+import json
+
+import duckdb
+
+# Query-level metrics only; cheap enough to keep on for every query
+QUERY_METRICS = {"CUMULATIVE_ROWS_SCANNED": "true", "SYSTEM_PEAK_BUFFER_MEMORY": "true"}
+OPERATOR_METRICS = {**QUERY_METRICS, "OPERATOR_TIMING": "true", "OPERATOR_CARDINALITY": "true",
+                    "OPERATOR_ROWS_SCANNED": "true", "OPERATOR_TYPE": "true", "EXTRA_INFO": "true"}
+
+
+def enable(cursor, operators=False):
+    """Profile every later query on ``cursor``, without printing anything."""
+    metrics = json.dumps(OPERATOR_METRICS if operators else QUERY_METRICS)
+    cursor.execute("SET enable_profiling = 'no_output'")
+    cursor.execute("SET custom_profiling_settings = '" + metrics.replace("'", "''") + "'")
+
+
+def read(cursor):
+    """Profile of the last finished query on ``cursor`` as a dict, or None."""
+    try:
+        return json.loads(cursor.get_profiling_information(format="json"))
+    except (duckdb.Error, ValueError):
+        return None
+
+
+def summary(profile) -> dict:
+    """Rows scanned and peak buffer memory (bytes) of a whole query."""
+    return {
+        "rows_scanned": profile.get("cumulative_rows_scanned"),
+        "peak_bytes": profile.get("system_peak_buffer_memory"),
+    }
+
+
+def operators(profile) -> list:
+    """Operator tree flattened depth-first: one dict per operator, indented by depth."""
+    rows = []
+
+    def walk(node, depth):
+        for child in node.get("children", []):
+            name = child.get("operator_name") or child.get("operator_type", "?")
+            rows.append({
+                # Non-breaking spaces, so the table keeps the indentation
+                "Operator": "\u00a0\u00a0" * depth + ("└ " if depth else "") + name,
+                "Time (ms)": child.get("operator_timing", 0.0) * 1000,
+                "Rows": child.get("operator_cardinality"),
+                "Rows scanned": child.get("operator_rows_scanned"),
+            })
+            walk(child, depth + 1)
+
+    walk(profile, 0)
+    total = sum(row["Time (ms)"] for row in rows) or 1.0
+    for row in rows:
+        row["% time"] = 100 * row["Time (ms)"] / total
+    return rows
@@ -0,0 +1,105 @@
+# query_runner.py
+# SQL editor queries on worker threads
+# --------------------------------------------------------------
+# The script thread only starts a query and polls it, so a runaway
+# query never blocks a rerun:
+# - each query gets its own cursor and thread; the first page of rows
+#   is read on that thread too (for ORDER BY / aggregates that's where
+#   the work happens)
+# - cancel() and the timeout both go through the cursor's interrupt(),
+#   which stops only that query
+# - progress is DuckDB's own estimate (query_progress); it is None
+#   when DuckDB can't tell, e.g. for table functions like range()
+# - with ``profile_operators`` the whole result is read on the worker,
+#   so the operator profile is complete when the job finishes
+# Only finished jobs hand over their ResultSet; later pages are read by
+# the script thread as before.
+# --------------------------------------------------------------
+
+import threading
+import time
+
+import duckdb
+
+import query_profile
+from result_pages import ResultSet
+
+
+class QueryJob:
+    """One query running on a worker thread."""
+
+    def __init__(self, cursor, sql, first_page_rows, timeout=None, profile_operators=False):
+        """Start ``sql`` on ``cursor`` (owned by the job); ``timeout`` in seconds, None or 0 for no limit."""
+        self.sql = sql
+        self.profile_operators = profile_operators
+        self.timeout = timeout or None
+        self.rows = None  # ResultSet once finished without error
+        self.error = None
+        self.cancelled = False
+        self.timed_out = False
+        self._cursor = cursor
+        self._first_page_rows = first_page_rows
+        self._started = time.perf_counter()
+        self._finished = None
+        cursor.execute("SET enable_progress_bar = true")
+        cursor.execute("SET enable_progress_bar_print = false")
+        query_profile.enable(cursor, operators=profile_operators)
+        self._thread = threading.Thread(target=self._run, name="sql-editor-query", daemon=True)
+        self._timer = threading.Timer(self.timeout, self._expire) if self.timeout else None
+        self._thread.start()
+        if self._timer is not None:
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _run(self):
+        try:
+            rows = ResultSet.from_query(self._cursor, self.sql)
+            if self.profile_operators:
+                rows.to_table()
+            else:
+                rows.page(0, self._first_page_rows)
+            self.rows = rows
+        except Exception as e:
+            self.error = e
+            self._cursor.close()
+        finally:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._finished = time.perf_counter()
+
+    def _expire(self):
+        if not self.done:
+            self.timed_out = True
+            self._cursor.interrupt()
+
+    @property
+    def done(self) -> bool:
+        return self._finished is not None
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds since the query started (its run time once finished)."""
+        return (self._finished or time.perf_counter()) - self._started
+
+    @property
+    def progress(self):
+        """Fraction done (0-1) as estimated by DuckDB, or None when unknown."""
+        if self.done:
+            return 1.0
+        try:
+            percent = self._cursor.query_progress()
+        except duckdb.Error:
+            return None
+        return percent / 100 if percent >= 0 else None
+
+    def cancel(self):
+        if not self.done:
+            self.cancelled = True
+            self._cursor.interrupt()
+
+    def describe_error(self) -> str:
+        if self.timed_out:
+            return f"Query timed out after {self.timeout:g} s"
+        if self.cancelled:
+            return "Query cancelled"
+        return f"SQL Error: {self.error}"
@@ -0,0 +1,144 @@
+# result_pages.py
+# Paged query results for the SQL editor
+# --------------------------------------------------------------
+# A query's result is read through a DuckDB record batch reader on its
+# own cursor instead of being pulled into a DataFrame up front:
+# - showing page N reads batches only until page N is covered; the
+#   batches already read are kept, so earlier pages cost nothing
+# - the handle lives in session state, so paging (a rerun) carries on
+#   from the open reader rather than running the query again
+# - the row count is known once the reader is exhausted; until then
+#   it is "at least the rows read so far"
+# - to_table() reads whatever is left, for export and the result cache
+# - duplicate column names (self-joins, a.*, b.*) are renamed name_1,
+#   name_2, ... as DuckDB's .df() does, since DataFrames / st.dataframe
+#   need unique names
+# - the cursor's DuckDB profile (query_profile.py) is kept when the
+#   reader is exhausted, the only point where DuckDB has finalized it
+# - ``seconds`` adds up the time spent executing and reading batches,
+#   so it is the query's run time without the pauses between pages
+# The query runs in its own snapshot, so later statements on the
+# session connection don't change the pages of an open result.
+# --------------------------------------------------------------
+
+import io
+import threading
+import time
+
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+
+import query_profile
+
+BATCH_ROWS = 1024
+
+
+def unique_names(names) -> list:
+    """``names`` with repeats renamed ``name_1``, ``name_2``, ... (skipping names already in use)."""
+    taken = set(names)
+    seen = set()
+    result = []
+    for name in names:
+        unique, suffix = name, 0
+        while unique in seen:
+            suffix += 1
+            unique = f"{name}_{suffix}"
+            if unique in taken:
+                unique = name  # another column already has that name; try the next suffix
+        seen.add(unique)
+        result.append(unique)
+    return result
+
+
+class ResultSet:
+    """Rows of one query result, read from a record batch reader as pages need them."""
+
+    def __init__(self, schema, reader=None, cursor=None, batches=(), seconds=0.0):
+        self.schema = schema
+        self.column_names = unique_names(schema.names)
+        self._reader = reader
+        self._cursor = cursor
+        self._batches = [batch for batch in batches if batch.num_rows]
+        self._rows = sum(batch.num_rows for batch in self._batches)
+        self.profile = None  # DuckDB profile dict, once the query has finished
+        self.seconds = seconds
+        self._lock = threading.Lock()
+        if reader is None:
+            self._close()
+
+    @classmethod
+    def from_query(cls, cursor, sql, batch_rows=BATCH_ROWS):
+        """Run ``sql`` on ``cursor`` (owned by the result from then on) without fetching any rows yet."""
+        started = time.perf_counter()
+        reader = cursor.execute(sql).to_arrow_reader(batch_rows)
+        return cls(reader.schema, reader=reader, cursor=cursor, seconds=time.perf_counter() - started)
+
+    @classmethod
+    def from_table(cls, table):
+        """Result over an already materialized pyarrow Table (e.g. from the result cache)."""
+        return cls(table.schema, batches=table.to_batches())
+
+    @property
+    def exhausted(self) -> bool:
+        return self._reader is None
+
+    @property
+    def rows_read(self) -> int:
+        return self._rows
+
+    @property
+    def num_rows(self):
+        """Total row count, or None while the reader still has batches."""
+        return self._rows if self.exhausted else None
+
+    def _close(self):
+        self._reader = None
+        if self._cursor is not None:
+            self._cursor.close()
+            self._cursor = None
+
+    def _read_until(self, n_rows):
+        if self._reader is None:
+            return
+        started = time.perf_counter()
+        try:
+            self._read_batches(n_rows)
+        finally:
+            self.seconds += time.perf_counter() - started
+
+    def _read_batches(self, n_rows):
+        while self._reader is not None and (n_rows is None or self._rows < n_rows):
+            try:
+                batch = self._reader.read_next_batch()
+            except StopIteration:
+                self.profile = query_profile.read(self._cursor)
+                self._close()
+                break
+            if batch.num_rows:
+                self._batches.append(batch)
+                self._rows += batch.num_rows
+
+    def _table(self) -> pa.Table:
+        return pa.Table.from_batches(self._batches, schema=self.schema).rename_columns(self.column_names)
+
+    def page(self, index, page_size) -> pa.Table:
+        """Rows ``[index * page_size, (index + 1) * page_size)``, reading only the batches that needs."""
+        with self._lock:
+            self._read_until((index + 1) * page_size)
+            return self._table().slice(index * page_size, page_size)
+
+    def to_table(self) -> pa.Table:
+        """The whole result; reads every remaining batch."""
+        with self._lock:
+            self._read_until(None)
+            return self._table()
+
+    def to_csv(self) -> bytes:
+        buffer = io.BytesIO()
+        pa_csv.write_csv(self.to_table(), buffer)
+        return buffer.getvalue()
+
+    def close(self):
+        """Drop the open reader (and its cursor); rows already read stay available."""
+        with self._lock:
+            self._close()
@@ -2,11 +2,18 @@
 # Streamlit app: SQL query editor with example datasets
 # --------------------------------------------------------------
 # Features
-# - Load example CSV files from example_datasets directory
+# - Load example CSV / Parquet files from example_datasets directory
+#   into native DuckDB tables (see table_store.py)
 # - Simple table browser on the right sidebar
 # - Write SQL queries with DuckDB
 # - Preview tables with click
+# - Results paged straight from DuckDB record batches (result_pages.py)
+# - Queries run on worker threads with a timeout and a Cancel button
+#   (query_runner.py)
+# - History with wall time, rows scanned and peak memory per query, and
+#   optional operator profiles compared side by side (query_profile.py)
 # - Query history and results download
+# - Repeated queries served from a shared result cache (query_cache.py)
 #
 # Run locally:
 #   pip install streamlit duckdb pandas pyarrow openpyxl
@@ -14,7 +21,11 @@
 # --------------------------------------------------------------
 
 import io
+import os
 import re
+import sys
+import time
+import uuid
 from typing import Dict, List
 import json
 
@@ -23,7 +34,19 @@ import pandas as pd
 import requests
 import streamlit as st
 
+import query_profile
+from query_cache import QueryCache, is_volatile, normalize_sql
+from query_runner import QueryJob
+from result_pages import ResultSet
+from table_store import (attach_examples, build_database, discover_sources, download, list_tables, local_tables,
+                         session_cursor, versions)
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))  # shared perf_panel.py
+from perf_panel import render_panel, stage, start_rerun, timed
+
 st.set_page_config(page_title="SQL Query Editor", layout="wide")
+# Stage timings for this rerun (sidebar panel with ?perf=1)
+perf = start_rerun("sql_code_editor")
 st.title("🧠 SQL Query Editor")
 st.caption("Write SQL queries against example datasets — powered by DuckDB.")
 
@@ -39,45 +62,89 @@ def sanitize_name(name: str) -> str:
         name = f"t_{name}"
     return name.lower()
 
-# --- Session state: DuckDB connection and table registry ------
+# --- Example tables -------------------------------------------
+EXAMPLES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "example_datasets")
+GITHUB_BASE_URL = "https://raw.githubusercontent.com/mhuh22/Python-workspace/master/Personal_Projects/Code_Assistant/example_datasets/"
+GITHUB_FILES = ["customers.csv", "orders.csv", "products.csv", "sales_2023.csv", "sales_2024.csv"]
+# Tables are built into a database file here once per content version and
+# attached read-only by every session; set SQL_EDITOR_DB_DIR=":memory:" to
+# load them into each session's own in-memory database instead
+TABLE_CACHE_DIR = ".sql_cache"
+DB_DIR = os.environ.get("SQL_EDITOR_DB_DIR", TABLE_CACHE_DIR)
+# Default per-query timeout in seconds (0 = none; adjustable in the sidebar)
+# and how many queries one session may have running at once
+QUERY_TIMEOUT = int(os.environ.get("SQL_EDITOR_TIMEOUT", 60))
+MAX_RUNNING_QUERIES = int(os.environ.get("SQL_EDITOR_MAX_QUERIES", 2))
+
+def load_example_sources():
+    """Local example_datasets files (re-hashed only when they change), or their GitHub copies."""
+    if os.path.isdir(EXAMPLES_DIR):
+        return discover_sources(EXAMPLES_DIR, sanitize_name)
+    download_dir = os.path.join(TABLE_CACHE_DIR, "downloads")
+    if not st.session_state.get("examples_downloaded"):
+        for fname in GITHUB_FILES:
+            try:
+                download(GITHUB_BASE_URL + fname, download_dir)
+            except Exception as e:
+                if not os.path.exists(os.path.join(download_dir, fname)):
+                    st.error(f"Could not load {fname}: {e}")
+        st.session_state.examples_downloaded = True
+    return discover_sources(download_dir, sanitize_name) if os.path.isdir(download_dir) else []
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def example_database(version_key, _sources):
+    """Database file with the example tables, built once per set of content versions."""
+    return build_database(_sources, DB_DIR)
+
+@st.cache_resource(show_spinner=False)
+def get_query_cache():
+    """Result cache shared by every session (results of the same SQL over the same table versions)."""
+    return QueryCache()
+
+# --- Session state: DuckDB connection -------------------------
 if "con" not in st.session_state:
     st.session_state.con = duckdb.connect(database=":memory:")
-if "tables" not in st.session_state:
-    st.session_state.tables = {}  # name -> DataFrame
 if "history" not in st.session_state:
-    st.session_state.history = []  # list of (sql, ok, rows)
-if "example_loaded" not in st.session_state:
-    st.session_state.example_loaded = False
+    # newest first: {"id", "sql", "ok", "rows", "cached", "seconds", "first_page_seconds", "rows_scanned",
+    #                "peak_bytes", "profile"}
+    st.session_state.history = []
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex[:12]
+    st.session_state.write_epoch = 0  # bumped by every statement that may change this session's tables
 if "selected_table" not in st.session_state:
     st.session_state.selected_table = None
+if "result" not in st.session_state:
+    # {"job", "rows", "cache_key", "entry", "writes", "operators"} of the last query run
+    st.session_state.result = None
+    st.session_state.jobs = []  # results whose queries are still running (including superseded ones)
 
 con: duckdb.DuckDBPyConnection = st.session_state.con
+query_cache = get_query_cache()
 
-# --- Load example tables from example_datasets directory ------
-def load_example_tables():
-    """Load CSVs directly from GitHub raw links and register them as tables."""
-    base_url = "https://raw.githubusercontent.com/mhuh22/Python-workspace/master/Personal_Projects/Code_Assistant/example_datasets/"
-
-    files = [
-        "customers.csv",
-        "orders.csv",
-        "products.csv",
-        "sales_2023.csv",
-        "sales_2024.csv"
-        # add more CSVs here if you add to the repo
-    ]
-
-    for fname in files:
-        try:
-            url = base_url + fname
-            df = pd.read_csv(url)
-            tname = sanitize_name(fname.replace(".csv", ""))
-            st.session_state.tables[tname] = df
-            con.register(tname, df)
-        except Exception as e:
-            st.error(f"Could not load {fname}: {e}")
+# Attach (or load) the examples once per content version, not on every rerun
+with stage("load"):
+    sources = load_example_sources()
+    example_versions = versions(sources)
+    if st.session_state.get("example_versions") != example_versions:
+        db_path = None
+        if DB_DIR != ":memory:" and sources:
+            db_path = example_database(tuple(sorted(example_versions.items())), sources)
+        # Open results read the examples being replaced
+        for result in [st.session_state.result, *st.session_state.jobs]:
+            if result is not None and result["job"] is not None:
+                result["job"].cancel()
+            elif result is not None and result["rows"] is not None:
+                result["rows"].close()
+        attach_examples(con, sources, db_path)
+        st.session_state.example_versions = example_versions
+        # Results over replaced versions can't be hit any more; free them now
+        for tname, version in example_versions.items():
+            query_cache.invalidate(tname, version)
 
+with stage("normalize"):
+    tables = list_tables(con)  # name -> (rows, columns)
 
+@timed("load")
 def load_sql_questions():
     """Load SQL questions directly from GitHub raw link."""
     url = "https://raw.githubusercontent.com/mhuh22/Python-workspace/master/Personal_Projects/Code_Assistant/sql_questions.json"
@@ -89,18 +156,83 @@ def load_sql_questions():
         st.sidebar.warning(f"Could not load SQL questions: {e}")
         return None
 
-# Load examples on first run
-if not st.session_state.example_loaded:
-    load_example_tables()
-    st.session_state.example_loaded = True
+def is_write(query) -> bool:
+    """True when any statement in ``query`` isn't a SELECT (and so may change the session's tables)."""
+    return any(statement.type != duckdb.StatementType.SELECT for statement in duckdb.extract_statements(query))
+
+def result_cache_key(query):
+    """Cache key for a single read-only query, or None when its result can't be reused.
 
-# Re-register everything (ensures persistence across reruns)
-for tname, df in st.session_state.tables.items():
+    Example tables are versioned by content, so their results are shared
+    across sessions; the session's own tables (and, without an attached
+    examples file, everything) are versioned by this session's writes.
+    """
+    statements = duckdb.extract_statements(query)
+    normalized = normalize_sql(query)
+    if len(statements) != 1 or is_volatile(normalized):
+        return None
     try:
-        con.unregister(tname)
-    except Exception:
-        pass
-    con.register(tname, df)
+        names = con.get_table_names(query)
+    except duckdb.Error:
+        return None
+    local = local_tables(con)
+    table_versions = {}
+    for name in names:
+        if name in local:
+            table_versions[name] = f"{st.session_state.session_id}:{st.session_state.write_epoch}"
+        elif name in st.session_state.example_versions:
+            table_versions[name] = st.session_state.example_versions[name]
+        else:
+            return None
+    return QueryCache.key(normalized, table_versions)
+
+def record_finished(result):
+    """Copy the finished query's row count, run time and DuckDB profile into its history entry."""
+    rows, entry = result["rows"], result["entry"]
+    entry["rows"] = rows.num_rows
+    if not entry["cached"]:
+        entry["seconds"] = rows.seconds  # executing and reading every batch, not the time between pages
+    if rows.profile is not None:
+        entry.update(query_profile.summary(rows.profile))
+        if result["operators"]:
+            entry["profile"] = query_profile.operators(rows.profile)
+
+def settle(result) -> bool:
+    """Hand a finished job's rows (or error) to its result and history entry; False while it still runs."""
+    job = result["job"]
+    if job is None:
+        return True
+    if not job.done:
+        return False
+    result["job"] = None
+    if result["writes"]:
+        # Bumped at submit too; queries run while the write was in flight may
+        # have been cached against the old data under the submit-time epoch
+        st.session_state.write_epoch += 1
+    result["entry"]["first_page_seconds"] = job.elapsed
+    if job.error is not None:
+        result["error"] = job.describe_error()
+        result["entry"].update(ok=False, rows=0, seconds=job.elapsed)
+    else:
+        result["rows"] = job.rows
+        if job.rows.exhausted:
+            record_finished(result)
+    return True
+
+@st.fragment(run_every=0.5)
+def query_status(job):
+    """Elapsed time, progress and Cancel for the running query; reruns the page once it finishes."""
+    if job.done:
+        st.rerun()
+    progress = job.progress
+    label = f"⏳ Running for {job.elapsed:.1f} s"
+    if progress is not None:
+        label += f" — {progress:.0%}"
+    if job.timeout:
+        label += f" (timeout {job.timeout:g} s)"
+    st.progress(progress or 0.0, text=label)
+    if st.button("⏹️ Cancel", key="cancel_query"):
+        job.cancel()
 
 # --- Sidebar: Simple table list -------------------------------
 st.sidebar.header("Tables")
@@ -108,12 +240,13 @@ st.sidebar.header("Tables")
 # Add search box
 search_query = st.sidebar.text_input("🔍 Search tables", placeholder="Type to filter...", key="table_search")
 
-if st.session_state.tables:
+if tables:
     # Filter tables based on search query
-    filtered_tables = [
-        tname for tname in sorted(st.session_state.tables.keys())
-        if search_query.lower() in tname.lower()
-    ]
+    with stage("filter"):
+        filtered_tables = [
+            tname for tname in sorted(tables)
+            if search_query.lower() in tname.lower()
+        ]
     
     if filtered_tables:
         for tname in filtered_tables:
@@ -124,8 +257,12 @@ if st.session_state.tables:
 else:
     st.sidebar.info("No tables loaded")
 
+query_timeout = st.sidebar.number_input("⏱️ Query timeout (seconds)", min_value=0, value=QUERY_TIMEOUT, step=10,
+                                        help="Queries still running after this long are stopped; 0 for no limit",
+                                        key="query_timeout")
+
 # --- Main area: Query editor and results ----------------------
-row_limit = 1000
+PAGE_SIZES = [100, 500, 1000, 5000]
 
 # --- Practice Questions Section at Top ------------------------
 questions_data = load_sql_questions()
@@ -192,8 +329,8 @@ st.subheader("✏️ SQL Query")
 
 # Sample queries based on available tables
 sample_query = ""
-if st.session_state.tables:
-    table_list = sorted(st.session_state.tables.keys())
+if tables:
+    table_list = sorted(tables)
     if "customers" in table_list and "orders" in table_list:
         sample_query = """-- Example: Join customers and orders
 SELECT 
@@ -213,81 +350,156 @@ LIMIT 10;"""
 
 sql = st.text_area("Write your SQL here", value=sample_query, height=250, key="sql_editor")
 
-col1, col2 = st.columns([1, 5])
+col1, col2, col3 = st.columns([1, 1, 4])
 with col1:
     run = st.button("▶️ Run Query", type="primary", use_container_width=True)
 with col2:
-    if st.session_state.tables:
-        st.caption(f"💡 Available tables: {', '.join(sorted(st.session_state.tables.keys()))}")
+    profile_operators = st.checkbox("🔬 Profile", key="profile_query",
+                                    help="Record DuckDB's operator tree and per-operator timings "
+                                         "(as EXPLAIN ANALYZE shows them); reads the whole result")
+with col3:
+    if tables:
+        st.caption(f"💡 Available tables: {', '.join(sorted(tables))}")
 
 # --- Execute query --------------------------------------------
+# Superseded queries keep running (and count against the limit) until
+# they finish; only their history entry is updated then
+running = []
+for job_result in st.session_state.jobs:
+    if not settle(job_result):
+        running.append(job_result)
+    elif job_result is not st.session_state.result and job_result["rows"] is not None:
+        job_result["rows"].close()
+st.session_state.jobs = running
 if run:
-    if not st.session_state.tables:
+    if not tables:
         st.warning("No tables available. Add CSV files to the example_datasets folder.")
+    elif len(st.session_state.jobs) >= MAX_RUNNING_QUERIES:
+        st.warning(f"{len(st.session_state.jobs)} queries are already running in this session "
+                   f"(limit {MAX_RUNNING_QUERIES}). Wait for them to finish or cancel them.")
     else:
+        previous = st.session_state.result
+        if previous is not None and previous["job"] is None and previous["rows"] is not None:
+            previous["rows"].close()
+        st.session_state.result = None
+        user_sql = sql.strip().rstrip(";")
+        entry = {"id": len(st.session_state.history) + 1, "sql": user_sql, "ok": True, "rows": None, "cached": None,
+                 "seconds": None, "first_page_seconds": None, "rows_scanned": None, "peak_bytes": None, "profile": None}
         try:
-            # Apply row limit if user didn't specify a LIMIT
-            user_sql = sql.strip().rstrip(";")
-            has_limit = re.search(r"\blimit\b\s+\d+\s*$", user_sql, flags=re.I) is not None
-            final_sql = user_sql if has_limit else f"{user_sql} LIMIT {row_limit}"
-
-            res = con.execute(final_sql)
-            try:
-                df = res.df()
-            except Exception:
-                df = pd.DataFrame()
+            # The query runs on a worker thread; this rerun only starts it
+            with stage("query"):
+                started = time.perf_counter()
+                writes = is_write(user_sql)
+                if writes:
+                    st.session_state.write_epoch += 1
+                cache_key = None if writes else result_cache_key(user_sql)
+                # A profile needs the query to actually run
+                cached = query_cache.get(cache_key) if cache_key is not None and not profile_operators else None
+                result = {"job": None, "rows": None, "cache_key": cache_key, "entry": entry, "writes": writes,
+                          "operators": profile_operators}
+                if cached is not None:
+                    result["rows"] = ResultSet.from_table(cached)
+                    entry.update(rows=cached.num_rows, seconds=time.perf_counter() - started)
+                else:
+                    page_rows = st.session_state.get("result_page_size", PAGE_SIZES[0])
+                    result["job"] = QueryJob(session_cursor(con), user_sql, page_rows, timeout=query_timeout,
+                                             profile_operators=profile_operators)
+                    st.session_state.jobs.append(result)
+            entry["cached"] = None if cache_key is None or profile_operators else cached is not None
+            st.session_state.result = result
+            st.session_state.result_page = 1
+        except Exception as e:
+            st.error(f"❌ SQL Error: {e}")
+            entry.update(ok=False, rows=0)
+        st.session_state.history.insert(0, entry)
 
-            st.success(f"✅ Query executed successfully — {len(df):,} rows returned")
-            st.dataframe(df, use_container_width=True, height=400)
+# --- Results (kept across reruns for paging) -------------------
+result = st.session_state.result
+if result is not None and not settle(result):
+    st.caption(result["entry"]["sql"][:200])
+    query_status(result["job"])
+elif result is not None and "error" in result:
+    st.error(f"❌ {result['error']}")
+    st.session_state.result = None
+elif result is not None:
+    rows: ResultSet = result["rows"]
+    col1, col2 = st.columns([1, 1])
+    with col1:
+        page_size = st.selectbox("Rows per page", PAGE_SIZES, key="result_page_size")
+    total_pages = None if rows.num_rows is None else max(1, -(-rows.num_rows // page_size))
+    if total_pages is not None and st.session_state.get("result_page", 1) > total_pages:
+        st.session_state.result_page = total_pages
+    with col2:
+        page = st.number_input("Page", min_value=1, max_value=total_pages, step=1, key="result_page")
+    # A failing page (a runtime error further into the result, or one that
+    # can't be rendered) drops the result instead of failing every rerun
+    try:
+        with stage("query"):
+            page_df = rows.page(int(page) - 1, page_size).to_pandas()
+        if rows.exhausted:
+            if result["entry"]["rows"] is None:
+                record_finished(result)
+            if result["cache_key"] is not None and not result["entry"]["cached"]:
+                query_cache.put(result["cache_key"], rows.to_table())
+                result["cache_key"] = None  # stored once
+        first = (int(page) - 1) * page_size
+        total = f"{rows.num_rows:,}" if rows.exhausted else f"{rows.rows_read:,}+"
+        st.success(f"✅ Query executed successfully — rows {min(first + 1, first + len(page_df)):,}–"
+                   f"{first + len(page_df):,} of {total}" + (" (cached)" if result["entry"]["cached"] else ""))
+        with stage("render"):
+            st.dataframe(page_df, use_container_width=True, height=400)
 
-            # Download button
-            if not df.empty:
-                csv_bytes = df.to_csv(index=False).encode("utf-8")
+            # Download button; the whole result is only read when clicked
+            if rows.rows_read:
                 st.download_button(
                     "⬇️ Download Results (CSV)",
-                    data=csv_bytes,
+                    data=rows.to_csv,
                     file_name="query_results.csv",
                     mime="text/csv",
                 )
-
-            st.session_state.history.insert(0, (final_sql, True, len(df)))
-        except Exception as e:
-            st.error(f"❌ SQL Error: {e}")
-            st.session_state.history.insert(0, (sql, False, 0))
+    except Exception as e:
+        st.error(f"❌ SQL Error: {e}")
+        result["entry"]["ok"] = False
+        rows.close()
+        st.session_state.result = None
 
 # --- Table Preview --------------------------------------------
 if st.session_state.selected_table:
     st.divider()
     st.subheader(f"🔍 Table Preview: `{st.session_state.selected_table}`")
     
-    preview_df = st.session_state.tables[st.session_state.selected_table]
+    preview_table = st.session_state.selected_table
+    n_rows, n_cols = tables.get(preview_table, (0, 0))
     
     col1, col2, col3, col4 = st.columns(4)
     with col1:
-        st.metric("Rows", f"{len(preview_df):,}")
+        st.metric("Rows", f"{n_rows:,}")
     with col2:
-        st.metric("Columns", len(preview_df.columns))
+        st.metric("Columns", n_cols)
     with col3:
-        preview_rows = st.number_input("Preview rows", min_value=5, max_value=len(preview_df), value=min(100, len(preview_df)), step=25, key="preview_rows")
+        preview_rows = st.number_input("Preview rows", min_value=5, max_value=max(n_rows, 5), value=min(100, max(n_rows, 5)), step=25, key="preview_rows")
     with col4:
         st.write("")  # spacer
         if st.button("✖️ Close Preview"):
             st.session_state.selected_table = None
             st.rerun()
     
-    st.dataframe(preview_df.head(preview_rows), use_container_width=True, height=300)
+    with stage("render"):
+        preview_df = con.execute(f'SELECT * FROM "{preview_table}" LIMIT {int(preview_rows)}').df()
+        st.dataframe(preview_df, use_container_width=True, height=300)
     
     # Quick actions
     col1, col2 = st.columns(2)
     with col1:
-        st.code(f"SELECT * FROM {st.session_state.selected_table} LIMIT 100;", language="sql")
+        st.code(f"SELECT * FROM {preview_table} LIMIT 100;", language="sql")
     with col2:
         # Download full table as CSV
-        csv_bytes = preview_df.to_csv(index=False).encode("utf-8")
+        with stage("render"):
+            csv_bytes = con.execute(f'SELECT * FROM "{preview_table}"').df().to_csv(index=False).encode("utf-8")
         st.download_button(
             "⬇️ Download Full Table",
             data=csv_bytes,
-            file_name=f"{st.session_state.selected_table}.csv",
+            file_name=f"{preview_table}.csv",
             mime="text/csv",
             key="download_preview"
         )
@@ -296,15 +508,54 @@ if st.session_state.selected_table:
 if st.session_state.history:
     st.divider()
     with st.expander(f"📜 Query History ({len(st.session_state.history[:10])} recent)"):
-        for i, (q, ok, n) in enumerate(st.session_state.history[:10], start=1):
-            status = "✅" if ok else "❌"
-            st.markdown(f"**{i}. {status} {n:,} rows**")
-            st.code(q, language="sql")
-            if i < len(st.session_state.history[:10]):
+        cache_stats = query_cache.stats()
+        st.caption(f"Result cache: {cache_stats['hits']:,} hits / {cache_stats['misses']:,} misses, "
+                   f"{cache_stats['entries']:,} results ({cache_stats['bytes'] / 1e6:.1f} of "
+                   f"{cache_stats['max_bytes'] / 1e6:.0f} MB)")
+        recent = st.session_state.history[:10]
+        # Timings side by side; wall time, rows scanned and peak memory appear once a result
+        # has been read to the end (wall time leaves out the pauses between pages)
+        st.dataframe(pd.DataFrame([{
+            "#": entry["id"],
+            "Status": "✅" if entry["ok"] else "❌",
+            "Rows": entry["rows"],
+            "Wall time (ms)": None if entry["seconds"] is None else entry["seconds"] * 1000,
+            "First page (ms)": (None if entry["first_page_seconds"] is None
+                                else entry["first_page_seconds"] * 1000),
+            "Rows scanned": entry["rows_scanned"],
+            "Peak memory (MB)": None if entry["peak_bytes"] is None else entry["peak_bytes"] / 1e6,
+            "Cache": {True: "hit", False: "miss"}.get(entry["cached"], ""),
+            "Query": " ".join(entry["sql"].split())[:80],
+        } for entry in recent]), hide_index=True, use_container_width=True)
+
+        profiled = {entry["id"]: entry for entry in recent if entry["profile"]}
+        if profiled:
+            compare = st.multiselect("🔬 Compare operator profiles", list(profiled), default=list(profiled)[:2],
+                                     max_selections=3,
+                                     format_func=lambda i: f"#{i}: {' '.join(profiled[i]['sql'].split())[:40]}")
+            for col, i in zip(st.columns(max(len(compare), 1)), compare):
+                entry = profiled[i]
+                with col:
+                    st.markdown(f"**#{i}** — {entry['seconds'] * 1000:,.1f} ms, "
+                                f"{entry['rows_scanned'] or 0:,} rows scanned")
+                    st.dataframe(pd.DataFrame(entry["profile"]), hide_index=True, use_container_width=True,
+                                 column_config={"Time (ms)": st.column_config.NumberColumn(format="%.3f"),
+                                                "% time": st.column_config.ProgressColumn(min_value=0, max_value=100,
+                                                                                          format="%.0f%%")})
+
+        for i, entry in enumerate(recent, start=1):
+            status = "✅" if entry["ok"] else "❌"
+            source = {True: " · cache hit", False: " · cache miss"}.get(entry["cached"], "")
+            n_rows = "… rows" if entry["rows"] is None else f"{entry['rows']:,} rows"
+            st.markdown(f"**{i}. {status} {n_rows}{source}**")
+            st.code(entry["sql"], language="sql")
+            if i < len(recent):
                 st.markdown("---")
 
 # --- Footer ----------------------------------------------------
 st.caption(
-    "💾 All queries run in-memory with DuckDB. No data is sent to external databases. "
-    "Place CSV files in the `example_datasets` folder to load them automatically."
-)
\ No newline at end of file
+    "💾 All queries run locally with DuckDB. No data is sent to external databases. "
+    "Place CSV or Parquet files in the `example_datasets` folder to load them automatically."
+)
+
+render_panel(perf)
@@ -0,0 +1,169 @@
+# table_store.py
+# Example datasets as native DuckDB tables
+# --------------------------------------------------------------
+# Source files (CSV through read_csv_auto, Parquet through read_parquet)
+# are hashed, and each table's version is its content hash:
+# - with a database directory, the tables are built once per set of
+#   versions into their own file (examples-<digest>.duckdb) that every
+#   session ATTACHes read-only; nothing is copied per session or rerun,
+#   and a restart with unchanged files reuses the file as is
+# - without one, each session loads the tables into its in-memory
+#   database once (not on every rerun)
+# Sessions keep their own in-memory database for tables they create;
+# the example tables are found through the search path, so a user
+# table with the same name shadows an example only in that session.
+# --------------------------------------------------------------
+
+import hashlib
+import os
+from dataclasses import dataclass
+
+import duckdb
+import requests
+
+READERS = {".csv": "read_csv_auto", ".parquet": "read_parquet"}
+EXAMPLES_ALIAS = "examples"
+
+_hashes = {}  # (path, mtime_ns, size) -> sha256
+
+
+@dataclass(frozen=True)
+class TableSource:
+    """One source file and the table it becomes."""
+
+    name: str
+    path: str
+    sha256: str
+
+    @property
+    def version(self) -> str:
+        return self.sha256[:12]
+
+    @property
+    def reader(self) -> str:
+        return READERS[os.path.splitext(self.path)[1].lower()]
+
+
+def file_sha256(path) -> str:
+    """SHA-256 of a file, recomputed only when its size or mtime changes."""
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    if key not in _hashes:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        _hashes[key] = digest.hexdigest()
+    return _hashes[key]
+
+
+def download(url, cache_dir, timeout=15) -> str:
+    """Fetch ``url`` into ``cache_dir`` (replacing any earlier copy) and return the local path."""
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, os.path.basename(url))
+    resp = requests.get(url, timeout=timeout)
+    resp.raise_for_status()
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(resp.content)
+    os.replace(tmp, path)
+    return path
+
+
+def discover_sources(directory, sanitize) -> list:
+    """TableSource for every CSV / Parquet file in ``directory``, sorted by table name."""
+    sources = []
+    for fname in sorted(os.listdir(directory)):
+        stem, ext = os.path.splitext(fname)
+        if ext.lower() in READERS:
+            path = os.path.join(directory, fname)
+            sources.append(TableSource(sanitize(stem), path, file_sha256(path)))
+    return sources
+
+
+def versions(sources) -> dict:
+    """Table name -> content version."""
+    return {source.name: source.version for source in sources}
+
+
+def _load(con, source):
+    con.execute(f'CREATE OR REPLACE TABLE "{source.name}" AS SELECT * FROM {source.reader}(?)', [source.path])
+
+
+def build_database(sources, db_dir) -> str:
+    """Path of the database file holding ``sources``; built only if it doesn't exist yet."""
+    digest = hashlib.sha256("\x1f".join(f"{s.name}={s.sha256}" for s in sources).encode("utf-8")).hexdigest()
+    path = os.path.join(db_dir, f"examples-{digest[:16]}.duckdb")
+    if os.path.exists(path):
+        return path
+    os.makedirs(db_dir, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    con = duckdb.connect(tmp)
+    try:
+        for source in sources:
+            _load(con, source)
+        con.execute("CHECKPOINT")
+    finally:
+        con.close()
+    os.replace(tmp, path)
+    # Sessions with an older version attached keep reading their open file;
+    # where the OS won't delete it (Windows) it goes at the next rebuild
+    for fname in os.listdir(db_dir):
+        if fname.startswith("examples-") and fname.endswith(".duckdb") and os.path.join(db_dir, fname) != path:
+            try:
+                os.remove(os.path.join(db_dir, fname))
+            except OSError:
+                pass
+    return path
+
+
+def attach_examples(con, sources, db_path=None):
+    """Make the example tables visible on a session connection.
+
+    With ``db_path`` the file is attached read-only (replacing an earlier
+    version); otherwise the tables are loaded into the session's own
+    in-memory database.
+    """
+    attached = {row[0] for row in con.execute("SELECT database_name FROM duckdb_databases()").fetchall()}
+    if EXAMPLES_ALIAS in attached:
+        con.execute(f"DETACH {EXAMPLES_ALIAS}")
+    if db_path is None:
+        for source in sources:
+            _load(con, source)
+        return
+    # ATTACH takes no parameters; quote the path as a string literal
+    quoted = "'" + db_path.replace("'", "''") + "'"
+    con.execute(f"ATTACH {quoted} AS {EXAMPLES_ALIAS} (READ_ONLY)")
+    con.execute(f"SET search_path = 'memory.main,{EXAMPLES_ALIAS}.main'")
+
+
+def list_tables(con) -> dict:
+    """Table name -> (rows, columns) for every table the session can query by name."""
+    rows = con.execute(
+        "SELECT table_name, estimated_size, column_count FROM duckdb_tables() "
+        "WHERE NOT internal AND schema_name = 'main' AND database_name IN ('memory', ?) "
+        # The session's own tables shadow examples of the same name
+        "ORDER BY database_name = 'memory'",
+        [EXAMPLES_ALIAS],
+    ).fetchall()
+    return {name: (int(n_rows), int(n_cols)) for name, n_rows, n_cols in rows}
+
+
+def local_tables(con) -> set:
+    """Tables and views in the session's own in-memory database."""
+    rows = con.execute(
+        "SELECT table_name FROM duckdb_tables() WHERE database_name = 'memory' AND schema_name = 'main' "
+        "UNION SELECT view_name FROM duckdb_views() WHERE NOT internal AND database_name = 'memory'"
+    ).fetchall()
+    return {name for (name,) in rows}
+
+
+def session_cursor(con):
+    """New cursor on the session's database that resolves table names the same way ``con`` does."""
+    cursor = con.cursor()
+    (search_path,) = con.execute("SELECT current_setting('search_path')").fetchone()
+    if search_path:
+        cursor.execute("SET search_path = '" + search_path.replace("'", "''") + "'")
+    return cursor
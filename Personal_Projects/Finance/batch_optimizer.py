@@ -0,0 +1,275 @@
+# batch_optimizer.py
+# Headless batch runner for the credit card rewards optimizer
+# --------------------------------------------------------------
+# The same scoring the Streamlit apps do, without any UI:
+# - optimize_statement(): one statement -> best card per transaction,
+#   header totals and the best fee-aware card set
+# - optimize_directory(): every CSV in a folder, fanned out over a
+#   process pool (the catalog is compiled once per worker), with
+#   per-file results streamed to disk as they finish
+#
+# Usage:
+#   python batch_optimizer.py statements/ --output results/ --workers 8
+# Writes results/files.parquet (or files.jsonl without pyarrow), one
+# row per statement, and results/summary.json with totals across all
+# files, the best card set for the combined spend and rows/s.
+# With --result-cache, each statement's result is stored under its file
+# hash, the catalog version and the ingest / engine versions, so
+# re-running over the same files with the same cards skips them entirely.
+# --------------------------------------------------------------
+
+import argparse
+import glob
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from portfolio_optimizer import annual_category_spend, optimize_portfolio
+from result_cache import ResultCache
+from rewards_engine import ENGINE_VERSION, UNKNOWN_CATEGORY, CardCatalog, score_transactions, summarize_scores
+from statement_ingest import HAS_PARQUET, NORMALIZE_VERSION, file_hash, ingest_statement
+
+DEFAULT_CATALOG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cc_options.json")
+# Per-file results are flushed to disk in batches of this many files
+WRITE_BATCH = 256
+
+if HAS_PARQUET:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    RESULT_SCHEMA = pa.schema([
+        ("file", pa.string()),
+        ("ok", pa.bool_()),
+        ("error", pa.string()),
+        ("rows_read", pa.int64()),
+        ("rows_kept", pa.int64()),
+        ("rows_rejected", pa.int64()),
+        ("total_spend", pa.float64()),
+        ("total_gross_rewards", pa.float64()),
+        ("total_annual_costs", pa.float64()),
+        ("net_rewards", pa.float64()),
+        ("cards_used", pa.list_(pa.string())),
+        ("portfolio_cards", pa.list_(pa.string())),
+        ("portfolio_net_rewards", pa.float64()),
+        ("cached", pa.bool_()),
+        ("seconds", pa.float64()),
+    ])
+
+
+def load_catalog(path=DEFAULT_CATALOG) -> CardCatalog:
+    """Compile a cc_options.json file."""
+    with open(path, "r", encoding="utf-8") as f:
+        return CardCatalog.from_cc_data(json.load(f))
+
+
+def optimize_statement(source, catalog, cache_dir=None, result_cache=None) -> dict:
+    """Optimize one statement (path, bytes or file object) against a compiled catalog.
+
+    Returns a flat dict: ingest counts, the header totals the apps show,
+    the best fee-aware card set, and ``spend`` (the annualized per-category
+    spend vector used for it, as a list). With a ResultCache, a statement
+    already optimized against this catalog is answered without reading it;
+    ``cached`` says whether it was (None without a cache).
+    """
+    started = time.perf_counter()
+    key = None
+    if result_cache is not None:
+        key = f"statement:v{ENGINE_VERSION}.{NORMALIZE_VERSION}:{catalog.version}:{file_hash(source)}"
+        cached = result_cache.get_json(key)
+        if cached is not None:
+            return {**cached, "cached": True, "seconds": time.perf_counter() - started}
+
+    frame, report = ingest_statement(source, cache_dir=cache_dir)
+    amounts = frame["price"].to_numpy()
+    scores = score_transactions(frame["category"], amounts, catalog, dates=frame["date"])
+    totals = summarize_scores(amounts, scores)
+    spend = annual_category_spend(frame["category"], amounts, frame["date"])
+    portfolios = optimize_portfolio(catalog, spend, top_k=1)
+    best = portfolios[0] if portfolios else {"cards": [], "net_rewards": 0.0}
+    result = {
+        "rows_read": report["rows_read"],
+        "rows_kept": report["rows_kept"],
+        "rows_rejected": sum(report["rejected"].values()),
+        "total_spend": totals["total_spend"],
+        "total_gross_rewards": totals["total_gross_rewards"],
+        "total_annual_costs": totals["total_annual_costs"],
+        "net_rewards": totals["net_rewards"],
+        "cards_used": list(totals["cards_used"]),
+        "portfolio_cards": list(best["cards"]),
+        "portfolio_net_rewards": best["net_rewards"],
+        "spend": spend.tolist(),
+    }
+    if key is not None:
+        result_cache.put_json(key, result)
+    return {**result, "cached": False if key is not None else None, "seconds": time.perf_counter() - started}
+
+
+# --- worker process -----------------------------------------------
+_worker_catalog = None
+_worker_cache_dir = None
+_worker_result_cache = None
+
+
+def _init_worker(catalog_path, cache_dir, result_cache_path):
+    global _worker_catalog, _worker_cache_dir, _worker_result_cache
+    _worker_catalog = load_catalog(catalog_path)
+    _worker_cache_dir = cache_dir
+    _worker_result_cache = ResultCache(result_cache_path) if result_cache_path else None
+
+
+def _run_file(path) -> dict:
+    try:
+        result = optimize_statement(path, _worker_catalog, cache_dir=_worker_cache_dir,
+                                    result_cache=_worker_result_cache)
+        result.update(file=path, ok=True, error=None)
+    except Exception as e:
+        result = {"file": path, "ok": False, "error": f"{type(e).__name__}: {e}"}
+    return result
+
+
+# --- output -------------------------------------------------------
+class _ResultWriter:
+    """Appends per-file rows to files.parquet (or files.jsonl) in batches."""
+
+    def __init__(self, output_dir):
+        self.pending = []
+        if HAS_PARQUET:
+            self.path = os.path.join(output_dir, "files.parquet")
+            self._parquet = pq.ParquetWriter(self.path, RESULT_SCHEMA)
+        else:
+            self.path = os.path.join(output_dir, "files.jsonl")
+            self._jsonl = open(self.path, "w", encoding="utf-8")
+
+    def add(self, result):
+        self.pending.append({k: v for k, v in result.items() if k != "spend"})
+        if len(self.pending) >= WRITE_BATCH:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        if HAS_PARQUET:
+            self._parquet.write_table(pa.Table.from_pylist(self.pending, schema=RESULT_SCHEMA))
+        else:
+            for row in self.pending:
+                self._jsonl.write(json.dumps(row) + "\n")
+            self._jsonl.flush()
+        self.pending = []
+
+    def close(self):
+        self.flush()
+        if HAS_PARQUET:
+            self._parquet.close()
+        else:
+            self._jsonl.close()
+
+
+def optimize_directory(input_dir, output_dir, catalog_path=DEFAULT_CATALOG, workers=None,
+                       pattern="*.csv", cache_dir=None, result_cache_path=None, progress=None) -> dict:
+    """Optimize every statement in ``input_dir`` over a process pool.
+
+    Per-file rows are streamed to ``output_dir`` as files finish; the
+    returned summary (also written to summary.json) covers all files.
+    ``progress`` is called with (done, total, result) after each file.
+    ``result_cache_path`` points the workers at a shared ResultCache file.
+    """
+    started = time.perf_counter()
+    paths = sorted(glob.glob(os.path.join(input_dir, pattern)))
+    os.makedirs(output_dir, exist_ok=True)
+    catalog = load_catalog(catalog_path)
+
+    combined_spend = np.zeros(UNKNOWN_CATEGORY + 1)
+    totals = {"total_spend": 0.0, "total_gross_rewards": 0.0, "total_annual_costs": 0.0, "net_rewards": 0.0}
+    rows_read = rows_kept = 0
+    # Cache lookups happen in the workers, so this run's hits / misses are
+    # counted from the results they send back
+    cache_hits = cache_misses = 0
+    card_picks = {}
+    failed = []
+
+    writer = _ResultWriter(output_dir)
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(catalog_path, cache_dir, result_cache_path)) as pool:
+            futures = [pool.submit(_run_file, path) for path in paths]
+            for done, future in enumerate(as_completed(futures), start=1):
+                result = future.result()
+                writer.add(result)
+                if result["ok"]:
+                    rows_read += result["rows_read"]
+                    rows_kept += result["rows_kept"]
+                    for key in totals:
+                        totals[key] += result[key]
+                    combined_spend += np.asarray(result["spend"])
+                    cache_hits += result["cached"] is True
+                    cache_misses += result["cached"] is False
+                    for card in result["portfolio_cards"]:
+                        card_picks[card] = card_picks.get(card, 0) + 1
+                else:
+                    failed.append({"file": result["file"], "error": result["error"]})
+                if progress:
+                    progress(done, len(paths), result)
+    finally:
+        writer.close()
+
+    portfolios = optimize_portfolio(catalog, combined_spend, top_k=3)
+    cache_stats = None
+    if result_cache_path:
+        cache_stats = {**ResultCache(result_cache_path).stats(), "hits": cache_hits, "misses": cache_misses}
+    seconds = time.perf_counter() - started
+    summary = {
+        "input_dir": os.path.abspath(input_dir),
+        "results_file": writer.path,
+        "catalog_version": catalog.version,
+        "files": len(paths),
+        "files_failed": len(failed),
+        "failures": failed,
+        "rows_read": rows_read,
+        "rows_kept": rows_kept,
+        **totals,
+        # Annual spend summed over statements, i.e. as if one household held them all
+        "combined_portfolios": [
+            {"cards": p["cards"], "gross_rewards": p["gross_rewards"],
+             "annual_fees": p["annual_fees"], "net_rewards": p["net_rewards"]}
+            for p in portfolios
+        ],
+        "portfolio_card_counts": dict(sorted(card_picks.items(), key=lambda kv: -kv[1])),
+        "result_cache": cache_stats,
+        "seconds": seconds,
+        "rows_per_s": rows_read / seconds if seconds > 0 else None,
+    }
+    with open(os.path.join(output_dir, "summary.json"), "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Optimize a directory of statement CSVs without the Streamlit UI.")
+    parser.add_argument("input_dir", help="folder of statement CSVs (date, vendor, category, price)")
+    parser.add_argument("--output", default="batch_results", help="folder for files.parquet and summary.json")
+    parser.add_argument("--catalog", default=DEFAULT_CATALOG, help="cc_options.json to score against")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--pattern", default="*.csv", help="file glob inside input_dir")
+    parser.add_argument("--cache-dir", default=None, help="reuse / write Parquet ingest caches here")
+    parser.add_argument("--result-cache", default=None,
+                        help="SQLite file of per-statement results to reuse across runs (e.g. .result_cache/results.sqlite)")
+    args = parser.parse_args()
+
+    def report_progress(done, total, result):
+        status = "ok" if result["ok"] else f"FAILED ({result['error']})"
+        print(f"[{done}/{total}] {os.path.basename(result['file'])}: {status}", flush=True)
+
+    summary = optimize_directory(args.input_dir, args.output, catalog_path=args.catalog, workers=args.workers,
+                                 pattern=args.pattern, cache_dir=args.cache_dir,
+                                 result_cache_path=args.result_cache, progress=report_progress)
+    print(f"{summary['files']} files, {summary['rows_read']:,} rows in {summary['seconds']:.1f}s "
+          f"({summary['rows_per_s'] or 0:,.0f} rows/s); {summary['files_failed']} failed")
+    if summary["result_cache"]:
+        stats = summary["result_cache"]
+        print(f"Result cache: {stats['hits']:,} hits / {stats['misses']:,} misses this run, "
+              f"{stats['total_hits']:,} / {stats['total_misses']:,} all-time, "
+              f"{stats['entries']:,} entries ({stats['bytes'] / 1e6:.1f} MB)")
+    print(f"Summary: {os.path.join(args.output, 'summary.json')}")
@@ -0,0 +1,248 @@
+# benchmark_optimizer.py
+# Benchmarks for the credit card rewards optimizer
+# --------------------------------------------------------------
+# Generates synthetic statements (10k - 10M rows over the 13 categories
+# the apps know) and synthetic card catalogs (6 - 1000 cards), then times
+# each stage of the pipeline:
+# - load        CSV on disk -> typed frame (ingest_statement, cold)
+# - load_cached same file served from the Parquet cache
+# - normalize   frame -> columnar TransactionStore -> editor frame
+# - catalog     cc_options dict -> CardCatalog
+# - optimize    best card per transaction + header totals
+# - card_options the per-transaction card_options() path (sampled rows)
+# - portfolio   annual spend vector -> top-3 card sets
+# - aggregate   month x category spend / count rollup
+# - chart_prep  top-20 category bars serialized to a Vega-Lite spec
+#
+# Usage:
+#   python benchmark_optimizer.py --rows 10000 1000000 --cards 6 100 1000 --output bench.json
+# Results are JSON (best of --repeat runs per stage) so runs can be diffed.
+# --------------------------------------------------------------
+
+import argparse
+import json
+import os
+import platform
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import altair as alt
+import numpy as np
+import pandas as pd
+
+from portfolio_optimizer import annual_category_spend, optimize_portfolio
+from rewards_engine import CATEGORY_MAPPING, INPUT_CATEGORIES, CardCatalog, score_transactions, summarize_scores
+from statement_ingest import HAS_PARQUET, ingest_statement
+from transaction_store import TransactionStore
+
+# Share of transactions and (mean, std) of the amount per category,
+# loosely fitted to sample_transactions.csv
+CATEGORY_PROFILE = {
+    "groceries": (0.17, 75.0, 18.0),
+    "dining": (0.20, 22.0, 5.0),
+    "gas": (0.07, 45.0, 12.0),
+    "online_shopping": (0.13, 55.0, 21.0),
+    "utilities": (0.06, 76.0, 25.0),
+    "airfare": (0.01, 490.0, 300.0),
+    "hotels": (0.01, 215.0, 35.0),
+    "subscriptions": (0.12, 12.5, 2.5),
+    "entertainment": (0.05, 40.0, 15.0),
+    "drugstores": (0.05, 25.0, 10.0),
+    "travel_portal": (0.01, 350.0, 150.0),
+    "home_improvement": (0.04, 66.0, 22.0),
+    "rideshare": (0.08, 17.0, 5.0),
+}
+VENDORS_PER_CATEGORY = 50
+ANNUAL_FEES = [0, 0, 0, 95, 95, 150, 250, 395, 550, 695]
+CARD_OPTIONS_SAMPLE = 500
+DEFAULT_ROWS = [10_000, 100_000, 1_000_000]
+DEFAULT_CARDS = [6, 100, 1000]
+
+
+# --- synthetic data -----------------------------------------------
+def synthetic_transactions(n_rows, seed=0, start="2023-01-01", months=24) -> pd.DataFrame:
+    """Random statement rows (date, vendor, category, price) like sample_transactions.csv."""
+    rng = np.random.default_rng(seed)
+    weights = np.array([CATEGORY_PROFILE[c][0] for c in INPUT_CATEGORIES])
+    codes = rng.choice(len(INPUT_CATEGORIES), size=n_rows, p=weights / weights.sum())
+
+    # Lognormal amounts with the profile's mean / std per category
+    mean = np.array([CATEGORY_PROFILE[c][1] for c in INPUT_CATEGORIES])[codes]
+    std = np.array([CATEGORY_PROFILE[c][2] for c in INPUT_CATEGORIES])[codes]
+    sigma2 = np.log1p((std / mean) ** 2)
+    prices = np.round(rng.lognormal(np.log(mean) - sigma2 / 2, np.sqrt(sigma2)), 2)
+    prices = np.maximum(prices, 0.01)
+
+    # A few popular vendors per category, long tail for the rest
+    vendor_rank = np.minimum(rng.zipf(1.6, size=n_rows), VENDORS_PER_CATEGORY) - 1
+    vendor_codes = codes * VENDORS_PER_CATEGORY + vendor_rank
+    vendor_names = [f"{c.replace('_', ' ').title()} Vendor {k + 1}"
+                    for c in INPUT_CATEGORIES for k in range(VENDORS_PER_CATEGORY)]
+
+    start = np.datetime64(start, "D")
+    days = (np.datetime64(pd.Timestamp(start) + pd.DateOffset(months=months), "D") - start).astype(int)
+    dates = start + rng.integers(0, days, size=n_rows).astype("timedelta64[D]")
+
+    return pd.DataFrame({
+        "date": pd.to_datetime(dates),
+        "vendor": pd.Categorical.from_codes(vendor_codes, categories=vendor_names),
+        "category": pd.Categorical.from_codes(codes, categories=INPUT_CATEGORIES),
+        "price": prices,
+    })
+
+
+def synthetic_catalog(n_cards, seed=0) -> dict:
+    """Random cc_options-style dict with ``n_cards`` cards."""
+    rng = np.random.default_rng(seed)
+    raw_categories = sorted({c for mapped in CATEGORY_MAPPING.values() for c in mapped})
+    cards = []
+    for i in range(n_cards):
+        fee = int(rng.choice(ANNUAL_FEES))
+        n_bonus = int(rng.integers(0, 5))
+        bonus = rng.choice(raw_categories, size=n_bonus, replace=False)
+        # Pricier cards tend to carry bigger multipliers
+        top = 3.0 + 4.0 * fee / max(ANNUAL_FEES)
+        cards.append({
+            "card_name": f"Synthetic Card {i + 1}",
+            "annual_cost": f"${fee:,}",
+            "signup_bonus": f"${int(rng.choice([0, 200, 500, 750, 1000]))}",
+            "base_rate_x": float(rng.choice([1.0, 1.0, 1.5, 2.0])),
+            "category_multipliers_x": {
+                str(c): float(np.round(rng.uniform(2.0, top) * 2) / 2) for c in bonus
+            },
+        })
+    return {"credit_cards": cards}
+
+
+# --- stages -------------------------------------------------------
+def _best_of(repeat, fn):
+    """(best wall time, last return value) over ``repeat`` runs."""
+    best, result = np.inf, None
+    for _ in range(max(1, repeat)):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def _aggregate(frame) -> pd.DataFrame:
+    month = frame["date"].dt.to_period("M")
+    return frame.groupby([month, "category"], observed=True)["price"].agg(["sum", "count"])
+
+
+def _chart_prep(frame) -> dict:
+    by_cat = (
+        frame.groupby("category", as_index=False, observed=True)["price"]
+        .sum()
+        .rename(columns={"price": "total_spend"})
+        .sort_values("total_spend", ascending=False)
+        .head(20)
+    )
+    chart = alt.Chart(by_cat).mark_bar().encode(
+        x=alt.X("total_spend:Q", title="Total spend"),
+        y=alt.Y("category:N", sort=by_cat["category"].tolist(), title="Category"),
+    )
+    return chart.to_dict()
+
+
+def _record(results, stage, rows, cards, seconds, **extra):
+    results.append({
+        "stage": stage,
+        "rows": rows,
+        "cards": cards,
+        "seconds": round(seconds, 6),
+        "rows_per_s": round(rows / seconds, 1) if rows and seconds > 0 else None,
+        **extra,
+    })
+
+
+def benchmark_rows(n_rows, cards_grid, repeat=3, seed=0, workdir=None) -> list:
+    """Time every stage for one statement size against each catalog size."""
+    results = []
+    with tempfile.TemporaryDirectory(dir=workdir) as tmp:
+        csv_path = os.path.join(tmp, f"synthetic_{n_rows}.csv")
+        synthetic_transactions(n_rows, seed=seed).to_csv(csv_path, index=False, date_format="%Y-%m-%d")
+        size = os.path.getsize(csv_path)
+
+        seconds, (frame, report) = _best_of(repeat, lambda: ingest_statement(csv_path))
+        _record(results, "load", n_rows, None, seconds, bytes=size, rows_kept=report["rows_kept"])
+
+        if HAS_PARQUET:
+            cache_dir = os.path.join(tmp, "cache")
+            ingest_statement(csv_path, cache_dir=cache_dir)
+            seconds, _ = _best_of(repeat, lambda: ingest_statement(csv_path, cache_dir=cache_dir))
+            _record(results, "load_cached", n_rows, None, seconds)
+
+        def normalize():
+            store = TransactionStore.from_frame(pd.DataFrame({
+                "Date": frame["date"], "Vendor": frame["vendor"],
+                "Category": frame["category"], "Amount": frame["price"],
+            }))
+            return store, store.to_frame(categorical=False)
+        seconds, (store, _) = _best_of(repeat, normalize)
+        _record(results, "normalize", n_rows, None, seconds, store_bytes=store.memory_usage())
+
+        seconds, _ = _best_of(repeat, lambda: _aggregate(frame))
+        _record(results, "aggregate", n_rows, None, seconds)
+        seconds, spec = _best_of(repeat, lambda: _chart_prep(frame))
+        _record(results, "chart_prep", n_rows, None, seconds, payload_bytes=len(json.dumps(spec, default=str)))
+
+        amounts = frame["price"].to_numpy()
+        sample = frame.head(CARD_OPTIONS_SAMPLE)
+        for n_cards in cards_grid:
+            cc_data = synthetic_catalog(n_cards, seed=seed)
+            seconds, catalog = _best_of(repeat, lambda: CardCatalog.from_cc_data(cc_data))
+            _record(results, "catalog", None, n_cards, seconds)
+
+            seconds, _ = _best_of(repeat, lambda: summarize_scores(
+                amounts, score_transactions(frame["category"], amounts, catalog)))
+            _record(results, "optimize", n_rows, n_cards, seconds)
+
+            seconds, _ = _best_of(repeat, lambda: [
+                catalog.card_options(c, a) for c, a in zip(sample["category"], sample["price"])])
+            _record(results, "card_options", len(sample), n_cards, seconds)
+
+            spend = annual_category_spend(frame["category"], amounts, frame["date"])
+            seconds, _ = _best_of(repeat, lambda: optimize_portfolio(catalog, spend, top_k=3))
+            _record(results, "portfolio", n_rows, n_cards, seconds)
+    return results
+
+
+def run_benchmarks(rows_grid=DEFAULT_ROWS, cards_grid=DEFAULT_CARDS, repeat=3, seed=0, workdir=None) -> dict:
+    """Full benchmark run as a JSON-ready dict."""
+    results = []
+    for n_rows in rows_grid:
+        results.extend(benchmark_rows(n_rows, cards_grid, repeat=repeat, seed=seed, workdir=workdir))
+    return {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "parquet_cache": HAS_PARQUET,
+        },
+        "config": {"rows": list(rows_grid), "cards": list(cards_grid), "repeat": repeat, "seed": seed},
+        "results": results,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the credit card rewards optimizer on synthetic data.")
+    parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_ROWS, help="statement sizes to generate")
+    parser.add_argument("--cards", type=int, nargs="+", default=DEFAULT_CARDS, help="catalog sizes to generate")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per stage; the fastest is reported")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", help="where temporary CSV / Parquet files go")
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    report = run_benchmarks(args.rows, args.cards, repeat=args.repeat, seed=args.seed, workdir=args.workdir)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        for r in report["results"]:
+            print(f"{r['stage']:<13} rows={r['rows'] or '-':>10} cards={r['cards'] or '-':>5} {r['seconds']:.4f}s")
+    else:
+        print(json.dumps(report, indent=2))
@@ -5,9 +5,27 @@ import requests
 import altair as alt
 import json
 import os
+import sys
+
+from chart_data import ChartPayloads, cap_points
+from filter_index import TransactionIndex
+from incremental_optimizer import ROW_ID_COLUMN, IncrementalOptimizer, diff_rows
+from portfolio_optimizer import annual_category_spend, optimize_portfolio
+from remote_source import RemoteSource
+from result_cache import ResultCache
+from rewards_engine import CardCatalog, catalog_version
+from signup_planner import plan_signups
+from statement_ingest import ingest_statement
+from transaction_store import EDITABLE_COLUMNS, TransactionStore
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))  # shared perf_panel.py
+from perf_panel import render_panel, stage, start_rerun, timed
 
 st.set_page_config(page_title="Credit Card Rewards Optimizer", page_icon="🧾", layout="wide")
 
+# Stage timings for this rerun (sidebar panel with ?perf=1)
+perf = start_rerun("cc_app")
+
 # Reset button at the top
 col1, col2, col3 = st.columns([3, 1, 1])
 with col1:
@@ -15,8 +33,7 @@ with col1:
 # with col2:
 #     if st.button("🚀 Optimize", type="primary", help="Recalculate optimization for all transactions"):
 #         # Force recalculation by clearing editable transactions
-#         if 'editable_transactions' in st.session_state:
-#             st.session_state.editable_transactions = []
+#         st.session_state.pop('transaction_store', None)
 #         st.rerun()
 with col3:
     if st.button("🔄 Reset All", type="secondary", help="Clear all data and reset the app"):
@@ -26,113 +43,175 @@ with col3:
         st.rerun()
 
 # Upload data will be moved inside transactions table
+# Parsed uploads are cached here as Parquet, keyed by file hash
+INGEST_CACHE_DIR = ".ingest_cache"
+# Scored statements are kept here, keyed by catalog and transaction hashes
+RESULT_CACHE_PATH = os.path.join(".result_cache", "results.sqlite")
+
+# Remote copies live here; served immediately, revalidated in the background
+REMOTE_CACHE_DIR = ".remote_cache"
+CC_OPTIONS_URL = os.environ.get(
+    "CC_OPTIONS_URL",
+    "https://raw.githubusercontent.com/mhuh22/Python-workspace/master/Personal_Projects/Finance/cc_options.json",
+)
+SAMPLE_TRANSACTIONS_URL = os.environ.get(
+    "SAMPLE_TRANSACTIONS_URL",
+    "https://raw.githubusercontent.com/mhuh22/Python-workspace/master/Personal_Projects/Finance/sample_transactions.csv",
+)
+
+@st.cache_resource(show_spinner=False)
+def remote_source(url):
+    """Disk-cached copy of a remote file, shared by every session."""
+    return RemoteSource(url, cache_dir=REMOTE_CACHE_DIR, headers={"User-Agent": "streamlit-app/1.0"})
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def parse_remote_json(version, _body):
+    return json.loads(_body)
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def parse_remote_csv(version, _body):
+    return pd.read_csv(io.BytesIO(_body))
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def load_local_catalog(path, mtime_ns):
+    """Card data from a local JSON file and its catalog version, re-read only when the file changes."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return data, catalog_version(data.get("credit_cards", []))
 
-@st.cache_data
+@timed("load")
 def load_credit_cards():
-    """Load credit card data: try local file first, then GitHub fallback."""
+    """Load credit card data and its catalog version: try local file first, then the cached GitHub copy."""
     local_path = "cc_options.json"
     
-    # 1. Try local file
+    # 1. Try local file (parsed and hashed once per modification)
     if os.path.exists(local_path):
         try:
-            with open(local_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            return data
+            return load_local_catalog(local_path, os.stat(local_path).st_mtime_ns)
         except Exception as e:
             st.warning(f"Local file found but could not be read: {e}")
 
-    # 2. Fallback to GitHub URL
+    # 2. Fallback to GitHub (last known copy; only the very first run waits on the network)
     try:
-        url = "https://raw.githubusercontent.com/mhuh22/Python-workspace/master/Personal_Projects/Finance/cc_options.json"
-        response = requests.get(url)
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
+        source = remote_source(CC_OPTIONS_URL)
+        body = source.read()
+        return parse_remote_json(source.version, body), f"remote-{source.version}"
+    except (requests.exceptions.RequestException, ValueError) as e:
         st.error(f"Error fetching credit card data from GitHub: {e}")
-        return None
+        return None, None
 
 
 @st.cache_data(show_spinner=False)
+def load_local_csv(path):
+    return pd.read_csv(path)
+
+@timed("load")
 def load_default():
     # Try to load from local file first
     local_file = "sample_transactions.csv"
     if os.path.exists(local_file):
-        return pd.read_csv(local_file)
+        return load_local_csv(local_file)
     
-    # Fall back to URL if local file doesn't exist
-    url = "https://raw.githubusercontent.com/mhuh22/Python-workspace/master/Personal_Projects/Finance/sample_transactions.csv"
-    r = requests.get(url, headers={"User-Agent": "streamlit-app/1.0"}, timeout=10)
-    r.raise_for_status()
-    return pd.read_csv(io.StringIO(r.text))
+    # Fall back to the cached URL copy if local file doesn't exist
+    source = remote_source(SAMPLE_TRANSACTIONS_URL)
+    body = source.read()
+    return parse_remote_csv(source.version, body)
+
+@st.cache_resource(show_spinner=False, max_entries=64)
+def compile_card_catalog(version, _cc_data):
+    """Compile a card list once per catalog version (shared across reruns and sessions)."""
+    return CardCatalog.from_cc_data(_cc_data)
+
+def get_card_catalog(cc_data, version=None):
+    """Compiled catalog for a raw cc_options dict (``version`` from load_credit_cards, else hashed here)."""
+    return compile_card_catalog(version or catalog_version(cc_data.get("credit_cards", [])), cc_data)
+
+def get_session_catalog(cc_data, version=None):
+    """The shared compiled catalog until this session edits its cards, then its own (rebuilt per edit)."""
+    if 'editable_cards' not in st.session_state:
+        return get_card_catalog(cc_data, version)
+    if 'card_catalog' not in st.session_state:
+        st.session_state.card_catalog = CardCatalog.from_cc_data({"credit_cards": st.session_state.editable_cards})
+    return st.session_state.card_catalog
+
+@st.cache_resource(show_spinner=False)
+def load_base_transactions():
+    """Normalized sample statement, shared read-only by every session."""
+    frame = load_default()
+    with stage("normalize"):
+        frame.columns = [c.lower() for c in frame.columns]
+        frame["date"] = pd.to_datetime(frame["date"], errors="coerce")
+        frame = frame.dropna(subset=["date"]).sort_values("date", ascending=False)
+    return frame
+
+@st.cache_resource(show_spinner=False)
+def base_transaction_store():
+    """Columnar store over the sample statement; sessions fork() it (copy-on-write)."""
+    frame = load_base_transactions()
+    return TransactionStore.from_frame(pd.DataFrame({
+        'Date': frame['date'],
+        'Vendor': frame['vendor'],
+        'Category': frame['category'],
+        'Amount': frame['price'].astype(float)
+    }))
+
+@st.cache_resource(show_spinner=False, max_entries=16)
+def base_optimizer(version, _catalog):
+    """The sample statement scored against a shared catalog; sessions fork() it."""
+    return IncrementalOptimizer(_catalog, base_transaction_store().to_frame(categorical=False), cache=get_result_cache())
+
+@st.cache_resource(show_spinner=False)
+def get_result_cache():
+    """On-disk result cache shared by every session (and by later restarts)."""
+    return ResultCache(RESULT_CACHE_PATH)
+
+@st.cache_resource(show_spinner=False)
+def get_chart_payloads():
+    """Serialized chart specs shared by every session."""
+    return ChartPayloads()
+
+def spend_by_category_chart(by_cat):
+    """Horizontal bars of total spend per category, biggest first, with $ labels."""
+    sort_order = by_cat["category"].tolist()
+    bars = (
+        alt.Chart(by_cat)
+        .mark_bar()
+        .encode(
+            y=alt.Y("category:N", sort=sort_order, title="Category"),
+            x=alt.X("total_spend:Q", title="Total Spend ($)", axis=alt.Axis(format="$,.0f")),
+            tooltip=[
+                alt.Tooltip("category:N", title="Category"),
+                alt.Tooltip("total_spend:Q", title="Total Spend", format="$,.2f"),
+            ],
+        )
+    )
+
+    labels = (
+        alt.Chart(by_cat)
+        .mark_text(align="left", baseline="middle", dx=4)
+        .encode(
+            y=alt.Y("category:N", sort=sort_order),
+            x=alt.X("total_spend:Q"),
+            text=alt.Text("total_spend:Q", format="$,.2f"),
+        )
+    )
+
+    chart_height = min(max(300, 35 * len(by_cat)), 800)
+    return (bars + labels).properties(height=chart_height)
+
+@timed("optimize")
+@st.cache_data(show_spinner=False, max_entries=32)
+def plan_card_signups(version, _catalog, annual_spend, owned, horizon, gap_months, max_new_cards):
+    """Sign-up plan, cached per catalog version, spend and settings."""
+    return plan_signups(_catalog, annual_spend, owned=owned, horizon=horizon,
+                        gap_months=gap_months, max_new_cards=max_new_cards)
 
 def get_all_card_options(transaction_category, amount, cc_data, total_monthly_spend=0):
     """Get all credit card options for a given transaction, factoring in annual fees"""
     if not cc_data:
         return []
-    
-    # Category mapping from transaction categories to credit card categories
-    category_mapping = {
-        "groceries": ["U.S._supermarkets", "grocery_stores", "grocery_stores_and_wholesale_clubs"],
-        "dining": ["restaurants_worldwide", "dining"],
-        "gas": ["gas_stations"],  # Add if available in cards
-        "online_shopping": ["online_shopping"],  # Add if available
-        "utilities": ["utilities"],  # Add if available
-        "airfare": ["flights_booked_direct"],
-        "hotels": ["hotels"],  # Add if available
-        "subscriptions": ["streaming_services"],
-        "entertainment": ["entertainment"],
-        "drugstores": ["drugstores"],
-        "travel_portal": ["travel_portal"],
-        "home_improvement": ["home_improvement"],  # Add if available
-        "rideshare": ["rideshare"]  # Add if available
-    }
-    
-    card_options = []
-    
-    for card in cc_data["credit_cards"]:
-        # Check base rate first
-        base_rate = card["base_rate_x"]
-        
-        # Check category multipliers
-        multipliers = card.get("category_multipliers_x", {})
-        max_multiplier = base_rate
-        matched_category = "Base Rate"
-        
-        # Map transaction category to credit card categories
-        mapped_categories = category_mapping.get(transaction_category.lower(), [])
-        for cc_category in mapped_categories:
-            if cc_category in multipliers:
-                if multipliers[cc_category] > max_multiplier:
-                    max_multiplier = multipliers[cc_category]
-                    matched_category = cc_category.replace("_", " ").title()
-        
-        # Calculate rewards for this transaction
-        transaction_rewards = amount * max_multiplier / 100
-        
-        # Parse annual cost (remove $ and convert to float)
-        annual_cost_str = card["annual_cost"].replace("$", "").replace(",", "")
-        annual_cost = float(annual_cost_str) if annual_cost_str else 0
-        
-        # Calculate monthly annual cost
-        monthly_annual_cost = annual_cost / 12
-        
-        # Calculate net rewards (rewards minus monthly portion of annual fee)
-        net_rewards = transaction_rewards - monthly_annual_cost
-        
-        card_options.append({
-            "card_name": card["card_name"],
-            "annual_cost": card["annual_cost"],
-            "annual_cost_numeric": annual_cost,
-            "reward_rate": max_multiplier,
-            "matched_category": matched_category,
-            "rewards": transaction_rewards,
-            "monthly_annual_cost": monthly_annual_cost,
-            "net_rewards": net_rewards
-        })
-    
-    # Sort by net rewards (highest first)
-    card_options.sort(key=lambda x: x["net_rewards"], reverse=True)
-    return card_options
+    catalog = cc_data if isinstance(cc_data, CardCatalog) else get_card_catalog(cc_data)
+    return catalog.card_options(transaction_category, amount)
 
 def find_best_card(transaction_category, amount, cc_data):
     """Find the best credit card for a given transaction"""
@@ -144,110 +223,91 @@ def find_best_card(transaction_category, amount, cc_data):
     return best["card_name"], best["reward_rate"], best["rewards"]
 
 # --- Load transaction data ---
-# Initialize df in session state if not exists
-if 'transaction_df' not in st.session_state:
-    st.session_state.transaction_df = load_default()
-    # Normalize and parse
-    st.session_state.transaction_df.columns = [c.lower() for c in st.session_state.transaction_df.columns]
-    st.session_state.transaction_df["date"] = pd.to_datetime(st.session_state.transaction_df["date"], errors="coerce")
-    st.session_state.transaction_df = st.session_state.transaction_df.dropna(subset=["date"])
-    st.session_state.transaction_df = st.session_state.transaction_df.sort_values("date", ascending=False)
-
-df = st.session_state.transaction_df
+# Sessions share the sample statement until they upload their own
+uploaded_df = st.session_state.get('transaction_df')
 
 # Load credit card data
-cc_data = load_credit_cards()
+cc_data, cc_version = load_credit_cards()
+
+# Cards: the shared list until this session edits them in the card editor
+editable_cards = st.session_state.get('editable_cards', cc_data.get("credit_cards", []) if cc_data else [])
+
+# Use editable cards for optimization (no cards: rows are still tracked for the charts)
+card_catalog = get_session_catalog(cc_data, cc_version) if cc_data else CardCatalog.from_cc_data({})
+
+# Editable transactions live in a typed columnar store keyed by stable row ids,
+# built from the historical data (and rebuilt if every row gets deleted).
+# The sample's store is shared: this session's copy only gets its own
+# arrays once a row is edited.
+with stage("normalize"):
+    if 'transaction_store' not in st.session_state or len(st.session_state.transaction_store) == 0:
+        if uploaded_df is None:
+            st.session_state.transaction_store = base_transaction_store().fork()
+        else:
+            st.session_state.transaction_store = TransactionStore.from_frame(pd.DataFrame({
+                'Date': uploaded_df['date'],
+                'Vendor': uploaded_df['vendor'],
+                'Category': uploaded_df['category'],
+                'Amount': uploaded_df['price'].astype(float)
+            }))
+        st.session_state.pop('transaction_optimizer', None)
+    store = st.session_state.transaction_store
+
+    # Newest first; vendor/category as plain strings for the editor
+    transactions_df = store.to_frame(categorical=False)
+
+# Score every row only when the transactions or the cards are replaced;
+# table edits are applied to the optimizer incrementally further down.
+# The optimizer also keeps the month x category rollup behind the charts.
+optimizer = st.session_state.get('transaction_optimizer')
+if optimizer is None or optimizer.catalog is not card_catalog:
+    with stage("optimize"):
+        if 'editable_cards' not in st.session_state and store.shares_data_with(base_transaction_store()):
+            # Untouched sample with the shared cards: start from the shared scores
+            optimizer = base_optimizer(card_catalog.version, card_catalog).fork()
+        else:
+            optimizer = IncrementalOptimizer(card_catalog, transactions_df, cache=get_result_cache())
+    st.session_state.transaction_optimizer = optimizer
+rollup = optimizer.rollup
 
 # --- Filters + bar chart ---
-# Calculate optimization metrics from original dataframe
+# Header metrics come from the running totals, not a rescan of every row
 if cc_data:
-    total_spend_from_df = 0
-    total_gross_rewards_from_df = 0
-    total_annual_costs_from_df = 0
-    unique_cards_used_from_df = set()
-    
-    for _, row in df.iterrows():
-        category = row['category']
-        amount = float(row['price'])
-        total_spend_from_df += amount
-        
-        options = get_all_card_options(category, amount, cc_data)
-        if options:
-            best_option = options[0]  # Already sorted by net rewards
-            total_gross_rewards_from_df += best_option['rewards']
-            if best_option['card_name'] not in unique_cards_used_from_df:
-                total_annual_costs_from_df += best_option['annual_cost_numeric']
-                unique_cards_used_from_df.add(best_option['card_name'])
-    
-    net_rewards_from_df = total_gross_rewards_from_df - total_annual_costs_from_df
+    totals = optimizer.totals()
     
     # Display all metrics in a row
     col1, col2, col3, col4 = st.columns(4)
     with col1:
-        st.metric("Total Spend", f"${total_spend_from_df:.2f}")
+        st.metric("Total Spend", f"${totals['total_spend']:.2f}")
     with col2:
-        st.metric("Total Gross Rewards", f"${total_gross_rewards_from_df:.2f}")
+        st.metric("Total Gross Rewards", f"${totals['total_gross_rewards']:.2f}")
     with col3:
-        st.metric("Total Annual Costs", f"${total_annual_costs_from_df:.2f}")
+        st.metric("Total Annual Costs", f"${totals['total_annual_costs']:.2f}")
     with col4:
-        st.metric("Net Rewards (After Fees)", f"${net_rewards_from_df:.2f}")
+        st.metric("Net Rewards (After Fees)", f"${totals['net_rewards']:.2f}")
 else:
     # If no credit card data, just show total spend
-    total_spend_from_df = df["price"].sum()
-    st.metric("Total Spend", f"${total_spend_from_df:.2f}")
+    st.metric("Total Spend", f"${rollup.totals()['total_spend']:.2f}")
 
 st.subheader("Total spend by category")
 
-month_series = df["date"].dt.to_period("M").astype(str).unique().tolist()
-month_series.sort()
-month_options = ["All"] + month_series
+month_options = ["All"] + rollup.months()
 selected_month = st.selectbox("Select month", month_options, index=0)
 
-if selected_month != "All":
-    target = pd.Period(selected_month)
-    filtered = df[df["date"].dt.to_period("M") == target]
-else:
-    filtered = df.copy()
-
-by_cat = (
-    filtered
-    .groupby("category", as_index=False)["price"]
-    .sum()
-    .rename(columns={"price": "total_spend"})
-    .sort_values("total_spend", ascending=False)
-    .head(20)
-)
-
-if by_cat.empty:
-    st.info("No data for the selected month.")
-else:
-    sort_order = by_cat["category"].tolist()
-    bars = (
-        alt.Chart(by_cat)
-        .mark_bar()
-        .encode(
-            y=alt.Y("category:N", sort=sort_order, title="Category"),
-            x=alt.X("total_spend:Q", title="Total Spend ($)", axis=alt.Axis(format="$,.0f")),
-            tooltip=[
-                alt.Tooltip("category:N", title="Category"),
-                alt.Tooltip("total_spend:Q", title="Total Spend", format="$,.2f"),
-            ],
-        )
-    )
-
-    labels = (
-        alt.Chart(by_cat)
-        .mark_text(align="left", baseline="middle", dx=4)
-        .encode(
-            y=alt.Y("category:N", sort=sort_order),
-            x=alt.X("total_spend:Q"),
-            text=alt.Text("total_spend:Q", format="$,.2f"),
-        )
+with stage("chart"):
+    # Read from the rollup: O(categories) per month switch; the smallest
+    # categories beyond the cap are folded into one "Other" bar
+    by_cat = cap_points(
+        rollup.by_category(None if selected_month == "All" else selected_month)[["category", "total_spend"]],
+        "category", "total_spend",
     )
 
-    chart_height = min(max(300, 35 * len(by_cat)), 800)
-    chart = (bars + labels).properties(height=chart_height)
-    st.altair_chart(chart, use_container_width=True)
+    if by_cat.empty:
+        st.info("No data for the selected month.")
+    else:
+        # Serialized once per distinct set of bars, reused on other reruns
+        spec = get_chart_payloads().spec("spend_by_category", by_cat, spend_by_category_chart)
+        st.vega_lite_chart(spec, use_container_width=True)
 
 """
 All Available Cards section shows the full list of cards loaded from cc_options.json.
@@ -257,102 +317,66 @@ It is collapsed by default to keep the main view clean.
 if cc_data:
     st.subheader("💳 Credit Card Optimization")
     
-    # Initialize editable cards in session state
-    if 'editable_cards' not in st.session_state:
-        st.session_state.editable_cards = cc_data.get("credit_cards", []).copy()
-    
-    # Use editable cards for optimization
-    cc_data_for_optimization = {"credit_cards": st.session_state.editable_cards}
-    
-    # Initialize editable transactions in session state
-    if 'editable_transactions' not in st.session_state:
-        st.session_state.editable_transactions = []
-    
-    # Build initial transaction list from historical data (sorted by date desc)
-    if not st.session_state.editable_transactions:
-        temp_transactions = []
-        for _, row in df.iterrows():
-            temp_transactions.append({
-                'Date': row['date'].strftime('%Y-%m-%d'),
-                'Vendor': row['vendor'],
-                'Category': row['category'],
-                'Amount': float(row['price'])
-            })
-        # Sort by date descending (newest first)
-        temp_transactions.sort(key=lambda x: x['Date'], reverse=True)
-        st.session_state.editable_transactions = temp_transactions
-    
-    # Create initial combined dataframe for display (will be recalculated after edits)
-    # Calculate optimal cards for each transaction from editable table
-    optimization_data = []
-    total_gross_rewards = 0
-    total_annual_costs = 0
-    total_spend = 0
-    unique_cards_used = set()
-    
-    # Process editable transactions to get optimization results
-    for trans in st.session_state.editable_transactions:
-        category = trans['Category']
-        amount = float(trans['Amount'])
-        
-        options = get_all_card_options(category, amount, cc_data_for_optimization)
-        if options:
-            best_option = options[0]  # Already sorted by net rewards
-            optimization_data.append({
-                'Date': trans['Date'],
-                'Vendor': trans['Vendor'],
-                'Category': category,
-                'Amount': amount,
-                'Best Card': best_option['card_name'],
-                'Reward Rate': f"{best_option['reward_rate']:.1f}%",
-                'Rewards': f"${best_option['rewards']:.2f}"
-            })
-            
-            total_gross_rewards += best_option['rewards']
-            total_spend += amount
-            if best_option['card_name'] not in unique_cards_used:
-                total_annual_costs += best_option['annual_cost_numeric']
-                unique_cards_used.add(best_option['card_name'])
+    has_optimization = len(card_catalog) > 0 and not transactions_df.empty
     
-    
-    # Create combined dataframe with transaction data and optimization results
-    if optimization_data:
-        combined_df = pd.DataFrame(optimization_data)
-        
-        # Sort by date descending (newest first)
-        combined_df['Date'] = pd.to_datetime(combined_df['Date'], errors='coerce')
-        combined_df = combined_df.sort_values('Date', ascending=False, na_position='last')
-        combined_df['Date'] = combined_df['Date'].dt.strftime('%Y-%m-%d')
-    else:
-        # Create empty dataframe with all columns
-        combined_df = pd.DataFrame(columns=['Date', 'Vendor', 'Category', 'Amount', 'Best Card', 'Reward Rate', 'Rewards'])
+    with stage("render"):
+        # Create combined dataframe with transaction data and optimization results
+        if has_optimization:
+            scores = optimizer.scores.loc[transactions_df.index]
+            combined_df = transactions_df.copy()
+            combined_df['Best Card'] = scores['card_name'].to_numpy()
+            combined_df['Reward Rate'] = [f"{rate:.1f}%" for rate in scores['reward_rate']]
+            combined_df['Rewards'] = [f"${rewards:.2f}" for rewards in scores['rewards']]
+        else:
+            # Create empty dataframe with all columns
+            combined_df = pd.DataFrame(columns=['Date', 'Vendor', 'Category', 'Amount', 'Best Card', 'Reward Rate', 'Rewards'])
     
     # File uploader for CSV
     uploaded = st.file_uploader("Upload CSV", type=["csv"], key="optimization_file_uploader")
     
     # Handle file upload
-    if uploaded is not None:
+    if uploaded is not None and st.session_state.get('ingested_upload') != uploaded.file_id:
         try:
-            new_df = pd.read_csv(uploaded)
-            # Validation
-            required = {"date", "vendor", "category", "price"}
-            missing = required - set(map(str.lower, new_df.columns))
-            if missing:
-                st.error(f"Missing required columns: {sorted(list(missing))}. Expected: {sorted(list(required))}")
-            else:
-                # Normalize and parse
-                new_df.columns = [c.lower() for c in new_df.columns]
-                new_df["date"] = pd.to_datetime(new_df["date"], errors="coerce")
-                new_df = new_df.dropna(subset=["date"])
-                new_df = new_df.sort_values("date", ascending=False)
-                
-                # Update session state
-                st.session_state.transaction_df = new_df
-                # Reset editable transactions to trigger reload
-                st.session_state.editable_transactions = []
-                st.rerun()
+            # Chunked, typed parse; re-uploading the same file is served from the Parquet cache
+            with stage("load"):
+                new_df, report = ingest_statement(uploaded, cache_dir=INGEST_CACHE_DIR)
+            st.session_state.ingested_upload = uploaded.file_id
+            st.session_state.ingest_report = report
+            # Update session state
+            st.session_state.transaction_df = new_df
+            # Reset editable transactions to trigger reload
+            st.session_state.pop('transaction_store', None)
+            st.rerun()
+        except ValueError as e:
+            st.error(str(e))
         except Exception as e:
             st.error(f"Could not read file: {e}")
+
+    report = st.session_state.get('ingest_report')
+    if report:
+        skipped = {reason: n for reason, n in report["rejected"].items() if n}
+        source = "cache" if report["cached"] else "file"
+        st.caption(f"Loaded {report['rows_kept']:,} of {report['rows_read']:,} rows from {source} in {report['seconds']:.2f}s")
+        if skipped:
+            st.warning("Skipped rows: " + ", ".join(f"{reason.replace('_', ' ')} ({n})" for reason, n in skipped.items()))
+        if report.get("credits") or report.get("flexible_dates"):
+            st.caption(f"Kept {report.get('credits', 0):,} refunds / credits (zero or negative price); "
+                       f"{report.get('flexible_dates', 0):,} dates weren't YYYY-MM-DD and were parsed flexibly")
+    cache_stats = get_result_cache().stats()
+    st.caption(f"Result cache: {cache_stats['total_hits']:,} hits / {cache_stats['total_misses']:,} misses, "
+               f"{cache_stats['entries']:,} scored statements ({cache_stats['bytes'] / 1e6:.1f} MB)")
+    
+    # Filter index: rebuilt only when the transactions or their best cards change
+    index_key = (store, store.version, optimizer, optimizer.version)
+    if st.session_state.get('transaction_index_key') != index_key:
+        with stage("filter"):
+            index_columns = store.columns()
+            best_card_idx = optimizer.scores.loc[store.ids, 'card_idx'].to_numpy() if has_optimization else None
+            st.session_state.transaction_index = TransactionIndex(
+                index_columns['Date'], index_columns['Vendor'], index_columns['Category'], best_card_idx
+            )
+        st.session_state.transaction_index_key = index_key
+    transaction_index = st.session_state.transaction_index
     
     # Add filters section
     with st.expander("🔍 Filters", expanded=False):
@@ -373,7 +397,7 @@ if cc_data:
         with filter_col2:
             # Best Card filter
             if not combined_df.empty and 'Best Card' in combined_df.columns:
-                all_cards = sorted([card for card in combined_df['Best Card'].unique() if card and card.strip()])
+                all_cards = sorted({card_catalog.card_names[i] for i in transaction_index.cards})
                 selected_cards = st.multiselect(
                     "Filter by Best Card",
                     options=all_cards,
@@ -420,33 +444,17 @@ if cc_data:
             st.session_state.filter_date_to = None
             st.rerun()
     
-    # Apply filters to combined_df before adding empty row
-    filtered_df = combined_df.copy()
-    
-    if not filtered_df.empty:
-        # Filter by category
-        if selected_categories:
-            filtered_df = filtered_df[filtered_df['Category'].isin(selected_categories)]
-        
-        # Filter by best card
-        if selected_cards and 'Best Card' in filtered_df.columns:
-            filtered_df = filtered_df[filtered_df['Best Card'].isin(selected_cards)]
-        
-        # Filter by vendor search
-        if vendor_search and vendor_search.strip():
-            vendor_search_lower = vendor_search.lower().strip()
-            filtered_df = filtered_df[
-                filtered_df['Vendor'].astype(str).str.lower().str.contains(vendor_search_lower, na=False)
-            ]
-        
-        # Filter by date range
-        if (min_date is not None or max_date is not None) and 'Date' in filtered_df.columns:
-            filtered_df['Date'] = pd.to_datetime(filtered_df['Date'], errors='coerce')
-            if min_date is not None:
-                filtered_df = filtered_df[filtered_df['Date'] >= pd.Timestamp(min_date)]
-            if max_date is not None:
-                filtered_df = filtered_df[filtered_df['Date'] <= pd.Timestamp(max_date)]
-            filtered_df['Date'] = filtered_df['Date'].dt.strftime('%Y-%m-%d')
+    # Apply filters to combined_df before adding empty row (positions from the index)
+    with stage("filter"):
+        selected_card_idx = [i for i, name in enumerate(card_catalog.card_names) if name in selected_cards]
+        filtered_positions = transaction_index.query(
+            categories=selected_categories,
+            cards=selected_card_idx,
+            vendor=vendor_search,
+            start=min_date,
+            end=max_date,
+        ) if not combined_df.empty else None
+        filtered_df = combined_df if filtered_positions is None else combined_df.iloc[filtered_positions]
     
     # Show filter status
     total_rows = len(combined_df) if not combined_df.empty else 0
@@ -462,9 +470,11 @@ if cc_data:
     # Store filtered_df before adding empty row (for merge logic later)
     filtered_df_before_empty = filtered_df.copy()
     
-    # Add empty row at the TOP for new entries
+    # Add empty row at the TOP for new entries. The editor keeps a RangeIndex
+    # (rows added with "+" need no index); the row id rides along in a
+    # hidden column, empty for new rows
     empty_row = pd.DataFrame([{
-        'Date': pd.Timestamp.now().strftime('%Y-%m-%d'),
+        'Date': pd.Timestamp.now().normalize(),
         'Vendor': '',
         'Category': 'groceries',
         'Amount': 0.0,
@@ -472,126 +482,143 @@ if cc_data:
         'Reward Rate': '',
         'Rewards': ''
     }])
-    filtered_df = pd.concat([empty_row, filtered_df], ignore_index=True)
+    filtered_df = pd.concat([empty_row, filtered_df.assign(**{ROW_ID_COLUMN: filtered_df.index})],
+                            ignore_index=True)
+    filtered_df[ROW_ID_COLUMN] = filtered_df[ROW_ID_COLUMN].astype("Int64")
     
     # Display combined editable table
     st.write("**Edit the table below to add or remove transactions. The optimization will update automatically:**")
     
-    edited_df = st.data_editor(
-        filtered_df,
-        column_config={
-            "Date": st.column_config.TextColumn("Date (YYYY-MM-DD)", width="small"),
-            "Vendor": st.column_config.TextColumn("Vendor", width="medium"),
-            "Category": st.column_config.SelectboxColumn(
-                "Category",
-                options=["groceries", "dining", "gas", "online_shopping", "utilities", 
-                        "airfare", "hotels", "subscriptions", "entertainment", "drugstores", 
-                        "travel_portal", "home_improvement", "rideshare"],
-                width="medium"
-            ),
-            "Amount": st.column_config.NumberColumn("Amount ($)", min_value=0.0, step=0.01, format="$%.2f", width="small"),
-            "Best Card": st.column_config.TextColumn("Best Card", width="medium", disabled=True),
-            "Reward Rate": st.column_config.TextColumn("Reward Rate", width="small", disabled=True),
-            "Rewards": st.column_config.TextColumn("Rewards", width="small", disabled=True)
-        },
-        num_rows="dynamic",
-        use_container_width=True,
-        hide_index=True,
-        key="optimization_table_editor"
-    )
+    with stage("render"):
+        edited_df = st.data_editor(
+            filtered_df,
+            column_config={
+                "Date": st.column_config.DateColumn("Date", format="YYYY-MM-DD", width="small"),
+                "Vendor": st.column_config.TextColumn("Vendor", width="medium"),
+                "Category": st.column_config.SelectboxColumn(
+                    "Category",
+                    options=["groceries", "dining", "gas", "online_shopping", "utilities", 
+                            "airfare", "hotels", "subscriptions", "entertainment", "drugstores", 
+                            "travel_portal", "home_improvement", "rideshare"],
+                    width="medium"
+                ),
+                "Amount": st.column_config.NumberColumn("Amount ($)", step=0.01, format="$%.2f", width="small"),
+                "Best Card": st.column_config.TextColumn("Best Card", width="medium", disabled=True),
+                "Reward Rate": st.column_config.TextColumn("Reward Rate", width="small", disabled=True),
+                "Rewards": st.column_config.TextColumn("Rewards", width="small", disabled=True),
+                ROW_ID_COLUMN: st.column_config.NumberColumn(ROW_ID_COLUMN, disabled=True),
+            },
+            column_order=['Date', 'Vendor', 'Category', 'Amount', 'Best Card', 'Reward Rate', 'Rewards'],
+            num_rows="dynamic",
+            use_container_width=True,
+            hide_index=True,
+            key="optimization_table_editor"
+        )
     
-    # Filter out empty/invalid rows and update session state
-    if not edited_df.empty:
-        valid_rows = edited_df[
-            (edited_df['Vendor'].astype(str).str.strip() != '') & 
-            (edited_df['Amount'] > 0) & 
-            (edited_df['Date'].astype(str).str.strip() != '')
-        ].copy()
-        
-        # If filters were applied, merge edited rows with rows that were filtered out
-        if has_filters and not combined_df.empty and not valid_rows.empty:
-            # Use the filtered_df before empty row was added for comparison
-            original_filtered = filtered_df_before_empty[filtered_df_before_empty['Vendor'].astype(str).str.strip() != ''].copy() if not filtered_df_before_empty.empty else pd.DataFrame()
-            
-            # Create keys for matching rows
-            valid_rows['_key'] = valid_rows['Date'].astype(str) + '|' + valid_rows['Vendor'].astype(str) + '|' + valid_rows['Category'].astype(str) + '|' + valid_rows['Amount'].astype(str)
-            combined_df['_key'] = combined_df['Date'].astype(str) + '|' + combined_df['Vendor'].astype(str) + '|' + combined_df['Category'].astype(str) + '|' + combined_df['Amount'].astype(str)
-            
-            if not original_filtered.empty:
-                original_filtered['_key'] = original_filtered['Date'].astype(str) + '|' + original_filtered['Vendor'].astype(str) + '|' + original_filtered['Category'].astype(str) + '|' + original_filtered['Amount'].astype(str)
-                # Get rows from combined_df that weren't in the original filtered view
-                filtered_out = combined_df[~combined_df['_key'].isin(original_filtered['_key'])].copy()
-            else:
-                # If no rows matched the filter, all rows were filtered out
-                filtered_out = combined_df.copy()
-            
-            # Combine edited rows with filtered-out rows
-            if not filtered_out.empty:
-                # Keep only editable columns from filtered_out
-                filtered_out_editable = filtered_out[['Date', 'Vendor', 'Category', 'Amount']].copy()
-                valid_rows_editable = valid_rows[['Date', 'Vendor', 'Category', 'Amount']].copy()
-                valid_rows = pd.concat([valid_rows_editable, filtered_out_editable], ignore_index=True)
-            else:
-                valid_rows = valid_rows[['Date', 'Vendor', 'Category', 'Amount']].copy()
-        else:
-            # No filters applied, just use the edited rows
-            valid_rows = valid_rows[['Date', 'Vendor', 'Category', 'Amount']].copy()
-        
-        # Sort by date descending before saving to session state
-        if not valid_rows.empty:
-            valid_rows['Date'] = pd.to_datetime(valid_rows['Date'], errors='coerce')
-            valid_rows = valid_rows.sort_values('Date', ascending=False, na_position='last')
-            valid_rows['Date'] = valid_rows['Date'].dt.strftime('%Y-%m-%d')
-            
-            # Update session state with only editable columns
-            st.session_state.editable_transactions = valid_rows.to_dict('records')
-            
-            # Recalculate totals based on updated transactions
-            total_gross_rewards = 0
-            total_annual_costs = 0
-            total_spend = 0
-            unique_cards_used = set()
-            
-            for trans in st.session_state.editable_transactions:
-                category = trans['Category']
-                amount = float(trans['Amount'])
-                options = get_all_card_options(category, amount, cc_data_for_optimization)
-                if options:
-                    best_option = options[0]
-                    total_gross_rewards += best_option['rewards']
-                    total_spend += amount
-                    if best_option['card_name'] not in unique_cards_used:
-                        total_annual_costs += best_option['annual_cost_numeric']
-                        unique_cards_used.add(best_option['card_name'])
-        else:
-            st.session_state.editable_transactions = []
-            total_gross_rewards = 0
-            total_annual_costs = 0
-            total_spend = 0
-            unique_cards_used = set()
+    # Filter out empty/invalid rows (treated as deleted)
+    valid_rows = edited_df[
+        (edited_df['Vendor'].astype(str).str.strip() != '') & 
+        # Refunds / credits are negative; only a zeroed amount deletes a row
+        (edited_df['Amount'] != 0) & 
+        edited_df['Date'].notna()
+    ]
     
-    if not optimization_data:
+    # Diff against the rows that were shown, by the row id column; rows hidden by the
+    # filters are untouched and only added/changed/deleted rows are rescored
+    changed_rows, added_rows, deleted_ids = diff_rows(filtered_df_before_empty, valid_rows)
+    if len(changed_rows) or len(added_rows) or len(deleted_ids):
+        # Update the store in place; new rows get fresh ids from the store
+        store.delete(deleted_ids)
+        store.update(changed_rows.index, changed_rows[EDITABLE_COLUMNS])
+        added_rows = added_rows[EDITABLE_COLUMNS].set_axis(store.append(added_rows[EDITABLE_COLUMNS]))
+        with stage("optimize"):
+            optimizer.apply(upserts=pd.concat([changed_rows[EDITABLE_COLUMNS], added_rows]), deleted=deleted_ids)
+        # Rerun so the header metrics and charts above pick up the new totals
+        st.rerun()
+    
+    if not has_optimization:
         st.info("Add transactions to the table above to see optimization results.")
+    
+    # --- Best card portfolio (each annual fee charged once) ---
+    st.subheader("🏆 Best Card Portfolio")
+    st.caption("The set of cards with the highest annual net rewards for your spending, with each card's annual fee charged once.")
+    
+    card_names = list(pd.unique(card_catalog.card_names))
+    # Drop owned cards that were removed in the card editor
+    st.session_state.owned_cards = [c for c in st.session_state.get('owned_cards', []) if c in card_names]
+    owned_cards = st.multiselect("Cards I already own", options=card_names, key="owned_cards")
+    owned_idx = [i for i, name in enumerate(card_catalog.card_names) if name in owned_cards]
+    
+    store_columns = store.columns()
+    annual_spend = annual_category_spend(store_columns['Category'], store_columns['Amount'], store_columns['Date'])
+    with stage("optimize"):
+        portfolios = optimize_portfolio(card_catalog, annual_spend, top_k=3, owned=owned_idx)
+    
+    if portfolios:
+        st.dataframe(
+            pd.DataFrame([{
+                'Rank': rank,
+                'Cards': ", ".join(p['cards']),
+                'Annual Gross Rewards': f"${p['gross_rewards']:,.2f}",
+                'Annual Fees': f"${p['annual_fees']:,.2f}",
+                'Annual Net Rewards': f"${p['net_rewards']:,.2f}",
+            } for rank, p in enumerate(portfolios, start=1)]),
+            use_container_width=True,
+            hide_index=True
+        )
+        with st.expander("Which card to use for each category", expanded=False):
+            st.dataframe(
+                pd.DataFrame(list(portfolios[0]['category_cards'].items()), columns=['Category', 'Card']),
+                use_container_width=True,
+                hide_index=True
+            )
+    else:
+        st.info("No card earns back its annual fee on this spending.")
+    
+    # --- Sign-up plan (application order, bonuses, timing) ---
+    st.subheader("🗓️ Sign-Up Plan")
+    st.caption("Which cards to apply for, and when, to get the most out of sign-up bonuses, rewards and annual fees. "
+               "A bonus's minimum spend is met by putting all spending on the new card. "
+               "Capped bonus categories earn the bonus rate up to the cap, assuming the same spend every month.")
+    plan_col1, plan_col2, plan_col3 = st.columns(3)
+    with plan_col1:
+        plan_horizon = st.number_input("Months to plan", min_value=6, max_value=36, value=24, step=1)
+    with plan_col2:
+        plan_gap = st.number_input("Months between applications", min_value=1, max_value=12, value=3, step=1)
+    with plan_col3:
+        plan_max_cards = st.number_input("Max new cards", min_value=1, max_value=6, value=4, step=1)
+    
+    plan = plan_card_signups(card_catalog.version, card_catalog, annual_spend, tuple(owned_idx),
+                             int(plan_horizon), int(plan_gap), int(plan_max_cards))
+    if plan['steps']:
+        plan_metric1, plan_metric2, plan_metric3 = st.columns(3)
+        with plan_metric1:
+            st.metric(f"Net Value ({int(plan_horizon)} months)", f"${plan['net_value']:,.2f}")
+        with plan_metric2:
+            st.metric("With Current Cards", f"${plan['baseline_value']:,.2f}")
+        with plan_metric3:
+            st.metric("Gain", f"${plan['gain']:,.2f}")
+        st.dataframe(
+            pd.DataFrame([{
+                'Month': step['month'],
+                'Apply For': step['card'],
+                'Sign-Up Bonus': f"${step['bonus']:,.0f}",
+                'Minimum Spend': f"${step['min_spend']:,.0f}",
+                'Months on New Card': step['months_routed'],
+                'Annual Fee': f"${step['annual_fee']:,.0f}",
+            } for step in plan['steps']]),
+            use_container_width=True,
+            hide_index=True
+        )
+    else:
+        st.info("No new card adds value for this spending.")
    
     # --- All Available Cards (collapsible) ---
     with st.expander("All Available Cards", expanded=False):
         st.write("**Edit the table below to add, remove, or modify credit cards. Changes will affect optimization calculations.**")
         
-        # Prepare cards for editing
-        card_rows = []
-        for card in st.session_state.editable_cards:
-            # Convert multipliers dict to JSON string for editing
-            multipliers = card.get("category_multipliers_x", {})
-            multipliers_str = json.dumps(multipliers) if multipliers else "{}"
-            
-            card_rows.append({
-                "Card Name": card.get("card_name", ""),
-                "Annual Cost": card.get("annual_cost", "$0"),
-                "Base Rate": card.get("base_rate_x", 1.0),
-                "Category Multipliers (JSON)": multipliers_str,
-            })
-        
-        cards_df = pd.DataFrame(card_rows)
+        # Prepare cards for editing (multipliers as JSON strings)
+        cards_df = pd.DataFrame(card_catalog.editor_rows())
         
         # Display editable table
         edited_cards_df = st.data_editor(
@@ -614,6 +641,8 @@ if cc_data:
         
         # Update session state with edited cards
         if not edited_cards_df.empty:
+            # Fields the table doesn't show (caps, rotating windows, sign-up bonus) carry over by card name
+            previous_cards = {card.get("card_name"): card for card in editable_cards}
             valid_cards = []
             for _, row in edited_cards_df.iterrows():
                 card_name = str(row['Card Name']).strip()
@@ -630,6 +659,7 @@ if cc_data:
                         multipliers = {k: float(v) for k, v in multipliers.items()}
                         
                         valid_cards.append({
+                            **previous_cards.get(card_name, {}),
                             "card_name": card_name,
                             "annual_cost": str(row['Annual Cost']).strip(),
                             "base_rate_x": float(row['Base Rate']),
@@ -639,14 +669,17 @@ if cc_data:
                         st.warning(f"Error parsing card '{card_name}': {e}. Please check the JSON format.")
                         # Still add the card but with empty multipliers
                         valid_cards.append({
+                            **previous_cards.get(card_name, {}),
                             "card_name": card_name,
                             "annual_cost": str(row['Annual Cost']).strip(),
                             "base_rate_x": float(row['Base Rate']),
                             "category_multipliers_x": {}
                         })
             
-            st.session_state.editable_cards = valid_cards
-            # Cards updated - optimization will use updated cards on next rerun
+            if valid_cards != editable_cards:
+                st.session_state.editable_cards = valid_cards
+                # Cards updated - recompile the catalog; optimization uses it on next rerun
+                st.session_state.pop('card_catalog', None)
 else:
     st.warning("Credit card data not available for optimization")
 
@@ -655,13 +688,13 @@ with st.expander("📋 Future Enhancements", expanded=False):
     st.write("**Planned improvements for the credit card optimization tool:**")
     
     todo_items = [
-        " Add the ability for users to select the cards that they already have",
-        " Sign up for cards 1 by 1, or optimize for maximum savings",
         " Likelihood for getting approved",
-        "🎁 **Intro Offers** - Include sign-up bonuses and introductory rates",
+        "🎁 **Intro Offers** - Include introductory APRs and rates",
     ]
     
     for item in todo_items:
         st.write(f"• {item}")
     
     st.caption("💡 *These features will be added in future updates to enhance the optimization experience.*")
+
+render_panel(perf)
@@ -2,104 +2,171 @@
 import os
 import io
 import json
+import time
 import requests
+import numpy as np
 import pandas as pd
 import streamlit as st
 import altair as alt
 
+from chart_data import ChartPayloads, cap_points
+from remote_source import RemoteSource
+from result_cache import ResultCache
+from rewards_engine import CardCatalog, catalog_version, category_codes, summarize_scores
+from spend_sweep import best_card_sets, best_single_cards, grid_scenarios, monthly_vector, scale_scenarios
+from statement_ingest import ingest_statement
+
 
 st.set_page_config(page_title="Credit Card Rewards Optimizer (Dual Modes)", page_icon="🧾", layout="wide")
 
 # -----------------------------
 # Shared: data loading helpers
 # -----------------------------
-@st.cache_data
+# Parsed uploads are cached here as Parquet, keyed by file hash
+INGEST_CACHE_DIR = ".ingest_cache"
+# Scored statements are kept here, keyed by catalog and transaction hashes
+RESULT_CACHE_PATH = os.path.join(".result_cache", "results.sqlite")
+
+# Remote copies live here; served immediately, revalidated in the background
+REMOTE_CACHE_DIR = ".remote_cache"
+CC_OPTIONS_URL = os.environ.get(
+    "CC_OPTIONS_URL",
+    "https://raw.githubusercontent.com/mhuh22/Python-workspace/master/Personal_Projects/Finance/cc_options.json",
+)
+SAMPLE_TRANSACTIONS_URL = os.environ.get(
+    "SAMPLE_TRANSACTIONS_URL",
+    "https://raw.githubusercontent.com/mhuh22/Python-workspace/master/Personal_Projects/Finance/sample_transactions.csv",
+)
+
+@st.cache_resource(show_spinner=False)
+def remote_source(url):
+    """Disk-cached copy of a remote file, shared by every session."""
+    return RemoteSource(url, cache_dir=REMOTE_CACHE_DIR, headers={"User-Agent": "streamlit-app/1.0"})
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def parse_remote_json(version, _body):
+    return json.loads(_body)
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def parse_remote_csv(version, _body):
+    return pd.read_csv(io.BytesIO(_body))
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def load_local_catalog(path, mtime_ns):
+    """Card data from a local JSON file and its catalog version, re-read only when the file changes."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return data, catalog_version(data.get("credit_cards", []))
+
 def load_credit_cards():
-    """Load credit card data: try local file first, then GitHub fallback."""
+    """Load credit card data and its catalog version: try local file first, then the cached GitHub copy."""
     local_path = "cc_options.json"
     if os.path.exists(local_path):
         try:
-            with open(local_path, "r", encoding="utf-8") as f:
-                return json.load(f)
+            # Parsed and hashed once per modification
+            return load_local_catalog(local_path, os.stat(local_path).st_mtime_ns)
         except Exception as e:
             st.warning(f"Local file found but could not be read: {e}")
 
+    # Last known copy; only the very first run waits on the network
     try:
-        url = "https://raw.githubusercontent.com/mhuh22/Python-workspace/master/Personal_Projects/Finance/cc_options.json"
-        response = requests.get(url, headers={"User-Agent": "streamlit-app/1.0"}, timeout=10)
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
+        source = remote_source(CC_OPTIONS_URL)
+        body = source.read()
+        return parse_remote_json(source.version, body), f"remote-{source.version}"
+    except (requests.exceptions.RequestException, ValueError) as e:
         st.error(f"Error fetching credit card data from GitHub: {e}")
-        return None
+        return None, None
 
 @st.cache_data(show_spinner=False)
+def load_local_csv(path):
+    return pd.read_csv(path)
+
 def load_default_transactions():
-    url = "https://raw.githubusercontent.com/mhuh22/Python-workspace/master/Personal_Projects/Finance/sample_transactions.csv"
-    r = requests.get(url, headers={"User-Agent": "streamlit-app/1.0"}, timeout=10)
-    r.raise_for_status()
-    return pd.read_csv(io.StringIO(r.text))
+    local_file = "sample_transactions.csv"
+    if os.path.exists(local_file):
+        return load_local_csv(local_file)
+    source = remote_source(SAMPLE_TRANSACTIONS_URL)
+    body = source.read()
+    return parse_remote_csv(source.version, body)
 
 # -----------------------------
 # Shared: optimization helpers
 # -----------------------------
+@st.cache_resource(show_spinner=False, max_entries=64)
+def compile_card_catalog(version, _cc_data):
+    """Compile a card list once per catalog version (shared across reruns and sessions)."""
+    return CardCatalog.from_cc_data(_cc_data)
+
+def get_card_catalog(cc_data, version=None):
+    """Compiled catalog for a raw cc_options dict (``version`` from load_credit_cards, else hashed here)."""
+    return compile_card_catalog(version or catalog_version(cc_data.get("credit_cards", [])), cc_data)
+
+@st.cache_resource(show_spinner=False)
+def get_result_cache():
+    """On-disk result cache shared by every session (and by later restarts)."""
+    return ResultCache(RESULT_CACHE_PATH)
+
+@st.cache_resource(show_spinner=False)
+def get_chart_payloads():
+    """Serialized chart specs shared by every session."""
+    return ChartPayloads()
+
+def budget_donut_chart(donut_df):
+    """Donut of monthly spend per category with % labels and the total in the middle."""
+    total_spend = donut_df["Spend"].sum()
+    base = alt.Chart(donut_df).encode(
+        theta=alt.Theta("Spend:Q", stack=True),
+        color=alt.Color("Category:N", legend=None),
+        tooltip=[
+            alt.Tooltip("Category:N", title="Category"),
+            alt.Tooltip("Spend:Q", format="$,.2f"),
+            alt.Tooltip("Percent:Q", format=".1f", title="% of Total")
+        ]
+    )
+
+    # Donut arcs with white borders for spacing
+    arcs = base.mark_arc(
+        innerRadius=80,
+        outerRadius=140,
+        stroke="white",
+        strokeWidth=2
+    )
+
+    # White category + percent labels placed further out
+    labels = base.mark_text(
+        radius=190,  # increased radius for more space
+        size=13,
+        fontWeight="bold",
+        color="white"   # white text labels
+    ).encode(
+        text=alt.Text("Label:N")
+    )
+
+    # White center text (total spend)
+    center_text = (
+        alt.Chart(pd.DataFrame([{"text": f"Total\n${total_spend:,.0f}"}]))
+        .mark_text(
+            align="center",
+            baseline="middle",
+            fontSize=22,
+            fontWeight="bold",
+            color="white"
+        )
+        .encode(text="text:N")
+    )
+
+    return (arcs + labels + center_text).properties(
+        width=480,
+        height=480,
+        padding={"left": 20, "right": 20, "top": 20, "bottom": 20}  # more outer space
+    )
+
 def get_all_card_options(transaction_category, amount, cc_data):
     """Get all credit card options for a single transaction amount in a category."""
-    if not cc_data or "credit_cards" not in cc_data:
+    if not cc_data:
         return []
-
-    # Map app categories -> card categories
-    category_mapping = {
-        "groceries": ["U.S._supermarkets", "grocery_stores", "grocery_stores_and_wholesale_clubs"],
-        "dining": ["restaurants_worldwide", "dining"],
-        "gas": ["gas_stations"],
-        "online_shopping": ["online_shopping"],
-        "utilities": ["utilities"],
-        "airfare": ["flights_booked_direct"],
-        "hotels": ["hotels"],
-        "subscriptions": ["streaming_services"],
-        "entertainment": ["entertainment"],
-        "drugstores": ["drugstores"],
-        "travel_portal": ["travel_portal"],
-        "home_improvement": ["home_improvement"],
-        "rideshare": ["rideshare"]
-    }
-
-    card_options = []
-    for card in cc_data["credit_cards"]:
-        base_rate = card.get("base_rate_x", 0.0)
-        multipliers = card.get("category_multipliers_x", {}) or {}
-        max_multiplier = base_rate
-        matched_category = "Base Rate"
-
-        mapped_categories = category_mapping.get(str(transaction_category).lower(), [])
-        for cc_category in mapped_categories:
-            if cc_category in multipliers and multipliers[cc_category] > max_multiplier:
-                max_multiplier = multipliers[cc_category]
-                matched_category = cc_category.replace("_", " ").title()
-
-        transaction_rewards = amount * max_multiplier / 100.0
-
-        # Parse annual fee
-        fee_str = str(card.get("annual_cost", "")).replace("$", "").replace(",", "").strip()
-        annual_cost = float(fee_str) if fee_str else 0.0
-
-        monthly_annual_cost = annual_cost / 12.0
-        net_rewards = transaction_rewards - monthly_annual_cost
-
-        card_options.append({
-            "card_name": card.get("card_name", "Unknown"),
-            "annual_cost": card.get("annual_cost", "$0"),
-            "annual_cost_numeric": annual_cost,
-            "reward_rate": max_multiplier,
-            "matched_category": matched_category,
-            "rewards": transaction_rewards,
-            "monthly_annual_cost": monthly_annual_cost,
-            "net_rewards": net_rewards,
-        })
-
-    card_options.sort(key=lambda x: x["net_rewards"], reverse=True)
-    return card_options
+    catalog = cc_data if isinstance(cc_data, CardCatalog) else get_card_catalog(cc_data)
+    return catalog.card_options(transaction_category, amount)
 
 # -----------------------------
 # UI: Header + Mode Toggle
@@ -113,18 +180,11 @@ with col2:
             del st.session_state[k]
         st.rerun()
 
-# Load both resources
-cc_data = load_credit_cards()
-sample_df = load_default_transactions()
-
+# Load the catalog once per rerun (the sample is only read when needed)
+cc_data, cc_version = load_credit_cards()
 if not cc_data or not cc_data.get("credit_cards"):
     st.stop()
-
-# Compute average monthly category spend from sample data
-sample_df["date"] = pd.to_datetime(sample_df["date"], errors="coerce")
-monthly_avg = (
-    sample_df.groupby("category")["price"].mean().to_dict()
-)
+card_catalog = get_card_catalog(cc_data, cc_version)
 
 mode = st.radio(
     "Choose optimizer mode:",
@@ -133,11 +193,6 @@ mode = st.radio(
     index=0                                       # <-- monthly spend default
 )
 
-
-cc_data = load_credit_cards()
-if not cc_data or not cc_data.get("credit_cards"):
-    st.stop()
-
 # ----------------------------------------------------
 # MODE A: Spreadsheet Mode (CSV of individual txns)
 # ----------------------------------------------------
@@ -148,60 +203,59 @@ if mode == "Spreadsheet Mode":
     uploaded = st.file_uploader("Upload CSV", type=["csv"])
     if uploaded is not None:
         try:
-            df = pd.read_csv(uploaded)
+            df, report = ingest_statement(uploaded, cache_dir=INGEST_CACHE_DIR)
+        except ValueError as e:
+            st.error(str(e))
+            st.stop()
         except Exception as e:
             st.error(f"Could not read file: {e}")
             st.stop()
+        skipped = {reason: n for reason, n in report["rejected"].items() if n}
+        if skipped:
+            st.warning("Skipped rows: " + ", ".join(f"{reason.replace('_', ' ')} ({n})" for reason, n in skipped.items()))
+        if report.get("credits") or report.get("flexible_dates"):
+            st.caption(f"Kept {report.get('credits', 0):,} refunds / credits (zero or negative price); "
+                       f"{report.get('flexible_dates', 0):,} dates weren't YYYY-MM-DD and were parsed flexibly")
     else:
         df = load_default_transactions()
 
-    # Validate + normalize
-    required = {"date", "vendor", "category", "price"}
-    missing = required - set(map(str.lower, df.columns))
-    if missing:
-        st.error(f"Missing columns: {sorted(list(missing))}. Expected: {sorted(list(required))}")
-        st.stop()
+        # Validate + normalize
+        required = {"date", "vendor", "category", "price"}
+        missing = required - set(map(str.lower, df.columns))
+        if missing:
+            st.error(f"Missing columns: {sorted(list(missing))}. Expected: {sorted(list(required))}")
+            st.stop()
 
-    df.columns = [c.lower() for c in df.columns]
-    df["date"] = pd.to_datetime(df["date"], errors="coerce")
-    df = df.dropna(subset=["date"])
-    df = df.sort_values("date", ascending=False)
+        df.columns = [c.lower() for c in df.columns]
+        df["date"] = pd.to_datetime(df["date"], errors="coerce")
+        df = df.dropna(subset=["date"])
+        df = df.sort_values("date", ascending=False)
 
     st.dataframe(df, use_container_width=True, hide_index=True)
 
-    # Optimize across transactions
-    optimization_rows = []
-    total_spend = 0.0
-    total_gross = 0.0
-    total_fees = 0.0
-    unique_cards = set()
-
-    for _, row in df.iterrows():
-        amount = float(row["price"])
-        opts = get_all_card_options(row["category"], amount, cc_data)
-        if not opts:
-            continue
-        best = opts[0]
-        optimization_rows.append({
-            "Date": row["date"].strftime("%Y-%m-%d"),
-            "Vendor": row["vendor"],
-            "Category": row["category"],
-            "Amount": f"${amount:,.2f}",
-            "Best Card": best["card_name"],
-            "Reward Rate": f"{best['reward_rate']:.1f}%",
-            "Gross Rewards": f"${best['rewards']:,.2f}",
-            "Net (1/12 fee deducted)": f"${best['net_rewards']:,.2f}",
-        })
-
-        total_spend += amount
-        total_gross += best["rewards"]
-        if best["card_name"] not in unique_cards:
-            total_fees += best["annual_cost_numeric"]
-            unique_cards.add(best["card_name"])
+    # Optimize across transactions (all rows scored at once)
+    amounts = df["price"].astype(float)
+    result_cache = get_result_cache()
+    scores = result_cache.score_transactions(df["category"], amounts, card_catalog, dates=df["date"])
+    totals = summarize_scores(amounts, scores)
+    total_spend = totals["total_spend"]
+    total_gross = totals["total_gross_rewards"]
+    total_fees = totals["total_annual_costs"]
+    unique_cards = totals["cards_used"]
 
     st.write("### Recommendations")
-    if optimization_rows:
-        st.dataframe(pd.DataFrame(optimization_rows), use_container_width=True, hide_index=True)
+    if not scores.empty and not df.empty:
+        optimization_df = pd.DataFrame({
+            "Date": df["date"].dt.strftime("%Y-%m-%d").to_numpy(),
+            "Vendor": df["vendor"].to_numpy(),
+            "Category": df["category"].to_numpy(),
+            "Amount": [f"${amount:,.2f}" for amount in amounts],
+            "Best Card": scores["card_name"].to_numpy(),
+            "Reward Rate": [f"{rate:.1f}%" for rate in scores["reward_rate"]],
+            "Gross Rewards": [f"${rewards:,.2f}" for rewards in scores["rewards"]],
+            "Net (1/12 fee deducted)": [f"${net:,.2f}" for net in scores["net_rewards"]],
+        })
+        st.dataframe(optimization_df, use_container_width=True, hide_index=True)
 
         c1, c2, c3, c4 = st.columns(4)
         with c1: st.metric("Total Gross Rewards", f"${total_gross:,.2f}")
@@ -210,29 +264,69 @@ if mode == "Spreadsheet Mode":
         with c4: st.metric("Net Rewards (After Fees)", f"${(total_gross-total_fees):,.2f}")
 
         st.caption(f"Cards used: {len(unique_cards)} (annual fees counted once per card).")
+        cache_stats = result_cache.stats()
+        st.caption(f"Result cache: {cache_stats['total_hits']:,} hits / {cache_stats['total_misses']:,} misses, "
+                   f"{cache_stats['entries']:,} scored statements ({cache_stats['bytes'] / 1e6:.1f} MB)")
     else:
         st.info("No recommendations to show. Check categories/amounts.")
 
 # ----------------------------------------------------
 # MODE B: Monthly Spend Mode (default)
 # ----------------------------------------------------
-if mode == "Monthly Spend Mode":
-    st.subheader("🗂️ Monthly Spend Mode")
-    st.caption("Enter your average monthly spend by category (defaults are based on sample data).")
-
-    input_categories = [
-        "groceries", "dining", "gas", "online_shopping", "utilities",
-        "airfare", "hotels", "subscriptions", "entertainment",
-        "drugstores", "travel_portal", "home_improvement", "rideshare"
-    ]
-
-    # Initialize defaults from sample averages
-    if "monthly_spend" not in st.session_state:
-        st.session_state.monthly_spend = {}
-        for c in input_categories:
-            default_val = float(monthly_avg.get(c, 0.0))
-            st.session_state.monthly_spend[c] = round(default_val, 2)
-
+# The inputs, donut and recommendations live in one fragment, so a spend
+# tweak reruns just that fragment (not the catalog load, the other mode
+# or the reference table); the What-If sweep is a nested fragment whose
+# own controls rerun only the sweep. Derived state (recommendations,
+# donut spec) is cached on the spend values.
+INPUT_CATEGORIES = [
+    "groceries", "dining", "gas", "online_shopping", "utilities",
+    "airfare", "hotels", "subscriptions", "entertainment",
+    "drugstores", "travel_portal", "home_improvement", "rideshare"
+]
+
+def default_monthly_spend():
+    """Average transaction amount per input category in the sample statement."""
+    averages = load_default_transactions().groupby("category")["price"].mean()
+    return {c: round(float(averages.get(c, 0.0)), 2) for c in INPUT_CATEGORIES}
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def monthly_recommendations(version, _catalog, spend):
+    """Best card per category for ``spend`` ((category, monthly amount) pairs), plus totals."""
+    spend = [(c, amt) for c, amt in spend if amt > 0]
+    totals = {"total_spend": 0.0, "total_gross": 0.0, "total_fees": 0.0, "cards_used": []}
+    if not spend or len(_catalog) == 0:
+        return [], totals
+
+    # Every card x category at once (caps applied to the monthly amounts);
+    # argmax keeps the first card on ties
+    amounts = np.array([amt for _, amt in spend])
+    columns = category_codes([c for c, _ in spend])
+    gross = np.column_stack([_catalog.column_rewards(j, [amt])[0] for j, amt in zip(columns, amounts)])
+    net = gross - _catalog.annual_costs[:, None] / 12.0
+    best = net.argmax(axis=0)
+
+    recs = []
+    for k, (cat, amt) in enumerate(spend):
+        i = best[k]
+        rewards = float(gross[i, k])
+        recs.append({
+            "Category": cat,
+            "Monthly Spend": f"${amt:,.2f}",
+            "Best Card": _catalog.card_names[i],
+            "Reward Rate": f"{100.0 * rewards / amt:.1f}%",
+            "Gross Rewards": f"${rewards:,.2f}",
+            "Net (1/12 fee deducted)": f"${net[i, k]:,.2f}",
+        })
+        totals["total_spend"] += amt
+        totals["total_gross"] += rewards
+        if _catalog.card_names[i] not in totals["cards_used"]:
+            totals["total_fees"] += float(_catalog.annual_costs[i])
+            totals["cards_used"].append(_catalog.card_names[i])
+    return recs, totals
+
+@st.fragment
+def monthly_spend_view(card_catalog):
+    """Spend inputs, budget donut and per-category recommendations."""
     # Side-by-side layout: inputs (left) | donut chart (right)
     col_inputs, col_chart = st.columns([2, 1], gap="large")
 
@@ -241,7 +335,7 @@ if mode == "Monthly Spend Mode":
     # -----------------------------
     with col_inputs:
         cols = st.columns(3)
-        for i, c in enumerate(input_categories):
+        for i, c in enumerate(INPUT_CATEGORIES):
             with cols[i % 3]:
                 st.session_state.monthly_spend[c] = st.number_input(
                     c.replace("_", " ").title(),
@@ -252,137 +346,149 @@ if mode == "Monthly Spend Mode":
                 )
         st.caption("Adjust your spending to update the chart and optimization results.")
 
-# -----------------------------
-# RIGHT: Donut Chart
-# -----------------------------
-with col_chart:
-    st.subheader("💸 Budget Breakdown")
-
-    donut_df = pd.DataFrame([
-        {"Category": c.replace("_", " ").title(), "Spend": amt}
-        for c, amt in st.session_state.monthly_spend.items() if amt > 0
-    ])
-
-    if donut_df.empty:
-        st.info("Enter some spending amounts to see your breakdown.")
-    else:
-        import altair as alt
+    # -----------------------------
+    # RIGHT: Donut Chart
+    # -----------------------------
+    with col_chart:
+        st.subheader("💸 Budget Breakdown")
 
-        total_spend = donut_df["Spend"].sum()
-        donut_df["Percent"] = donut_df["Spend"] / total_spend * 100
-        donut_df["Label"] = donut_df.apply(
-            lambda r: f"{r['Category']} ({r['Percent']:.1f}%)", axis=1
+        donut_df = pd.DataFrame(
+            [(c.replace("_", " ").title(), amt) for c, amt in st.session_state.monthly_spend.items() if amt > 0],
+            columns=["Category", "Spend"],
         )
 
-        base = alt.Chart(donut_df).encode(
-            theta=alt.Theta("Spend:Q", stack=True),
-            color=alt.Color("Category:N", legend=None),
-            tooltip=[
-                alt.Tooltip("Category:N", title="Category"),
-                alt.Tooltip("Spend:Q", format="$,.2f"),
-                alt.Tooltip("Percent:Q", format=".1f", title="% of Total")
-            ]
-        )
+        if donut_df.empty:
+            st.info("Enter some spending amounts to see your breakdown.")
+        else:
+            # At most MAX_POINTS slices; the smallest are folded into "Other"
+            donut_df = cap_points(donut_df, "Category", "Spend")
+            donut_df["Percent"] = donut_df["Spend"] / donut_df["Spend"].sum() * 100
+            donut_df["Label"] = donut_df["Category"] + " (" + donut_df["Percent"].map("{:.1f}%".format) + ")"
 
-        # Donut arcs with white borders for spacing
-        arcs = base.mark_arc(
-            innerRadius=80,
-            outerRadius=140,
-            stroke="white",
-            strokeWidth=2
-        )
+            # Serialized once per distinct budget, reused on other reruns
+            spec = get_chart_payloads().spec("budget_donut", donut_df, budget_donut_chart)
+            st.vega_lite_chart(spec, use_container_width=True)
 
-        # White category + percent labels placed further out
-        labels = base.mark_text(
-            radius=190,  # increased radius for more space
-            size=13,
-            fontWeight="bold",
-            color="white"   # white text labels
-        ).encode(
-            text=alt.Text("Label:N")
-        )
+    st.divider()
 
-        # White center text (total spend)
-        center_text = (
-            alt.Chart(pd.DataFrame([{"text": f"Total\n${total_spend:,.0f}"}]))
-            .mark_text(
-                align="center",
-                baseline="middle",
-                fontSize=22,
-                fontWeight="bold",
-                color="white"
-            )
-            .encode(text="text:N")
-        )
+    # Optimize per-category totals
+    recs, totals = monthly_recommendations(
+        card_catalog.version, card_catalog, tuple(st.session_state.monthly_spend.items())
+    )
+    total_gross, total_fees = totals["total_gross"], totals["total_fees"]
 
-        donut_chart = (arcs + labels + center_text).properties(
-            width=480,
-            height=480,
-            padding={"left": 20, "right": 20, "top": 20, "bottom": 20}  # more outer space
-        )
+    st.write("### Recommended Cards by Category")
+    if recs:
+        st.dataframe(pd.DataFrame(recs), use_container_width=True, hide_index=True)
 
-        st.altair_chart(donut_chart, use_container_width=True)
+        c1, c2, c3, c4 = st.columns(4)
+        with c1: st.metric("Total Gross Rewards", f"${total_gross:,.2f}")
+        with c2: st.metric("Total Spend", f"${totals['total_spend']:,.2f}")
+        with c3: st.metric("Total Annual Costs", f"${total_fees:,.2f}")
+        with c4: st.metric("Net Rewards (After Fees)", f"${(total_gross-total_fees):,.2f}")
 
+        st.caption(f"Cards used: {len(totals['cards_used'])} (annual fees counted once per card).")
+    else:
+        st.info("Enter some monthly spend to see recommendations.")
 
-    st.divider()
+    what_if_sweep(card_catalog)
+
+# -----------------------------
+# What-if sweep (Monthly Spend Mode)
+# -----------------------------
+@st.fragment
+def what_if_sweep(card_catalog):
+    """Heatmap of the winning card(s) over variations of the current monthly spend."""
+    with st.expander("🔬 What-If Sweep", expanded=False):
+        st.caption("Score thousands of variations of your monthly spend at once and see which cards win where.")
+        sweep_col1, sweep_col2 = st.columns(2)
+        with sweep_col1:
+            sweep_type = st.radio("Sweep", ["±% per category", "Two-category grid"], horizontal=True, key="sweep_type")
+        with sweep_col2:
+            winner_type = st.radio("Winner", ["Best card per category", "Best single card"], horizontal=True,
+                                   key="sweep_winner")
+
+        base_spend = monthly_vector(st.session_state.monthly_spend)
+        category_titles = [c.replace("_", " ").title() for c in INPUT_CATEGORIES]
+
+        if sweep_type == "±% per category":
+            range_col, steps_col = st.columns(2)
+            with range_col:
+                sweep_pct = st.slider("Range (±%)", min_value=10, max_value=200, value=50, step=10)
+            with steps_col:
+                sweep_steps = st.slider("Steps", min_value=5, max_value=101, value=41, step=2)
+            scenarios, sweep_cols, sweep_factors = scale_scenarios(base_spend, pct=sweep_pct, steps=sweep_steps)
+            x_values = np.round((sweep_factors - 1) * 100, 1)
+            y_values = [category_titles[j] for j in sweep_cols]
+            x_field, y_field = alt.X("x:O", title="Change in category spend (%)"), alt.Y("y:N", title="Category")
+        else:
+            grid_col1, grid_col2, grid_col3 = st.columns(3)
+            with grid_col1:
+                x_category = st.selectbox("X category", INPUT_CATEGORIES, index=0, format_func=lambda c: c.replace("_", " ").title())
+                x_max = st.number_input("X max ($/month)", min_value=10.0, step=50.0,
+                                        value=float(max(100.0, 2 * st.session_state.monthly_spend.get(x_category, 0.0))))
+            with grid_col2:
+                y_category = st.selectbox("Y category", INPUT_CATEGORIES, index=1, format_func=lambda c: c.replace("_", " ").title())
+                y_max = st.number_input("Y max ($/month)", min_value=10.0, step=50.0,
+                                        value=float(max(100.0, 2 * st.session_state.monthly_spend.get(y_category, 0.0))))
+            with grid_col3:
+                grid_size = st.slider("Grid size", min_value=10, max_value=100, value=60, step=5)
+            x_grid = np.round(np.linspace(0, x_max, grid_size), 2)
+            y_grid = np.round(np.linspace(0, y_max, grid_size), 2)
+            x_col, y_col = INPUT_CATEGORIES.index(x_category), INPUT_CATEGORIES.index(y_category)
+            scenarios = grid_scenarios(base_spend, x_col, y_col, x_grid, y_grid)
+            x_values, y_values = scenarios[:, x_col], scenarios[:, y_col]
+            x_field = alt.X("x:O", title=f"{x_category.replace('_', ' ').title()} ($/month)", sort="ascending",
+                            axis=alt.Axis(format="$,.0f", labelOverlap=True))
+            y_field = alt.Y("y:O", title=f"{y_category.replace('_', ' ').title()} ($/month)", sort="descending",
+                            axis=alt.Axis(format="$,.0f", labelOverlap=True))
+
+        if len(scenarios) == 0 or (sweep_type == "Two-category grid" and x_category == y_category):
+            st.info("Enter some monthly spend (and two different categories for a grid) to run a sweep.")
+        else:
+            sweep_start = time.perf_counter()
+            if winner_type == "Best card per category":
+                set_ids, card_sets, monthly_net = best_card_sets(card_catalog, scenarios)
+                set_labels = [" + ".join(card_catalog.card_names[list(cards)]) or "—" for cards in card_sets]
+                winners = np.asarray(set_labels, dtype=object)[set_ids]
+            else:
+                card_idx, annual_net = best_single_cards(card_catalog, scenarios)
+                winners = card_catalog.card_names[card_idx]
+                monthly_net = annual_net / 12.0
+            sweep_ms = (time.perf_counter() - sweep_start) * 1000
+
+            sweep_df = pd.DataFrame({"x": x_values, "y": y_values, "Winner": winners, "Monthly Net": monthly_net})
+            heatmap = (
+                alt.Chart(sweep_df)
+                .mark_rect()
+                .encode(
+                    x=x_field,
+                    y=y_field,
+                    color=alt.Color("Winner:N", legend=alt.Legend(orient="bottom", columns=1, labelLimit=600)),
+                    tooltip=[
+                        alt.Tooltip("Winner:N"),
+                        alt.Tooltip("Monthly Net:Q", format="$,.2f", title="Monthly net rewards"),
+                    ],
+                )
+                .properties(height=420)
+            )
+            st.altair_chart(heatmap, use_container_width=True)
+            st.caption(f"Scored {len(scenarios):,} spend vectors in {sweep_ms:.0f} ms; "
+                       f"{sweep_df['Winner'].nunique()} different winners.")
 
+if mode == "Monthly Spend Mode":
+    st.subheader("🗂️ Monthly Spend Mode")
+    st.caption("Enter your average monthly spend by category (defaults are based on sample data). "
+               "Capped bonus categories earn the bonus rate up to the cap, assuming the same spend every month.")
 
+    # Initialize defaults from sample averages
+    if "monthly_spend" not in st.session_state:
+        st.session_state.monthly_spend = default_monthly_spend()
 
-# Optimize per-category totals
-recs = []
-total_spend = 0.0
-total_gross = 0.0
-total_fees = 0.0
-unique_cards = set()
-
-for cat, amt in st.session_state.monthly_spend.items():
-    if amt <= 0:
-        continue
-    opts = get_all_card_options(cat, amt, cc_data)
-    if not opts:
-        continue
-    best = opts[0]
-    recs.append({
-        "Category": cat,
-        "Monthly Spend": f"${amt:,.2f}",
-        "Best Card": best["card_name"],
-        "Reward Rate": f"{best['reward_rate']:.1f}%",
-        "Gross Rewards": f"${best['rewards']:,.2f}",
-        "Net (1/12 fee deducted)": f"${best['net_rewards']:,.2f}",
-    })
-    total_spend += amt
-    total_gross += best["rewards"]
-    if best["card_name"] not in unique_cards:
-        total_fees += best["annual_cost_numeric"]
-        unique_cards.add(best["card_name"])
-
-st.write("### Recommended Cards by Category")
-if recs:
-    st.dataframe(pd.DataFrame(recs), use_container_width=True, hide_index=True)
-
-    c1, c2, c3, c4 = st.columns(4)
-    with c1: st.metric("Total Gross Rewards", f"${total_gross:,.2f}")
-    with c2: st.metric("Total Spend", f"${total_spend:,.2f}")
-    with c3: st.metric("Total Annual Costs", f"${total_fees:,.2f}")
-    with c4: st.metric("Net Rewards (After Fees)", f"${(total_gross-total_fees):,.2f}")
-
-    st.caption(f"Cards used: {len(unique_cards)} (annual fees counted once per card).")
-else:
-    st.info("Enter some monthly spend to see recommendations.")
+    monthly_spend_view(card_catalog)
 
 # -----------------------------
 # All Cards (for reference)
 # -----------------------------
 with st.expander("All Available Cards", expanded=False):
-    rows = []
-    for card in cc_data.get("credit_cards", []):
-        multipliers = card.get("category_multipliers_x", {}) or {}
-        readable = ", ".join([f"{k.replace('_',' ').title()}: {v:.1f}%"
-                              for k, v in multipliers.items()]) if multipliers else "—"
-        rows.append({
-            "Card Name": card.get("card_name", ""),
-            "Annual Cost": card.get("annual_cost", ""),
-            "Base Rate": f"{card.get('base_rate_x', 0):.1f}%",
-            "Category Multipliers": readable,
-        })
-    st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+    st.dataframe(pd.DataFrame(card_catalog.display_rows()), use_container_width=True, hide_index=True)
@@ -0,0 +1,90 @@
+# chart_data.py
+# Chart payloads for the Finance apps
+# --------------------------------------------------------------
+# Every rerun ships each chart's spec and data to the browser, so the
+# apps hand charts over already shaped for what is drawn:
+# - data is aggregated to the displayed resolution before it reaches
+#   Altair (spend per category from the rollup, not one row per
+#   transaction), and capped at ``max_points`` marks; the smallest
+#   categories are folded into one "Other" mark
+# - the Vega-Lite spec is built and serialized once per distinct
+#   (chart, data, options) and reused while those are unchanged
+# - each payload's size is logged (logger "chart_data") and counted
+#   in stats()
+# --------------------------------------------------------------
+
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+MAX_POINTS = 20
+MAX_ENTRIES = 64
+
+logger = logging.getLogger("chart_data")
+
+
+def cap_points(frame, label, value, max_points=MAX_POINTS) -> pd.DataFrame:
+    """Largest ``max_points - 1`` rows by ``value``, plus one row summing the rest.
+
+    Frames already within ``max_points`` rows are returned sorted but otherwise
+    untouched; only ``label`` and ``value`` are kept in the folded row.
+    """
+    frame = frame.sort_values(value, ascending=False, ignore_index=True)
+    if len(frame) <= max_points:
+        return frame
+    head, rest = frame.iloc[:max_points - 1], frame.iloc[max_points - 1:]
+    other = pd.DataFrame({label: [f"Other ({len(rest)} more)"], value: [rest[value].sum()]})
+    return pd.concat([head, other], ignore_index=True)
+
+
+def data_key(frame) -> str:
+    """Content hash of a frame (values, index and column names)."""
+    digest = hashlib.sha1("\x1f".join(map(str, frame.columns)).encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(frame, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+class ChartPayloads:
+    """LRU of serialized Vega-Lite specs, keyed by chart name, data and options."""
+
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._specs = OrderedDict()  # key -> (spec, payload bytes)
+        self._lock = threading.Lock()
+
+    def spec(self, name, data, build, **options) -> dict:
+        """Vega-Lite dict for ``build(data, **options)`` (an Altair chart), reused when unchanged."""
+        key = (name, data_key(data), json.dumps(options, sort_keys=True, default=str))
+        with self._lock:
+            cached = self._specs.get(key)
+            if cached is not None:
+                self._specs.move_to_end(key)
+                self.hits += 1
+        if cached is not None:
+            logger.debug("%s chart reused: %d points, %d bytes", name, len(data), cached[1])
+            return cached[0]
+
+        spec = build(data, **options).to_dict()
+        size = len(json.dumps(spec, default=str))
+        logger.info("%s chart built: %d points, %d bytes", name, len(data), size)
+        with self._lock:
+            self.misses += 1
+            self._specs[key] = (spec, size)
+            while len(self._specs) > self.max_entries:
+                self._specs.popitem(last=False)
+        return spec
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._specs),
+                "bytes": sum(size for _, size in self._specs.values()),
+            }
@@ -0,0 +1,145 @@
+# filter_index.py
+# Index over the transactions table for the Filters expander
+# --------------------------------------------------------------
+# Built once per change to the transactions (or their best cards), so
+# each rerun's filtering is a few bitmap operations rather than a scan:
+# - one packed bitmap (np.packbits) per category and per best card;
+#   a multiselect ORs its bitmaps, filters AND together
+# - dates sorted once; a date range is two binary searches
+# - vendor substring search through a trigram index over the distinct
+#   vendor names, then a lookup from vendor code to rows
+# Queries return row positions in the table's own (newest first) order.
+# --------------------------------------------------------------
+
+import numpy as np
+import pandas as pd
+
+NGRAM = 3
+
+
+def _bitmaps(codes, n_rows) -> dict:
+    """Packed row bitmap per distinct non-negative code."""
+    bitmaps = {}
+    order = np.argsort(codes, kind="stable")
+    sorted_codes = codes[order]
+    starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]]) if n_rows else []
+    ends = np.r_[starts[1:], n_rows] if n_rows else []
+    for start, end in zip(starts, ends):
+        code = int(sorted_codes[start])
+        if code < 0:
+            continue
+        mask = np.zeros(n_rows, dtype=bool)
+        mask[order[start:end]] = True
+        bitmaps[code] = np.packbits(mask)
+    return bitmaps
+
+
+def _ngrams(text):
+    return {text[i:i + NGRAM] for i in range(len(text) - NGRAM + 1)}
+
+
+class TransactionIndex:
+    """Bitmaps, sorted dates and a vendor trigram index over one table snapshot."""
+
+    def __init__(self, dates, vendors, categories, card_idx=None):
+        """``vendors`` / ``categories`` are pd.Categorical; ``card_idx`` is the best card per row (-1 for none)."""
+        self.n_rows = len(dates)
+        self._empty = np.zeros((self.n_rows + 7) // 8, dtype=np.uint8)
+
+        categories = pd.Categorical(categories)
+        by_code = _bitmaps(np.asarray(categories.codes, dtype=np.int64), self.n_rows)
+        self._category_bitmaps = {str(categories.categories[code]): bits for code, bits in by_code.items()}
+        cards = np.full(self.n_rows, -1, dtype=np.int64) if card_idx is None else np.asarray(card_idx, dtype=np.int64)
+        self._card_bitmaps = _bitmaps(cards, self.n_rows)
+
+        # Missing dates sort first and are skipped by every range
+        stamps = np.asarray(dates, dtype="datetime64[ns]")
+        keys = np.where(np.isnat(stamps), np.iinfo(np.int64).min, stamps.view(np.int64))
+        self._date_order = np.argsort(keys, kind="stable")
+        self._sorted_dates = keys[self._date_order]
+        self._missing_dates = int(np.isnat(stamps).sum())
+
+        vendors = pd.Categorical(vendors)
+        self._vendor_codes = np.asarray(vendors.codes, dtype=np.int64)
+        self._vendor_names = [str(v).lower() for v in vendors.categories]
+        grams = {}
+        for code, name in enumerate(self._vendor_names):
+            for gram in _ngrams(name):
+                grams.setdefault(gram, []).append(code)
+        self._vendor_grams = {gram: np.array(codes, dtype=np.int64) for gram, codes in grams.items()}
+
+    def memory_usage(self) -> int:
+        """Approximate bytes held by the index."""
+        arrays = [self._date_order, self._sorted_dates, self._vendor_codes, *self._vendor_grams.values(),
+                  *self._category_bitmaps.values(), *self._card_bitmaps.values()]
+        return int(sum(a.nbytes for a in arrays) + sum(len(name) + 49 for name in self._vendor_names))
+
+    @property
+    def cards(self) -> list:
+        """Card indices that are the best card for at least one row."""
+        return sorted(self._card_bitmaps)
+
+    # --- single filters -------------------------------------------------
+    def _any_of(self, bitmaps, keys):
+        bits = self._empty
+        for key in keys:
+            if key in bitmaps:
+                bits = bits | bitmaps[key]
+        return bits
+
+    def _date_range(self, start, end):
+        lo = self._missing_dates
+        hi = self.n_rows
+        if start is not None:
+            lo = max(lo, int(np.searchsorted(self._sorted_dates, pd.Timestamp(start).value, side="left")))
+        if end is not None:
+            hi = int(np.searchsorted(self._sorted_dates, pd.Timestamp(end).value, side="right"))
+        mask = np.zeros(self.n_rows, dtype=bool)
+        mask[self._date_order[lo:max(lo, hi)]] = True
+        return np.packbits(mask)
+
+    def _vendor_matches(self, text):
+        """Vendor codes whose lower-cased name contains ``text``."""
+        if len(text) < NGRAM:
+            candidates = range(len(self._vendor_names))
+        else:
+            postings = sorted((self._vendor_grams.get(gram) for gram in _ngrams(text)),
+                              key=lambda p: -1 if p is None else len(p))
+            if postings[0] is None:
+                return []
+            candidates = postings[0]
+            for posting in postings[1:]:
+                candidates = np.intersect1d(candidates, posting, assume_unique=True)
+        # Trigrams only narrow it down; check the whole string
+        return [code for code in candidates if text in self._vendor_names[code]]
+
+    def _vendor(self, text):
+        hit = np.zeros(len(self._vendor_names) + 1, dtype=bool)
+        hit[self._vendor_matches(text)] = True
+        # Code -1 (missing vendor) reads the trailing False
+        return np.packbits(hit[self._vendor_codes])
+
+    # --- combined -------------------------------------------------------
+    def query(self, categories=(), cards=(), vendor=None, start=None, end=None):
+        """Row positions matching every filter given, or None when no filter is set.
+
+        ``categories`` / ``cards`` match any of the listed values; ``vendor``
+        is a case-insensitive substring; ``start`` / ``end`` bound the date
+        inclusively.
+        """
+        vendor = (vendor or "").strip().lower()
+        parts = []
+        if categories:
+            parts.append(self._any_of(self._category_bitmaps, [str(c) for c in categories]))
+        if cards:
+            parts.append(self._any_of(self._card_bitmaps, [int(c) for c in cards]))
+        if vendor:
+            parts.append(self._vendor(vendor))
+        if start is not None or end is not None:
+            parts.append(self._date_range(start, end))
+        if not parts:
+            return None
+        bits = parts[0]
+        for part in parts[1:]:
+            bits = bits & part
+        return np.flatnonzero(np.unpackbits(bits, count=self.n_rows))
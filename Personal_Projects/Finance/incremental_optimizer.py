@@ -0,0 +1,175 @@
+# incremental_optimizer.py
+# Incremental best-card scoring for the editable transactions table
+# --------------------------------------------------------------
+# Keeps each transaction's best card keyed by a stable row id, plus
+# running totals (spend, gross rewards, how many rows each card wins).
+# A data_editor edit is diffed against the previous snapshot by row id
+# and only the added / changed / deleted rows are rescored, so edit
+# latency doesn't grow with the size of the history. The same deltas
+# keep a month x category SpendRollup current for the charts.
+# Rows in a category where some card has a spending cap depend on each
+# other (a cap used up earlier in the year changes later picks), so an
+# edit there re-sweeps that whole category.
+# The initial full scoring can be served from a persistent ResultCache,
+# so reopening the same statement with the same cards skips it.
+# fork() lets sessions start from one shared scored sample: the scores
+# frame is only ever replaced, never changed in place, so forks share it
+# until they apply their own edits.
+# --------------------------------------------------------------
+
+import copy
+
+import numpy as np
+import pandas as pd
+
+from rewards_engine import category_codes, score_transactions
+from spend_rollup import SpendRollup
+from transaction_store import EDITABLE_COLUMNS
+
+# Column carrying the row id through st.data_editor, which keeps a plain
+# RangeIndex so rows can be added with "+"; rows added there have no id
+ROW_ID_COLUMN = "row_id"
+
+
+def diff_rows(snapshot, edited, id_column=ROW_ID_COLUMN):
+    """Compare an edited table to the snapshot it was shown with.
+
+    ``snapshot`` is indexed by row id; ``edited`` carries it in ``id_column``
+    (missing for new rows). Returns (changed, added, deleted): rows whose
+    editable columns differ (indexed by row id), rows without a shown id,
+    and ids that were shown but are gone from ``edited``.
+    """
+    shown = snapshot.index
+    ids = pd.to_numeric(edited[id_column], errors="coerce")
+    is_kept = ids.isin(shown).to_numpy()
+    kept = edited[is_kept].set_axis(pd.Index(ids[is_kept].astype(shown.dtype), name=shown.name))
+    added = edited[~is_kept].drop(columns=id_column)
+    deleted = shown.difference(kept.index)
+
+    before = snapshot.loc[kept.index, EDITABLE_COLUMNS]
+    after = kept[EDITABLE_COLUMNS]
+    differs = pd.Series(False, index=kept.index)
+    for col in EDITABLE_COLUMNS:
+        if col == "Amount":
+            differs |= ~np.isclose(before[col].astype(float), after[col].astype(float))
+        elif col == "Date":
+            before_dates = pd.to_datetime(before[col], errors="coerce")
+            after_dates = pd.to_datetime(after[col], errors="coerce")
+            differs |= ~((before_dates == after_dates) | (before_dates.isna() & after_dates.isna()))
+        else:
+            differs |= before[col].astype(str) != after[col].astype(str)
+    return kept[differs].drop(columns=id_column), added, deleted
+
+
+class IncrementalOptimizer:
+    """Best card per transaction row, maintained by delta as rows change."""
+
+    def __init__(self, catalog, transactions=None, cache=None):
+        self.catalog = catalog
+        self.scores = pd.DataFrame(
+            {"card_idx": pd.Series(dtype=np.intp), "card_name": pd.Series(dtype=object),
+             "reward_rate": pd.Series(dtype=float), "rewards": pd.Series(dtype=float),
+             "amount": pd.Series(dtype=float), "date": pd.Series(dtype="datetime64[ns]"),
+             "category": pd.Series(dtype=object)}
+        )
+        self.card_counts = np.zeros(len(catalog), dtype=np.int64)
+        self.total_spend = 0.0
+        self.total_gross_rewards = 0.0
+        self.rollup = SpendRollup()
+        self.version = 0  # bumped on every apply()
+        self._shared_scores = False  # scores frame also referenced by a fork
+        if transactions is not None and len(transactions):
+            self.apply(upserts=transactions, cache=cache)
+
+    def fork(self) -> "IncrementalOptimizer":
+        """An optimizer with the same rows; scores are shared until either side applies a change."""
+        other = copy.copy(self)
+        other.card_counts = self.card_counts.copy()
+        other.rollup = copy.deepcopy(self.rollup)
+        self._shared_scores = other._shared_scores = True
+        return other
+
+    def memory_usage(self, include_shared=True) -> int:
+        """Approximate bytes held by the scores, card counts and rollup.
+
+        With ``include_shared=False`` a scores frame still shared with a fork counts as 0.
+        """
+        shared = self._shared_scores and not include_shared
+        scores = 0 if shared else int(self.scores.memory_usage(deep=True).sum())
+        rollup = sum(a.nbytes for a in (self.rollup.spend, self.rollup.count, self.rollup.rewards))
+        return scores + self.card_counts.nbytes + rollup
+
+    def _account(self, scores, sign):
+        self.total_spend += sign * float(scores["amount"].sum())
+        self.total_gross_rewards += sign * float(scores["rewards"].sum())
+        card_idx = scores["card_idx"].to_numpy(dtype=np.intp)
+        np.add.at(self.card_counts, card_idx[card_idx >= 0], sign)
+        self.rollup.add(scores["date"], scores["category"], scores["amount"], scores["rewards"], sign=sign)
+
+    def apply(self, upserts=None, deleted=(), cache=None):
+        """Rescore ``upserts`` (indexed by row id, Date/Category/Amount columns) and drop ``deleted`` ids.
+
+        With an empty catalog rows are still tracked (card_idx -1, no
+        rewards) so the spend rollup stays complete. ``cache`` (a
+        ResultCache) is worth passing for whole statements, not single edits.
+        """
+        upserts = upserts if upserts is not None else pd.DataFrame(columns=["Date", "Category", "Amount"])
+        self.version += 1
+        upserts = self._with_capped_neighbours(upserts, deleted)
+        stale = self.scores.index.intersection(pd.Index(list(deleted)).append(upserts.index))
+        if len(stale):
+            self._account(self.scores.loc[stale], -1)
+            self.scores = self.scores.drop(stale)
+            self._shared_scores = False
+        if len(upserts):
+            amounts = upserts["Amount"].astype(float).to_numpy()
+            if len(self.catalog):
+                score = cache.score_transactions if cache is not None else score_transactions
+                scored = score(upserts["Category"], amounts, self.catalog, dates=upserts["Date"])
+            else:
+                scored = pd.DataFrame({"card_idx": -1, "card_name": "", "reward_rate": 0.0, "rewards": 0.0},
+                                      index=range(len(amounts)))
+            fresh = pd.DataFrame({
+                "card_idx": scored["card_idx"].to_numpy(),
+                "card_name": scored["card_name"].to_numpy(),
+                "reward_rate": scored["reward_rate"].to_numpy(),
+                "rewards": scored["rewards"].to_numpy(),
+                "amount": amounts,
+                "date": pd.to_datetime(upserts["Date"], errors="coerce").to_numpy("datetime64[ns]"),
+                "category": upserts["Category"].astype(object).to_numpy(),
+            }, index=upserts.index)
+            self._account(fresh, +1)
+            self.scores = fresh if self.scores.empty else pd.concat([self.scores, fresh])
+            self._shared_scores = False
+
+    def _with_capped_neighbours(self, upserts, deleted):
+        # Existing rows sharing a capped category with an edit get rescored with it
+        capped = self.catalog.capped_columns
+        if not capped or self.scores.empty:
+            return upserts
+        gone = self.scores.index.intersection(pd.Index(list(deleted)))
+        before = self.scores.index.intersection(gone.append(upserts.index))
+        # Both the new and the previous category of an edited row count
+        touched = set(category_codes(upserts["Category"]).tolist())
+        touched |= set(category_codes(self.scores.loc[before, "category"]).tolist())
+        if not touched & capped:
+            return upserts
+        in_group = np.isin(category_codes(self.scores["category"]), list(touched & capped))
+        neighbours = self.scores.index[in_group].difference(upserts.index).difference(gone)
+        if not len(neighbours):
+            return upserts
+        rows = self.scores.loc[neighbours]
+        extra = pd.DataFrame({"Date": rows["date"], "Category": rows["category"], "Amount": rows["amount"]})
+        return pd.concat([upserts[["Date", "Category", "Amount"]], extra])
+
+    def totals(self) -> dict:
+        """Same shape as summarize_scores(); each used card's fee is counted once."""
+        used = self.card_counts > 0
+        total_fees = float(self.catalog.annual_costs[used].sum())
+        return {
+            "total_spend": self.total_spend,
+            "total_gross_rewards": self.total_gross_rewards,
+            "total_annual_costs": total_fees,
+            "net_rewards": self.total_gross_rewards - total_fees,
+            "cards_used": self.catalog.card_names[used].tolist(),
+        }
@@ -0,0 +1,163 @@
+# portfolio_optimizer.py
+# Fee-aware card portfolio optimizer for the credit card optimizer apps
+# --------------------------------------------------------------
+# Picks the SET of cards that maximizes annual net rewards (gross rewards
+# minus each card's annual fee, charged once), instead of the best card
+# per transaction. Exact branch-and-bound:
+# - only categories with spend are considered
+# - cards dominated by a cheaper card on every such category are dropped
+# - categories are decided one at a time (largest spend first): a new
+#   card becomes the category's winner, or the category is frozen at its
+#   current rate; so every card in a portfolio wins something
+# - a card is only added while its marginal rewards exceed its fee, and a
+#   set holding a card that no longer earns back its fee is cut, since
+#   marginal rewards only shrink as the set grows
+# - branches whose optimistic bound (each card's fee charged pro rata to
+#   the categories it improves) can't reach the current top-k stop
+# --------------------------------------------------------------
+
+import heapq
+
+import numpy as np
+import pandas as pd
+
+from rewards_engine import INPUT_CATEGORIES, UNKNOWN_CATEGORY, category_codes
+
+UNKNOWN_CATEGORY_LABEL = "other"
+# Bounds within a rounding error of the k-th best only lead to ties
+_EPSILON = 1e-6
+
+
+def annual_category_spend(categories, amounts, dates=None) -> np.ndarray:
+    """Spend per rate matrix column, scaled to a 12-month year when dates are given."""
+    spend = np.bincount(
+        category_codes(categories),
+        weights=np.asarray(amounts, dtype=float),
+        minlength=UNKNOWN_CATEGORY + 1,
+    )
+    if dates is not None and len(spend):
+        months = pd.Series(pd.to_datetime(dates, errors="coerce")).dropna().dt.to_period("M").nunique()
+        if months:
+            spend = spend * 12.0 / months
+    return spend
+
+
+def _gross(best_rates, spend) -> float:
+    return float(spend @ best_rates) / 100.0
+
+
+def optimize_portfolio(catalog, spend, top_k=3, owned=()) -> list:
+    """Top-k card sets by annual net rewards for a per-category annual spend vector.
+
+    ``spend`` is indexed like the catalog's rate matrix columns (see
+    annual_category_spend). ``owned`` lists card indices that must be in
+    every portfolio; their fees are still counted. Only portfolios where
+    every optional card earns back its fee are returned.
+    """
+    spend = np.asarray(spend, dtype=float)
+    active = np.flatnonzero(spend > 0)
+    owned = tuple(sorted(set(int(i) for i in owned)))
+    if len(catalog) == 0:
+        return []
+
+    rates = catalog.rates[:, active]
+    fees = catalog.annual_costs
+    spend = spend[active]
+
+    # Drop cards that another card matches or beats everywhere for no more fee
+    index = np.arange(len(catalog))
+    candidates = []
+    for k in index:
+        if k in owned:
+            continue
+        covers = (fees <= fees[k]) & np.all(rates >= rates[k], axis=1) & (index != k)
+        better = (fees < fees[k]) | np.any(rates > rates[k], axis=1) | (index < k)
+        if not np.any(covers & better):
+            candidates.append(int(k))
+
+    no_rates = np.zeros(len(active))
+    start_rates = rates[list(owned)].max(axis=0) if owned else no_rates
+    start_value = _gross(start_rates, spend) - float(fees[list(owned)].sum())
+
+    best = []  # min-heap of (net, -n_cards, cards)
+    seen = set()
+
+    def record(value, cards):
+        if cards in seen:
+            return
+        seen.add(cards)
+        entry = (value, -len(cards), cards)
+        if len(best) < top_k:
+            heapq.heappush(best, entry)
+        elif entry > best[0]:
+            heapq.heapreplace(best, entry)
+
+    def threshold():
+        return best[0][0] if len(best) >= top_k else -np.inf
+
+    def pays_for_itself(cards, best_rates):
+        # Every optional card must earn more than its fee on top of the others
+        held = rates[list(cards)]
+        runner_up = np.partition(held, -2, axis=0)[-2] if len(cards) > 1 else no_rates
+        loss = ((held == best_rates) * (best_rates - runner_up)) @ spend / 100.0
+        optional = [i for i, k in enumerate(cards) if k not in owned]
+        return bool(np.all(loss[optional] > fees[[cards[i] for i in optional]]))
+
+    # Decide categories from the biggest spend down: either a new card
+    # becomes the category's winner, or the category keeps its current
+    # rate and later cards may not beat it there.
+    order = np.argsort(-spend, kind="stable")
+
+    def search(cards, best_rates, value, pos, pool):
+        uplift = np.maximum(rates[pool] - best_rates, 0) * spend / 100.0
+        gains = uplift.sum(axis=1) - fees[pool]
+        keep = gains > 0
+        if pos == len(order) or not keep.any():
+            return
+        pool, gains, uplift = pool[keep], gains[keep], uplift[keep]
+        # Optimistic bound: spread each card's fee over the categories it
+        # improves; a category then gains at most its best fee-adjusted uplift
+        improves = uplift > 0
+        fee_share = fees[pool] / improves.sum(axis=1)
+        per_category = np.where(improves, uplift - fee_share[:, None], 0.0).max(axis=0)
+        if value + min(gains.sum(), np.maximum(per_category, 0).sum()) <= threshold() + _EPSILON:
+            return
+
+        c = order[pos]
+        contenders = np.flatnonzero(rates[pool, c] > best_rates[c])
+        for i in contenders[np.argsort(-rates[pool[contenders], c], kind="stable")]:
+            k = pool[i]
+            child = tuple(sorted(cards + (int(k),)))
+            child_rates = np.maximum(best_rates, rates[k])
+            # A card that stops paying for itself never recovers in a larger set
+            if not pays_for_itself(child, child_rates):
+                continue
+            record(value + float(gains[i]), child)
+            search(child, child_rates, value + float(gains[i]), pos + 1,
+                   pool[(rates[pool, c] <= rates[k, c]) & (pool != k)])
+        search(cards, best_rates, value, pos + 1, pool[rates[pool, c] <= best_rates[c]])
+
+    if owned:
+        record(start_value, owned)
+    search(owned, start_rates, start_value, 0, np.array(candidates, dtype=np.intp))
+
+    category_names = INPUT_CATEGORIES + [UNKNOWN_CATEGORY_LABEL]
+    portfolios = []
+    for value, _, cards in sorted(best, reverse=True):
+        fee_total = float(fees[list(cards)].sum())
+        assignment = {}
+        if cards:
+            winners = rates[list(cards)].argmax(axis=0)
+            assignment = {
+                category_names[active[c]]: catalog.card_names[cards[w]]
+                for c, w in enumerate(winners)
+            }
+        portfolios.append({
+            "card_idx": cards,
+            "cards": [catalog.card_names[k] for k in cards],
+            "gross_rewards": value + fee_total,
+            "annual_fees": fee_total,
+            "net_rewards": value,
+            "category_cards": assignment,
+        })
+    return portfolios
@@ -0,0 +1,157 @@
+# remote_source.py
+# Offline-first copies of remote files (card catalog, sample statement)
+# --------------------------------------------------------------
+# A RemoteSource serves the last downloaded copy of a URL from a local
+# disk cache straight away and revalidates it on a background thread
+# with a conditional GET (If-None-Match / If-Modified-Since), so a cold
+# start never waits on the network once the file has been fetched once.
+# - a 304 only records the check; a 200 writes the new body under its
+#   content hash and then atomically replaces the metadata file that
+#   points at it (os.replace), so readers see the old or the new
+#   version, never a partial one
+# - in memory the (body, metadata) pair is swapped in one assignment
+# - at most one refresh runs at a time, and not more often than
+#   ``min_interval`` seconds
+# Any URL works, so it can be pointed at a local HTTP server for testing.
+# --------------------------------------------------------------
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+import requests
+
+DEFAULT_CACHE_DIR = ".remote_cache"
+REFRESH_INTERVAL = 300
+
+
+class RemoteSource:
+    """A remote file served from a local copy, refreshed in the background."""
+
+    def __init__(self, url, cache_dir=DEFAULT_CACHE_DIR, timeout=10, min_interval=REFRESH_INTERVAL, headers=None):
+        self.url = url
+        self.cache_dir = cache_dir
+        self.timeout = timeout
+        self.min_interval = min_interval
+        self.headers = dict(headers or {})
+        self.last_checked = 0.0
+        self.last_error = None
+        self._key = hashlib.sha1(url.encode("utf-8")).hexdigest()[:16]
+        self._lock = threading.Lock()
+        self._thread = None
+        self._state = self._load_disk()
+
+    # --- disk copy ------------------------------------------------------
+    @property
+    def _meta_path(self):
+        return os.path.join(self.cache_dir, f"{self._key}.json")
+
+    def _body_path(self, sha256):
+        return os.path.join(self.cache_dir, f"{self._key}-{sha256[:16]}.bin")
+
+    def _load_disk(self):
+        try:
+            with open(self._meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(self._body_path(meta["sha256"]), "rb") as f:
+                body = f.read()
+        except (OSError, ValueError, KeyError):
+            return None
+        if hashlib.sha256(body).hexdigest() != meta["sha256"]:
+            return None
+        return body, meta
+
+    def _store(self, body, meta):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        previous = self._state[1]["sha256"] if self._state else None
+        if meta["sha256"] != previous:
+            body_tmp = f"{self._body_path(meta['sha256'])}.{os.getpid()}.tmp"
+            with open(body_tmp, "wb") as f:
+                f.write(body)
+            os.replace(body_tmp, self._body_path(meta["sha256"]))
+        meta_tmp = f"{self._meta_path}.{os.getpid()}.tmp"
+        with open(meta_tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(meta_tmp, self._meta_path)
+        self._state = (body, meta)
+        if previous and previous != meta["sha256"]:
+            try:
+                os.remove(self._body_path(previous))
+            except OSError:
+                pass
+
+    # --- reading --------------------------------------------------------
+    @property
+    def version(self):
+        """SHA-256 of the body currently served, or None before the first fetch."""
+        return self._state[1]["sha256"] if self._state else None
+
+    @property
+    def fetched_at(self):
+        """When the served body was last downloaded or confirmed unchanged (epoch seconds)."""
+        return self._state[1]["checked_at"] if self._state else None
+
+    def read(self) -> bytes:
+        """Body of the last known version; blocks only if there is no local copy yet.
+
+        Raises requests.exceptions.RequestException if that first download fails.
+        """
+        state = self._state
+        if state is None:
+            self.refresh()
+            state = self._state
+        else:
+            self.revalidate_async()
+        return state[0]
+
+    # --- refreshing -----------------------------------------------------
+    def refresh(self) -> bool:
+        """Conditional GET; True if a new version was swapped in."""
+        with self._lock:
+            headers = dict(self.headers)
+            meta = self._state[1] if self._state else {}
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+            self.last_checked = time.time()
+            response = requests.get(self.url, headers=headers, timeout=self.timeout)
+            if response.status_code == 304 and self._state:
+                self._store(self._state[0], {**meta, "checked_at": time.time()})
+                return False
+            response.raise_for_status()
+            body = response.content
+            self._store(body, {
+                "url": self.url,
+                "sha256": hashlib.sha256(body).hexdigest(),
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "checked_at": time.time(),
+            })
+            return meta.get("sha256") != self._state[1]["sha256"]
+
+    def _refresh_quietly(self):
+        try:
+            self.refresh()
+            self.last_error = None
+        except Exception as e:
+            # Keep serving the local copy; the next revalidation tries again
+            self.last_error = f"{type(e).__name__}: {e}"
+
+    def revalidate_async(self, force=False) -> bool:
+        """Start a background refresh unless one is running or one ran recently."""
+        if self._thread is not None and self._thread.is_alive():
+            return False
+        if not force and time.time() - self.last_checked < self.min_interval:
+            return False
+        self.last_checked = time.time()
+        self._thread = threading.Thread(target=self._refresh_quietly, name=f"refresh-{self._key}", daemon=True)
+        self._thread.start()
+        return True
+
+    def wait(self, timeout=None):
+        """Block until a background refresh (if any) finishes."""
+        if self._thread is not None:
+            self._thread.join(timeout)
@@ -0,0 +1,192 @@
+# result_cache.py
+# Persistent, content-addressed cache for optimization results
+# --------------------------------------------------------------
+# Results are keyed by the scoring engine's version, the catalog version
+# (a hash of the normalized card list) and a fingerprint of the
+# transaction batch, so reopening the same statement with the same cards
+# skips scoring entirely, across sessions, processes and restarts.
+# - one SQLite file; payloads are compressed .npz (arrays) or JSON blobs
+# - least-recently-used entries are evicted once the file's payloads
+#   exceed ``max_bytes``
+# - hit / miss counters per process and persisted across processes
+# Connections are opened and closed per call, so one ResultCache can be
+# shared by Streamlit sessions (threads) and worker processes.
+# --------------------------------------------------------------
+
+import hashlib
+import io
+import json
+import os
+import sqlite3
+import time
+from contextlib import closing, contextmanager
+
+import numpy as np
+import pandas as pd
+
+from rewards_engine import ENGINE_VERSION, category_codes, score_transactions
+
+DEFAULT_PATH = os.path.join(".result_cache", "results.sqlite")
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+OVER_CAP_SUFFIX = " (over cap)"
+
+
+def transactions_fingerprint(categories, amounts, dates=None) -> str:
+    """SHA-256 over a batch's categories, amounts and (optionally) dates."""
+    cat = pd.Categorical(categories)
+    digest = hashlib.sha256()
+    digest.update("\x1f".join(str(c) for c in cat.categories).encode("utf-8"))
+    digest.update(np.asarray(cat.codes, dtype=np.int32).tobytes())
+    digest.update(np.asarray(amounts, dtype=np.float64).tobytes())
+    if dates is not None:
+        stamps = pd.to_datetime(pd.Series(dates), errors="coerce").to_numpy("datetime64[ns]")
+        digest.update(stamps.view(np.int64).tobytes())
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """Size-bounded LRU cache of result payloads in a SQLite file."""
+
+    def __init__(self, path=DEFAULT_PATH, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = int(max_bytes)
+        self.hits = 0
+        self.misses = 0
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as con:
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " key TEXT PRIMARY KEY, kind TEXT, payload BLOB, size INTEGER,"
+                " created REAL, last_used REAL)"
+            )
+            con.execute("CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used)")
+            con.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER)")
+            con.execute("INSERT OR IGNORE INTO counters VALUES ('hits', 0), ('misses', 0)")
+
+    @contextmanager
+    def _connect(self):
+        """Connection for one transaction (committed, or rolled back on error), closed afterwards."""
+        with closing(sqlite3.connect(self.path, timeout=30)) as con, con:
+            yield con
+
+    # --- raw payloads -------------------------------------------------
+    def _get(self, key):
+        with self._connect() as con:
+            row = con.execute("SELECT kind, payload FROM entries WHERE key = ?", (key,)).fetchone()
+            hit = row is not None
+            if hit:
+                con.execute("UPDATE entries SET last_used = ? WHERE key = ?", (time.time(), key))
+            con.execute("UPDATE counters SET value = value + 1 WHERE name = ?", ("hits" if hit else "misses",))
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return row
+
+    def _put(self, key, kind, payload):
+        now = time.time()
+        with self._connect() as con:
+            con.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)",
+                (key, kind, sqlite3.Binary(payload), len(payload), now, now),
+            )
+            self._evict(con)
+
+    def _evict(self, con):
+        total = con.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Oldest first until back under the bound
+        dropped = []
+        for key, size in con.execute("SELECT key, size FROM entries ORDER BY last_used"):
+            if total <= self.max_bytes:
+                break
+            dropped.append((key,))
+            total -= size
+        con.executemany("DELETE FROM entries WHERE key = ?", dropped)
+
+    # --- typed payloads -----------------------------------------------
+    def get_arrays(self, key):
+        """Dict of arrays stored under ``key``, or None."""
+        row = self._get(key)
+        if row is None:
+            return None
+        with np.load(io.BytesIO(row[1]), allow_pickle=False) as data:
+            return {name: data[name] for name in data.files}
+
+    def put_arrays(self, key, arrays):
+        buffer = io.BytesIO()
+        np.savez_compressed(buffer, **arrays)
+        self._put(key, "npz", buffer.getvalue())
+
+    def get_json(self, key):
+        """JSON value stored under ``key``, or None."""
+        row = self._get(key)
+        return None if row is None else json.loads(row[1].decode("utf-8"))
+
+    def put_json(self, key, value):
+        self._put(key, "json", json.dumps(value).encode("utf-8"))
+
+    # --- scoring --------------------------------------------------------
+    def score_transactions(self, categories, amounts, catalog, dates=None) -> pd.DataFrame:
+        """rewards_engine.score_transactions(), served from the cache when possible."""
+        amounts = np.asarray(amounts, dtype=float)
+        if len(catalog) == 0 or len(amounts) == 0:
+            return score_transactions(categories, amounts, catalog, dates=dates)
+        batch_dates = dates if catalog.date_dependent else None
+        key = f"scores:v{ENGINE_VERSION}:{catalog.version}:{transactions_fingerprint(categories, amounts, batch_dates)}"
+        cached = self.get_arrays(key)
+        if cached is None:
+            scores = score_transactions(categories, amounts, catalog, dates=dates)
+            self.put_arrays(key, {
+                "card_idx": scores["card_idx"].to_numpy(dtype=np.int64),
+                "reward_rate": scores["reward_rate"].to_numpy(dtype=float),
+                "rewards": scores["rewards"].to_numpy(dtype=float),
+                "over_cap": scores["matched_category"].str.endswith(OVER_CAP_SUFFIX).to_numpy(dtype=bool),
+            })
+            return scores
+
+        best = cached["card_idx"].astype(np.intp)
+        codes = category_codes(categories)
+        periods = None
+        if dates is not None and catalog.rotations:
+            periods = catalog.rate_periods(pd.to_datetime(pd.Series(dates), errors="coerce").to_numpy("datetime64[ns]"))
+        matched = catalog.period_label(periods, best, codes).copy()
+        matched[cached["over_cap"]] = [f"{label}{OVER_CAP_SUFFIX}" for label in matched[cached["over_cap"]]]
+        annual_cost = catalog.annual_costs[best]
+        monthly_cost = annual_cost / 12.0
+        return pd.DataFrame({
+            "card_idx": best,
+            "card_name": catalog.card_names[best],
+            "annual_cost_numeric": annual_cost,
+            "reward_rate": cached["reward_rate"],
+            "matched_category": matched,
+            "rewards": cached["rewards"],
+            "monthly_annual_cost": monthly_cost,
+            "net_rewards": cached["rewards"] - monthly_cost,
+        })
+
+    # --- stats ----------------------------------------------------------
+    def stats(self) -> dict:
+        """Hit / miss counters (this process and all-time) and current size."""
+        with self._connect() as con:
+            counters = dict(con.execute("SELECT name, value FROM counters").fetchall())
+            entries, size = con.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "total_hits": counters.get("hits", 0),
+            "total_misses": counters.get("misses", 0),
+            "entries": entries,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+        }
+
+    def clear(self):
+        """Drop every entry and reset the counters."""
+        with self._connect() as con:
+            con.execute("DELETE FROM entries")
+            con.execute("UPDATE counters SET value = 0")
+        self.hits = self.misses = 0
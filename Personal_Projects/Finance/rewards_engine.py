@@ -0,0 +1,628 @@
+# rewards_engine.py
+# Vectorized rewards scoring shared by the credit card optimizer apps
+# --------------------------------------------------------------
+# Compiles cc_options.json into a read-only CardCatalog (fees, a card x
+# category rate matrix, interned category ids, display labels) once per
+# catalog version, and scores a whole transaction frame with NumPy
+# gather + argmax instead of calling get_all_card_options() once per row.
+#
+# Optional per-card "category_caps" (e.g. 6% on the first $6,000 of
+# groceries per year, then 1%) are compiled into RateCaps; scoring with
+# dates then runs one date-sorted sweep per capped category that tracks
+# each card's spend in the current period and moves rows to the
+# next-best card once a cap is used up. Monthly spend totals (Monthly
+# Spend Mode, the what-if sweep, the sign-up planner) have no dates;
+# column_rewards() / reward_matrix() treat them as steady spend over the
+# cap's period, so a card earns its bonus rate on min(spend, cap) and its
+# "then" rate on the rest.
+#
+# Optional per-card "rotating_categories_x" windows (e.g. 5% on gas and
+# groceries from 2025-01-01 to 2025-03-31) are compiled into an interval
+# index: the sorted window boundaries split time into periods, and each
+# period gets its own card x category rate matrix. Scoring with dates
+# finds every row's period with one searchsorted and gathers its rates
+# from that (periods x cards x categories) tensor, so dated statements
+# are still scored in one vectorized pass. Rotating windows don't
+# override a capped (card, category); their quarterly spend limits are
+# not modelled.
+# --------------------------------------------------------------
+
+import bisect
+import hashlib
+import json
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+# Map app categories -> card categories
+CATEGORY_MAPPING = {
+    "groceries": ["U.S._supermarkets", "grocery_stores", "grocery_stores_and_wholesale_clubs"],
+    "dining": ["restaurants_worldwide", "dining"],
+    "gas": ["gas_stations"],
+    "online_shopping": ["online_shopping"],
+    "utilities": ["utilities"],
+    "airfare": ["flights_booked_direct"],
+    "hotels": ["hotels"],
+    "subscriptions": ["streaming_services"],
+    "entertainment": ["entertainment"],
+    "drugstores": ["drugstores"],
+    "travel_portal": ["travel_portal"],
+    "home_improvement": ["home_improvement"],
+    "rideshare": ["rideshare"],
+}
+INPUT_CATEGORIES = list(CATEGORY_MAPPING.keys())
+# Transactions in a category the apps don't know earn the base rate
+UNKNOWN_CATEGORY = len(INPUT_CATEGORIES)
+BASE_RATE_LABEL = "Base Rate"
+
+# Part of the result cache keys (result_cache.py, batch_optimizer.py);
+# bump when scoring or the results built from it change
+ENGINE_VERSION = 1
+
+# Upper bound on the (cards x transactions) block scored at once
+_CHUNK_ELEMENTS = 4_000_000
+# Cap periods -> datetime64[M] month number divisor (months since 1970-01)
+CAP_PERIODS = {"month": 1, "quarter": 3, "year": 12}
+# Months to hit a sign-up bonus's minimum spend when a card doesn't say
+DEFAULT_SIGNUP_WINDOW = 3
+
+
+def parse_annual_cost(value) -> float:
+    """Turn "$95" / "$1,000" style fee strings into floats."""
+    fee_str = str(value if value is not None else "").replace("$", "").replace(",", "").strip()
+    return float(fee_str) if fee_str else 0.0
+
+
+def catalog_version(cards) -> str:
+    """Content hash of a raw card list; changes whenever any card field changes."""
+    payload = json.dumps(cards or [], sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def _frozen(array) -> np.ndarray:
+    array.setflags(write=False)
+    return array
+
+
+@dataclass(frozen=True)
+class RateCap:
+    """Tiered rate for one card on one rate matrix column.
+
+    ``limits`` are cumulative spend thresholds within a period and
+    ``rates`` the rate earned below each; past the last limit the card
+    earns ``then_rate``. Spend resets at each calendar ``period``.
+    """
+
+    card: int
+    column: int
+    period: str
+    limits: tuple
+    rates: tuple
+    then_rate: float
+
+    def rate_at(self, spent) -> float:
+        """Marginal rate after ``spent`` dollars this period."""
+        tier = bisect.bisect_right(self.limits, spent)
+        return self.rates[tier] if tier < len(self.rates) else self.then_rate
+
+    def room(self, spent) -> float:
+        """Spend left before the rate next changes."""
+        tier = bisect.bisect_right(self.limits, spent)
+        return self.limits[tier] - spent if tier < len(self.limits) else np.inf
+
+    def reward(self, spent, amount) -> float:
+        """Rewards on ``amount`` starting from ``spent``, split across tiers."""
+        total = 0.0
+        while amount > 0:
+            step = min(amount, self.room(spent))
+            total += step * self.rate_at(spent) / 100.0
+            spent, amount = spent + step, amount - step
+        return total
+
+    def monthly_rewards(self, amounts) -> np.ndarray:
+        """Rewards per month on each steady monthly ``amount``, tiers applied to the period's total."""
+        months = CAP_PERIODS[self.period]
+        spent = np.asarray(amounts, dtype=float) * months
+        total, floor = np.zeros_like(spent), 0.0
+        for limit, rate in zip(self.limits, self.rates):
+            total += np.clip(spent - floor, 0.0, limit - floor) * rate
+            floor = limit
+        total += np.maximum(spent - floor, 0.0) * self.then_rate
+        return total / 100.0 / months
+
+
+def _parse_cap(spec, card, column, bonus_rate, base_rate) -> RateCap:
+    """RateCap from a ``category_caps`` entry: {"cap": 6000} or {"tiers": [[6000, 6.0], ...]}."""
+    period = spec.get("period", "year")
+    if period not in CAP_PERIODS:
+        raise ValueError(f"Unknown cap period {period!r}; expected one of {sorted(CAP_PERIODS)}")
+    tiers = spec["tiers"] if "tiers" in spec else [[spec["cap"], bonus_rate]]
+    limits = tuple(float(limit) for limit, _ in tiers)
+    if list(limits) != sorted(limits):
+        raise ValueError("Cap tiers must have increasing spend limits")
+    return RateCap(
+        card=card,
+        column=column,
+        period=period,
+        limits=limits,
+        rates=tuple(float(rate) for _, rate in tiers),
+        then_rate=float(spec.get("then", base_rate)),
+    )
+
+
+@dataclass(frozen=True)
+class RotatingRate:
+    """Bonus rate for one card on some rate matrix columns from ``start`` to ``end`` (inclusive days)."""
+
+    card: int
+    columns: tuple
+    labels: tuple
+    start: np.datetime64
+    end: np.datetime64
+    rate: float
+
+
+def _parse_rotation(spec, card) -> RotatingRate:
+    """RotatingRate from a ``rotating_categories_x`` entry: {"start", "end", "rate", "categories"}."""
+    start, end = np.datetime64(spec["start"], "D"), np.datetime64(spec["end"], "D")
+    if end < start:
+        raise ValueError(f"Rotating window ends ({end}) before it starts ({start})")
+    columns, labels = [], []
+    for j, category in enumerate(INPUT_CATEGORIES):
+        matches = [c for c in CATEGORY_MAPPING[category] if c in spec["categories"]]
+        if matches:
+            columns.append(j)
+            labels.append(f"{matches[0].replace('_', ' ').title()} (rotating)")
+    return RotatingRate(card=card, columns=tuple(columns), labels=tuple(labels),
+                        start=start, end=end, rate=float(spec["rate"]))
+
+
+def _rate_periods(rates, labels, rotations, caps):
+    """Window boundaries plus a rate / label matrix per period between them.
+
+    Period p covers [bounds[p-1], bounds[p]); periods 0 and len(bounds)
+    lie outside every window and hold the static matrices.
+    """
+    if not rotations:
+        return None, None, None
+    capped = {(cap.card, cap.column) for cap in caps}
+    bounds = np.unique([day for r in rotations for day in (r.start, r.end + 1)]).astype("datetime64[D]")
+    period_rates = np.repeat(rates[None], len(bounds) + 1, axis=0)
+    period_labels = np.repeat(labels[None], len(bounds) + 1, axis=0)
+    for r in rotations:
+        window = slice(np.searchsorted(bounds, r.start, side="right"), np.searchsorted(bounds, r.end + 1, side="right"))
+        for column, label in zip(r.columns, r.labels):
+            if (r.card, column) in capped:
+                continue
+            better = period_rates[window, r.card, column] < r.rate
+            period_rates[window, r.card, column] = np.where(better, r.rate, period_rates[window, r.card, column])
+            period_labels[window, r.card, column] = np.where(better, label, period_labels[window, r.card, column])
+    return _frozen(bounds), _frozen(period_rates), _frozen(period_labels)
+
+
+@dataclass(frozen=True)
+class CardCatalog:
+    """Compiled, read-only view of a cc_options card list.
+
+    Built once per catalog version. Columns 0..UNKNOWN_CATEGORY-1 of
+    ``rates``/``labels`` are INPUT_CATEGORIES; the last column is each
+    card's base rate for unknown categories. Raw card categories (the keys
+    of ``category_multipliers_x``) are interned into ``category_names`` and
+    ``multipliers`` holds their rates (NaN where a card has none).
+    ``caps`` holds a RateCap for every (card, column) whose winning raw
+    category has an entry in the card's ``category_caps``. Sign-up offers
+    come from ``signup_bonus`` plus the optional ``signup_min_spend`` and
+    ``signup_window_months`` (default 3). ``rotations`` holds each card's
+    ``rotating_categories_x`` windows; ``rate_bounds`` / ``period_rates``
+    / ``period_labels`` are their interval index (None without windows).
+    """
+
+    version: str
+    card_names: np.ndarray
+    annual_cost_labels: np.ndarray
+    annual_costs: np.ndarray
+    base_rates: np.ndarray
+    rates: np.ndarray
+    labels: np.ndarray
+    category_names: tuple
+    category_labels: tuple
+    multipliers: np.ndarray
+    multiplier_order: tuple
+    signup_bonuses: np.ndarray
+    signup_min_spend: np.ndarray
+    signup_windows: np.ndarray
+    caps: tuple = ()
+    rotations: tuple = ()
+    rate_bounds: np.ndarray = None
+    period_rates: np.ndarray = None
+    period_labels: np.ndarray = None
+
+    @classmethod
+    def from_cc_data(cls, cc_data) -> "CardCatalog":
+        """Compile the ``credit_cards`` list of a cc_options dict."""
+        cards = (cc_data or {}).get("credit_cards", []) or []
+        n_cards, n_cols = len(cards), UNKNOWN_CATEGORY + 1
+
+        category_ids = {}
+        multiplier_order = []
+        for card in cards:
+            order = []
+            for cc_category in (card.get("category_multipliers_x", {}) or {}):
+                order.append(category_ids.setdefault(cc_category, len(category_ids)))
+            multiplier_order.append(tuple(order))
+        category_names = tuple(category_ids)
+
+        names = np.empty(n_cards, dtype=object)
+        cost_labels = np.empty(n_cards, dtype=object)
+        fees = np.zeros(n_cards)
+        base_rates = np.zeros(n_cards)
+        rates = np.zeros((n_cards, n_cols))
+        labels = np.full((n_cards, n_cols), BASE_RATE_LABEL, dtype=object)
+        multipliers = np.full((n_cards, len(category_names)), np.nan)
+        bonuses = np.zeros(n_cards)
+        min_spend = np.zeros(n_cards)
+        windows = np.full(n_cards, DEFAULT_SIGNUP_WINDOW, dtype=np.int64)
+        caps = []
+        rotations = []
+
+        for i, card in enumerate(cards):
+            card_multipliers = card.get("category_multipliers_x", {}) or {}
+            card_caps = card.get("category_caps", {}) or {}
+            for cc_category, rate in card_multipliers.items():
+                multipliers[i, category_ids[cc_category]] = float(rate)
+            base_rates[i] = float(card.get("base_rate_x", 0.0) or 0.0)
+            rates[i, :] = base_rates[i]
+            for j, category in enumerate(INPUT_CATEGORIES):
+                winner = None
+                for cc_category in CATEGORY_MAPPING[category]:
+                    if cc_category in card_multipliers and card_multipliers[cc_category] > rates[i, j]:
+                        rates[i, j] = card_multipliers[cc_category]
+                        labels[i, j] = cc_category.replace("_", " ").title()
+                        winner = cc_category
+                if winner in card_caps:
+                    caps.append(_parse_cap(card_caps[winner], i, j, rates[i, j], base_rates[i]))
+            for spec in card.get("rotating_categories_x", []) or []:
+                rotations.append(_parse_rotation(spec, i))
+            names[i] = card.get("card_name", "Unknown")
+            cost_labels[i] = card.get("annual_cost", "$0")
+            fees[i] = parse_annual_cost(card.get("annual_cost", ""))
+            bonuses[i] = parse_annual_cost(card.get("signup_bonus", ""))
+            min_spend[i] = parse_annual_cost(card.get("signup_min_spend", ""))
+            windows[i] = int(card.get("signup_window_months", DEFAULT_SIGNUP_WINDOW) or DEFAULT_SIGNUP_WINDOW)
+
+        rate_bounds, period_rates, period_labels = _rate_periods(rates, labels, rotations, caps)
+        return cls(
+            version=catalog_version(cards),
+            card_names=_frozen(names),
+            annual_cost_labels=_frozen(cost_labels),
+            annual_costs=_frozen(fees),
+            base_rates=_frozen(base_rates),
+            rates=_frozen(rates),
+            labels=_frozen(labels),
+            category_names=category_names,
+            category_labels=tuple(c.replace("_", " ").title() for c in category_names),
+            multipliers=_frozen(multipliers),
+            multiplier_order=tuple(multiplier_order),
+            signup_bonuses=_frozen(bonuses),
+            signup_min_spend=_frozen(min_spend),
+            signup_windows=_frozen(windows),
+            caps=tuple(caps),
+            rotations=tuple(rotations),
+            rate_bounds=rate_bounds,
+            period_rates=period_rates,
+            period_labels=period_labels,
+        )
+
+    def __len__(self) -> int:
+        return len(self.card_names)
+
+    @property
+    def capped_columns(self) -> frozenset:
+        """Rate matrix columns where at least one card has a cap."""
+        return frozenset(cap.column for cap in self.caps)
+
+    @property
+    def date_dependent(self) -> bool:
+        """True when a transaction's date can change its score (caps or rotating windows)."""
+        return bool(self.caps or self.rotations)
+
+    def rate_periods(self, dates) -> np.ndarray:
+        """Index into ``period_rates`` per date; 0 (static rates) without windows or a date."""
+        days = np.asarray(dates, dtype="datetime64[ns]").astype("datetime64[D]")
+        if self.rate_bounds is None:
+            return np.zeros(len(days), dtype=np.intp)
+        periods = np.searchsorted(self.rate_bounds, days, side="right")
+        periods[np.isnat(days)] = 0
+        return periods
+
+    def period_rate(self, periods, cards, columns) -> np.ndarray:
+        """Rates at (period, card, column), broadcast together; static rates when ``periods`` is None."""
+        if periods is None or self.period_rates is None:
+            return self.rates[cards, columns]
+        return self.period_rates[periods, cards, columns]
+
+    def period_label(self, periods, cards, columns) -> np.ndarray:
+        """Matched-category labels at (period, card, column), like period_rate()."""
+        if periods is None or self.period_labels is None:
+            return self.labels[cards, columns]
+        return self.period_labels[periods, cards, columns]
+
+    def column_rewards(self, column, amounts) -> np.ndarray:
+        """(amounts x cards) monthly rewards on each monthly amount in one column, caps applied."""
+        amounts = np.asarray(amounts, dtype=float)
+        rewards = amounts[:, None] * self.rates[None, :, column] / 100.0
+        for cap in self.caps:
+            if cap.column == column:
+                rewards[:, cap.card] = cap.monthly_rewards(amounts)
+        return rewards
+
+    def reward_matrix(self, monthly_spend) -> np.ndarray:
+        """(cards x columns) monthly rewards of each card on a monthly spend vector, caps applied."""
+        monthly_spend = np.asarray(monthly_spend, dtype=float)
+        rewards = self.rates * monthly_spend[None, :] / 100.0
+        for cap in self.caps:
+            rewards[cap.card, cap.column] = cap.monthly_rewards(monthly_spend[cap.column])
+        return rewards
+
+    def card_multipliers(self, i) -> dict:
+        """Raw ``category_multipliers_x`` of card i, in its original key order."""
+        return {self.category_names[k]: float(self.multipliers[i, k]) for k in self.multiplier_order[i]}
+
+    def card_options(self, transaction_category, amount) -> list:
+        """Every card's rewards for one transaction, best net rewards first."""
+        j = category_codes([transaction_category])[0]
+        rewards = amount * self.rates[:, j] / 100.0
+        monthly_cost = self.annual_costs / 12.0
+        net = rewards - monthly_cost
+        return [
+            {
+                "card_name": self.card_names[i],
+                "annual_cost": self.annual_cost_labels[i],
+                "annual_cost_numeric": float(self.annual_costs[i]),
+                "reward_rate": float(self.rates[i, j]),
+                "matched_category": self.labels[i, j],
+                "rewards": float(rewards[i]),
+                "monthly_annual_cost": float(monthly_cost[i]),
+                "net_rewards": float(net[i]),
+            }
+            for i in np.argsort(-net, kind="stable")
+        ]
+
+    def display_rows(self) -> list:
+        """Rows for the read-only "All Available Cards" table."""
+        cap_notes = {}
+        for cap in self.caps:
+            cap_notes[(cap.card, self.labels[cap.card, cap.column])] = (
+                f" (first ${cap.limits[-1]:,.0f}/{cap.period}, then {cap.then_rate:.1f}%)"
+            )
+        rotation_notes = {}
+        for r in self.rotations:
+            rotation_notes.setdefault(r.card, []).append(
+                f"{r.rate:.1f}% on {', '.join(label.replace(' (rotating)', '') for label in r.labels) or '—'}"
+                f" ({r.start} to {r.end})"
+            )
+        rows = []
+        for i in range(len(self)):
+            readable = ", ".join(
+                f"{self.category_labels[k]}: {self.multipliers[i, k]:.1f}%"
+                + cap_notes.get((i, self.category_labels[k]), "")
+                for k in self.multiplier_order[i]
+            )
+            if i in rotation_notes:
+                rotating = "Rotating: " + ", ".join(rotation_notes[i])
+                readable = f"{readable}; {rotating}" if readable else rotating
+            rows.append({
+                "Card Name": self.card_names[i],
+                "Annual Cost": self.annual_cost_labels[i],
+                "Base Rate": f"{self.base_rates[i]:.1f}%",
+                "Category Multipliers": readable or "—",
+            })
+        return rows
+
+    def editor_rows(self) -> list:
+        """Rows for the editable card table (multipliers as JSON text)."""
+        return [
+            {
+                "Card Name": self.card_names[i],
+                "Annual Cost": self.annual_cost_labels[i],
+                "Base Rate": float(self.base_rates[i]),
+                "Category Multipliers (JSON)": json.dumps(self.card_multipliers(i)) if self.multiplier_order[i] else "{}",
+            }
+            for i in range(len(self))
+        ]
+
+
+def category_codes(categories) -> np.ndarray:
+    """Map transaction category labels to rate matrix columns (case-insensitive)."""
+    cat = pd.Categorical(categories)
+    lookup = {c: j for j, c in enumerate(INPUT_CATEGORIES)}
+    # One lookup per distinct label; the trailing entry catches NaN (code -1)
+    code_map = np.array(
+        [lookup.get(str(c).lower(), UNKNOWN_CATEGORY) for c in cat.categories] + [UNKNOWN_CATEGORY],
+        dtype=np.intp,
+    )
+    return code_map[cat.codes]
+
+
+def best_card_indices(codes, amounts, catalog, periods=None) -> np.ndarray:
+    """Index of the card with the highest net reward for each transaction.
+
+    Net reward matches CardCatalog.card_options(): rewards minus 1/12 of the
+    annual fee. Ties go to the card listed first, like the stable sort there.
+    With ``periods`` (CardCatalog.rate_periods()) each row is scored with
+    its period's rates.
+    """
+    n_cards = len(catalog.card_names)
+    monthly_cost = catalog.annual_costs[:, None] / 12.0
+    best = np.empty(len(amounts), dtype=np.intp)
+    step = max(1, _CHUNK_ELEMENTS // max(n_cards, 1))
+    for start in range(0, len(amounts), step):
+        stop = start + step
+        if periods is None or catalog.period_rates is None:
+            rates = catalog.rates[:, codes[start:stop]]
+        else:
+            rates = catalog.period_rates[periods[start:stop], :, codes[start:stop]].T
+        net = amounts[None, start:stop] * rates / 100.0 - monthly_cost
+        best[start:stop] = net.argmax(axis=0)
+    return best
+
+
+def _period_keys(dates, period) -> np.ndarray:
+    return dates.astype("datetime64[M]").astype(np.int64) // CAP_PERIODS[period]
+
+
+def _apply_caps(codes, amounts, dates, catalog, best, periods=None):
+    """Re-pick cards for rows in capped columns, sweeping them in date order.
+
+    Returns (best, rewards, capped) where ``capped`` flags rows that
+    earned less than the card's uncapped rate. Within a column, rows are
+    handled in vectorized segments: while no cap is crossed and no period
+    rolls over, each row's best card is fixed, so only the row that
+    crosses a cap is scored one at a time.
+    """
+    best = best.copy()
+    rewards = amounts * catalog.period_rate(periods, best, codes) / 100.0
+    capped = np.zeros(len(amounts), dtype=bool)
+    monthly_cost = catalog.annual_costs / 12.0
+    all_cards = np.arange(len(catalog))
+
+    for column in sorted(catalog.capped_columns):
+        caps = [cap for cap in catalog.caps if cap.column == column]
+        rows = np.flatnonzero((codes == column) & ~np.isnat(dates))
+        if not len(rows):
+            continue
+        rows = rows[np.argsort(dates[rows], kind="stable")]
+        row_periods = None if periods is None else periods[rows]
+        amt = amounts[rows]
+        cap_cards = np.array([cap.card for cap in caps])
+        cap_cost = monthly_cost[cap_cards]
+
+        # Best uncapped card per row (ties to the first listed, like best_card_indices)
+        others = np.setdiff1d(all_cards, cap_cards)
+        if len(others):
+            other_rates = catalog.period_rate(None if row_periods is None else row_periods[None, :], others[:, None], column)
+            other_net = amt[None, :] * other_rates / 100.0 - monthly_cost[others][:, None]
+            fallback = others[other_net.argmax(axis=0)]
+            fallback_net = other_net.max(axis=0)
+        else:
+            fallback = np.full(len(rows), -1)
+            fallback_net = np.full(len(rows), -np.inf)
+
+        keys = np.stack([_period_keys(dates[rows], cap.period) for cap in caps])
+        period = keys[:, 0].copy()
+        spent = np.zeros(len(caps))
+        pos = 0
+        while pos < len(rows):
+            rolled = keys[:, pos] != period
+            spent[rolled], period[rolled] = 0.0, keys[rolled, pos]
+            # A segment never spans a period rollover of any cap
+            end = min(int(np.searchsorted(keys[c], period[c], side="right")) for c in range(len(caps)))
+            seg = slice(pos, end)
+
+            current = np.array([cap.rate_at(spent[c]) for c, cap in enumerate(caps)])
+            nets = np.vstack([amt[None, seg] * current[:, None] / 100.0 - cap_cost[:, None], fallback_net[None, seg]])
+            cards = np.vstack([np.broadcast_to(cap_cards[:, None], (len(caps), end - pos)), fallback[None, seg]])
+            top = nets.max(axis=0)
+            choice = np.where(nets == top, cards, len(catalog)).min(axis=0)
+
+            # First row where some card's spend reaches its next limit
+            chosen_spend = np.where(choice[None, :] == cap_cards[:, None], amt[None, seg], 0.0).cumsum(axis=1)
+            room = np.array([cap.room(spent[c]) for c, cap in enumerate(caps)])
+            cut = min(int(np.searchsorted(chosen_spend[c], room[c], side="left")) for c in range(len(caps)))
+
+            done, picked = rows[pos:pos + cut], choice[:cut]
+            rate = catalog.period_rate(None if row_periods is None else row_periods[pos:pos + cut], picked, column)
+            for c, cap in enumerate(caps):
+                rate = np.where(picked == cap.card, current[c], rate)
+            best[done] = picked
+            rewards[done] = amt[pos:pos + cut] * rate / 100.0
+            if cut:
+                spent += chosen_spend[:, cut - 1]
+            if pos + cut == end:
+                pos = end
+                continue
+
+            # The crossing row: score each capped card across its tiers
+            r = pos + cut
+            options = [(cap.reward(spent[c], amt[r]) - cap_cost[c], cap.card, c)
+                       for c, cap in enumerate(caps)]
+            if fallback[r] >= 0:
+                options.append((fallback_net[r], int(fallback[r]), None))
+            top_net = max(net for net, _, _ in options)
+            net, card, c = min((o for o in options if o[0] == top_net), key=lambda o: o[1])
+            best[rows[r]] = card
+            rewards[rows[r]] = net + monthly_cost[card]
+            if c is not None:
+                spent[c] += amt[r]
+            pos = r + 1
+
+        uncapped = amounts[rows] * catalog.period_rate(row_periods, best[rows], column) / 100.0
+        capped[rows] = rewards[rows] < uncapped - 1e-12
+    return best, rewards, capped
+
+
+def score_transactions(categories, amounts, catalog, dates=None) -> pd.DataFrame:
+    """Score every transaction against every card and keep the best one.
+
+    Returns one row per transaction (same order as the inputs) with the
+    same fields CardCatalog.card_options() reports for its top option.
+    When ``dates`` are given, rows inside a rotating window earn that
+    window's rates, and capped categories are swept in date order;
+    ``reward_rate`` is then the effective rate and ``matched_category``
+    notes rows past a cap.
+    """
+    amounts = np.asarray(amounts, dtype=float)
+    columns = ["card_idx", "card_name", "annual_cost_numeric", "reward_rate",
+               "matched_category", "rewards", "monthly_annual_cost", "net_rewards"]
+    if len(catalog.card_names) == 0:
+        return pd.DataFrame(columns=columns)
+
+    codes = category_codes(categories)
+    periods = None
+    if dates is not None and catalog.date_dependent:
+        dates = pd.to_datetime(pd.Series(dates), errors="coerce").to_numpy("datetime64[ns]")
+        periods = catalog.rate_periods(dates) if catalog.rotations else None
+    best = best_card_indices(codes, amounts, catalog, periods)
+    reward_rate = catalog.period_rate(periods, best, codes)
+    rewards = amounts * reward_rate / 100.0
+    matched = catalog.period_label(periods, best, codes)
+    if dates is not None and catalog.caps:
+        best, rewards, capped = _apply_caps(codes, amounts, dates, catalog, best, periods)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            reward_rate = np.where(amounts > 0, rewards / amounts * 100.0, catalog.period_rate(periods, best, codes))
+        matched = catalog.period_label(periods, best, codes).copy()
+        matched[capped] = [f"{label} (over cap)" for label in matched[capped]]
+    annual_cost = catalog.annual_costs[best]
+    monthly_cost = annual_cost / 12.0
+
+    return pd.DataFrame({
+        "card_idx": best,
+        "card_name": catalog.card_names[best],
+        "annual_cost_numeric": annual_cost,
+        "reward_rate": reward_rate,
+        "matched_category": matched,
+        "rewards": rewards,
+        "monthly_annual_cost": monthly_cost,
+        "net_rewards": rewards - monthly_cost,
+    }, columns=columns)
+
+
+def summarize_scores(amounts, scores) -> dict:
+    """Totals for the header metrics; each winning card's fee is counted once."""
+    if scores.empty:
+        return {"total_spend": 0.0, "total_gross_rewards": 0.0,
+                "total_annual_costs": 0.0, "net_rewards": 0.0, "cards_used": []}
+
+    # First occurrence of each winning card, in transaction order
+    first_rows = np.sort(np.unique(scores["card_idx"].to_numpy(), return_index=True)[1])
+    total_spend = float(np.asarray(amounts, dtype=float).sum())
+    total_gross = float(scores["rewards"].sum())
+    total_fees = float(scores["annual_cost_numeric"].to_numpy()[first_rows].sum())
+    return {
+        "total_spend": total_spend,
+        "total_gross_rewards": total_gross,
+        "total_annual_costs": total_fees,
+        "net_rewards": total_gross - total_fees,
+        "cards_used": scores["card_name"].to_numpy()[first_rows].tolist(),
+    }
@@ -0,0 +1,191 @@
+# signup_planner.py
+# Card application sequencing with sign-up bonuses
+# --------------------------------------------------------------
+# Plans which cards to apply for, in what order and which month, over a
+# fixed horizon (24 months by default) to maximize net value:
+# - every month each held card earns its share of the best rewards per
+#   category, with category caps applied to the steady monthly spend
+#   (CardCatalog.reward_matrix)
+# - a new card's annual fee is charged in full when it is opened, as
+#   issuers bill the first year at approval, and again every 12 months
+#   it is held inside the horizon
+# - a new card's bonus is earned by routing all spend to it until its
+#   minimum spend is met, if that fits inside its bonus window; the
+#   rewards given up meanwhile are counted against it
+# - at most ``max_new_cards`` applications, at least ``gap_months`` apart
+#   (longer while a bonus's minimum spend is still being met)
+#
+# Memoized search over (month, new-card set) states. To stay interactive
+# on big catalogs it only considers a shortlist: cards not dominated on
+# rewards, fee and offer, ranked by their standalone value.
+# --------------------------------------------------------------
+
+from functools import lru_cache
+from math import ceil
+
+import numpy as np
+
+from portfolio_optimizer import UNKNOWN_CATEGORY_LABEL
+from rewards_engine import INPUT_CATEGORIES
+
+HORIZON_MONTHS = 24
+SHORTLIST = 12
+
+
+def _shortlist(catalog, monthly_spend, rewards, owned, size) -> list:
+    """Card indices worth planning with, best standalone value first.
+
+    ``rewards`` is the catalog's (cards x columns) monthly reward matrix
+    for ``monthly_spend``.
+    """
+    active = monthly_spend > 0
+    rewards = rewards[:, active]
+    spend = monthly_spend[active]
+    owned_rewards = rewards[list(owned)].max(axis=0) if owned else np.zeros(len(spend))
+    fees = catalog.annual_costs
+    bonuses = np.where(catalog.signup_min_spend <= spend.sum() * catalog.signup_windows,
+                       catalog.signup_bonuses, 0.0)
+
+    candidates = []
+    for k in range(len(catalog)):
+        if k in owned:
+            continue
+        # Dropped if another card has at least its rewards, offer and window for no more fee or spend
+        covers = (
+            (fees <= fees[k]) & np.all(rewards >= rewards[k], axis=1) & (bonuses >= bonuses[k])
+            & (catalog.signup_min_spend <= catalog.signup_min_spend[k])
+            & (catalog.signup_windows >= catalog.signup_windows[k])
+        )
+        covers[k] = False
+        covers[list(owned)] = False
+        better = (fees < fees[k]) | np.any(rewards > rewards[k], axis=1) | (bonuses > bonuses[k]) | (np.arange(len(catalog)) < k)
+        if np.any(covers & better):
+            continue
+        yearly_gain = np.maximum(rewards[k] - owned_rewards, 0).sum() * 12 - fees[k]
+        value = bonuses[k] + max(yearly_gain, 0.0) * 2
+        if value > 0:
+            candidates.append((value, k))
+    candidates.sort(key=lambda vk: (-vk[0], vk[1]))
+    return [k for _, k in candidates[:size]]
+
+
+def plan_signups(catalog, annual_spend, owned=(), horizon=HORIZON_MONTHS, gap_months=3,
+                 max_new_cards=4, shortlist=SHORTLIST) -> dict:
+    """Best application plan for an annual per-category spend vector.
+
+    ``annual_spend`` is indexed like the catalog's rate matrix columns
+    (see annual_category_spend); ``owned`` are card indices already held.
+    Returns the plan's steps (month, card, bonus, months of routed spend)
+    with its net value over the horizon next to the value of applying for
+    nothing, plus the per-month net value.
+    """
+    monthly_spend = np.asarray(annual_spend, dtype=float) / 12.0
+    owned = tuple(sorted(set(int(i) for i in owned)))
+    total_spend = float(monthly_spend.sum())
+    card_rewards = catalog.reward_matrix(monthly_spend)
+    no_rewards = np.zeros(len(monthly_spend))
+    base_rewards = card_rewards[list(owned)].max(axis=0) if owned else no_rewards
+    base_month = float(base_rewards.sum())
+
+    pool = _shortlist(catalog, monthly_spend, card_rewards, owned, shortlist) if len(catalog) and total_spend > 0 else []
+    rewards = card_rewards[pool]
+    fees = catalog.annual_costs[pool]
+
+    def picked(mask):
+        return [i for i in range(len(pool)) if mask >> i & 1]
+
+    @lru_cache(maxsize=None)
+    def hold(mask):
+        # Monthly rewards of owned cards plus the new cards in ``mask``
+        cards = picked(mask)
+        best = np.maximum(base_rewards, rewards[cards].max(axis=0)) if cards else base_rewards
+        return float(best.sum())
+
+    def fee_months(month):
+        """Months in which a card opened in ``month`` is billed its annual fee."""
+        return range(month, horizon, 12)
+
+    def opening(i, month):
+        """(months of spend routed to pool[i], bonus earned, rewards of each routed month)."""
+        k = pool[i]
+        bonus, need = float(catalog.signup_bonuses[k]), float(catalog.signup_min_spend[k])
+        routed = ceil(need / total_spend) if need > 0 else 0
+        if bonus <= 0 or routed > catalog.signup_windows[k] or month + routed > horizon:
+            return 0, 0.0, 0.0
+        # Everything goes on the new card while its minimum spend is met
+        route_month = float(rewards[i].sum())
+        return routed, bonus, route_month
+
+    @lru_cache(maxsize=None)
+    def best_from(month, mask, opened):
+        """(value, first action) from ``month`` on, free to apply now."""
+        if month >= horizon:
+            return 0.0, None
+        stay = (horizon - month) * hold(mask)
+        best = (stay, None)
+        if opened < max_new_cards:
+            wait = hold(mask) + best_from(month + 1, mask, opened)[0]
+            if wait > best[0] + 1e-9:
+                best = (wait, ("wait",))
+            for i in range(len(pool)):
+                if mask >> i & 1:
+                    continue
+                routed, bonus, route_month = opening(i, month)
+                new_mask = mask | 1 << i
+                span = min(max(gap_months, routed, 1), horizon - month)
+                value = bonus - fees[i] * len(fee_months(month))
+                value += routed * route_month + (span - routed) * hold(new_mask)
+                value += best_from(month + span, new_mask, opened + 1)[0]
+                if value > best[0] + 1e-9:
+                    best = (value, ("open", i, routed, bonus, route_month, span))
+        return best
+
+    total, _ = best_from(0, 0, 0)
+
+    steps, monthly_value, fee_charges = [], [], []
+    month, mask, opened = 0, 0, 0
+    while month < horizon:
+        _, action = best_from(month, mask, opened)
+        if action is None:
+            monthly_value.extend([hold(mask)] * (horizon - month))
+            break
+        if action[0] == "wait":
+            monthly_value.append(hold(mask))
+            month += 1
+            continue
+        _, i, routed, bonus, route_month, span = action
+        k = pool[i]
+        mask |= 1 << i
+        opened += 1
+        values = [route_month] * routed + [hold(mask)] * (span - routed)
+        values[0] += bonus
+        monthly_value.extend(values)
+        fee_charges.extend((m, fees[i]) for m in fee_months(month))
+        steps.append({
+            "month": month + 1,
+            "card_idx": k,
+            "card": catalog.card_names[k],
+            "annual_fee": float(catalog.annual_costs[k]),
+            "bonus": bonus,
+            "min_spend": float(catalog.signup_min_spend[k]),
+            "months_routed": routed,
+        })
+        month += span
+    for m, fee in fee_charges:
+        monthly_value[m] -= float(fee)
+
+    category_names = INPUT_CATEGORIES + [UNKNOWN_CATEGORY_LABEL]
+    final = [pool[i] for i in picked(mask)]
+    final_rewards = np.maximum(base_rewards, card_rewards[final].max(axis=0)) if final else base_rewards
+    return {
+        "steps": steps,
+        "net_value": total,
+        "baseline_value": horizon * base_month,
+        "gain": total - horizon * base_month,
+        "monthly_value": monthly_value,
+        "category_rates": {
+            category_names[c]: float(100.0 * final_rewards[c] / monthly_spend[c])
+            for c in np.flatnonzero(monthly_spend > 0)
+        },
+        "candidates": [catalog.card_names[k] for k in pool],
+    }
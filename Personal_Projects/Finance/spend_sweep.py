@@ -0,0 +1,100 @@
+# spend_sweep.py
+# Batched what-if sweeps over monthly spend vectors
+# --------------------------------------------------------------
+# Builds thousands of monthly spend vectors at once (each category
+# scaled +/-N%, or a grid over two categories) and scores them all
+# against the card x category rate matrix in one go:
+# - best single card: one (scenarios x categories) @ (categories x cards)
+#   matrix product, minus fees; capped categories are then re-scored per
+#   column (see CardCatalog.column_rewards)
+# - best card per category (the Monthly Spend Mode recommendation):
+#   an argmax over cards for each distinct (category, amount) pair; a
+#   sweep only moves one or two categories, so that's a few hundred
+#   pairs rather than scenarios x categories. The set of winning cards
+#   is the scenario's label.
+# --------------------------------------------------------------
+
+import numpy as np
+
+from rewards_engine import INPUT_CATEGORIES, UNKNOWN_CATEGORY
+
+# Upper bound on the (amounts x cards) block scored at once
+_CHUNK_ELEMENTS = 4_000_000
+
+
+def monthly_vector(monthly_spend) -> np.ndarray:
+    """Rate-matrix-column spend vector from a {category: monthly amount} dict."""
+    vector = np.zeros(UNKNOWN_CATEGORY + 1)
+    for j, category in enumerate(INPUT_CATEGORIES):
+        vector[j] = max(float(monthly_spend.get(category, 0.0) or 0.0), 0.0)
+    return vector
+
+
+def scale_scenarios(base, pct=50, steps=21):
+    """Each spent-on category scaled from -pct% to +pct% on its own, the rest held.
+
+    Returns (scenarios, category column per scenario, scale factor per scenario).
+    """
+    factors = np.linspace(1 - pct / 100.0, 1 + pct / 100.0, steps)
+    columns = np.flatnonzero(base[:UNKNOWN_CATEGORY] > 0)
+    scenarios = np.repeat(base[None, :], len(columns) * steps, axis=0)
+    rows = np.arange(len(scenarios))
+    col_of_row = np.repeat(columns, steps)
+    factor_of_row = np.tile(factors, len(columns))
+    scenarios[rows, col_of_row] = base[col_of_row] * factor_of_row
+    return scenarios, col_of_row, factor_of_row
+
+
+def grid_scenarios(base, x_column, y_column, x_values, y_values) -> np.ndarray:
+    """Base vector with two categories swept over a grid (x varies fastest)."""
+    xx, yy = np.meshgrid(np.asarray(x_values, dtype=float), np.asarray(y_values, dtype=float))
+    scenarios = np.repeat(base[None, :], xx.size, axis=0)
+    scenarios[:, x_column] = xx.ravel()
+    scenarios[:, y_column] = yy.ravel()
+    return scenarios
+
+
+def best_single_cards(catalog, scenarios):
+    """(card index, annual net rewards) of the best single card per scenario."""
+    monthly = scenarios @ catalog.rates.T / 100.0
+    for j in catalog.capped_columns:
+        monthly += catalog.column_rewards(j, scenarios[:, j]) - scenarios[:, j, None] * catalog.rates[None, :, j] / 100.0
+    annual_net = 12.0 * monthly - catalog.annual_costs[None, :]
+    return annual_net.argmax(axis=1), annual_net.max(axis=1)
+
+
+def best_card_sets(catalog, scenarios):
+    """Cards Monthly Spend Mode would recommend for each scenario.
+
+    Every category with spend goes to its best card by rewards (caps
+    applied) minus 1/12 of the fee (ties to the first listed card, like
+    card_options()).
+    Returns (set id per scenario, list of card-index tuples per set id,
+    monthly net rewards per scenario with each card's fee counted once).
+    """
+    n_scenarios, n_cols = scenarios.shape
+    n_cards = len(catalog)
+    monthly_cost = catalog.annual_costs / 12.0
+    winners = np.full((n_scenarios, n_cols), -1, dtype=np.intp)
+    gross = np.zeros(n_scenarios)
+    step = max(1, _CHUNK_ELEMENTS // max(n_cards, 1))
+    for j in range(n_cols):
+        amounts, inverse = np.unique(scenarios[:, j], return_inverse=True)
+        best = np.empty(len(amounts), dtype=np.intp)
+        best_rewards = np.empty(len(amounts))
+        for start in range(0, len(amounts), step):
+            chunk = slice(start, start + step)
+            rewards = catalog.column_rewards(j, amounts[chunk])
+            best[chunk] = (rewards - monthly_cost[None, :]).argmax(axis=1)
+            best_rewards[chunk] = np.take_along_axis(rewards, best[chunk, None], axis=1)[:, 0]
+        picked = best[inverse.ravel()]
+        winners[:, j] = np.where(scenarios[:, j] > 0, picked, -1)
+        gross += best_rewards[inverse.ravel()]
+
+    # Canonical form of each winning set: sorted card ids, repeats blanked to -1
+    cards = np.sort(winners, axis=1)
+    cards[:, 1:][cards[:, 1:] == cards[:, :-1]] = -1
+    cards = np.sort(cards, axis=1)
+    sets, set_ids = np.unique(cards, axis=0, return_inverse=True)
+    fees = np.where(cards >= 0, catalog.annual_costs[cards], 0.0).sum(axis=1)
+    return set_ids.ravel(), [tuple(int(k) for k in s if k >= 0) for s in sets], gross - fees / 12.0
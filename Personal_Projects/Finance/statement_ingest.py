@@ -0,0 +1,204 @@
+# statement_ingest.py
+# Streaming CSV ingestion for card statements
+# --------------------------------------------------------------
+# - Parses in chunks with an explicit dtype map (vendor / category as
+#   categoricals) so multi-year exports don't blow up memory
+# - Dates parsed with a fixed format first; cells that don't match it
+#   are re-parsed flexibly (inferred format, then per cell), so other
+#   date styles still load and only the odd cells take the slow path
+# - Zero / negative prices (refunds, credits) are kept and counted;
+#   rows with an unparseable date, a non-numeric price or no category
+#   are rejected and counted
+# - Optionally caches the normalized result as Parquet keyed by the
+#   file's SHA-256, so re-uploading the same file is instant
+#
+# Parquet caching needs pyarrow (pip install pyarrow); without it the
+# cache is skipped.
+# --------------------------------------------------------------
+
+import hashlib
+import io
+import json
+import os
+import time
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+REQUIRED_COLUMNS = ["date", "vendor", "category", "price"]
+DATE_FORMAT = "%Y-%m-%d"
+CHUNK_ROWS = 250_000
+# Part of the Parquet cache key; bump when the normalization changes
+NORMALIZE_VERSION = 2
+# Read as text first so a single bad cell rejects one row, not the file
+READ_DTYPES = {"date": "string", "vendor": "category", "category": "category", "price": "object"}
+
+try:
+    import pyarrow  # noqa: F401
+    HAS_PARQUET = True
+except ImportError:
+    HAS_PARQUET = False
+
+
+def _open(source):
+    """Binary file object for a path, bytes or an uploaded file."""
+    if isinstance(source, (str, os.PathLike)):
+        return open(source, "rb")
+    if isinstance(source, (bytes, bytearray)):
+        return io.BytesIO(source)
+    source.seek(0)
+    return source
+
+
+def file_hash(source) -> str:
+    """SHA-256 of the file contents, read in blocks."""
+    digest = hashlib.sha256()
+    f = _open(source)
+    try:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    finally:
+        if isinstance(source, (str, os.PathLike)):
+            f.close()
+        else:
+            f.seek(0)
+    return digest.hexdigest()
+
+
+def _parse_dates(text, date_format, counts):
+    dates = pd.to_datetime(text, format=date_format, errors="coerce")
+    retry = dates.isna() & text.notna()
+    if retry.any():
+        # Not in the expected format: let pandas infer one for the rest of
+        # the chunk, then parse whatever still fails cell by cell
+        reparsed = pd.to_datetime(text[retry], errors="coerce")
+        still = reparsed.isna()
+        if still.any():
+            reparsed[still] = pd.to_datetime(text[retry][still], format="mixed", errors="coerce")
+        dates[retry] = reparsed
+        counts["flexible_dates"] += int(reparsed.notna().sum())
+    return dates
+
+
+def _normalize_chunk(chunk, rejected, counts, date_format):
+    chunk = chunk.rename(columns=lambda c: c.strip().lower())
+    dates = _parse_dates(chunk["date"], date_format, counts)
+    prices = pd.to_numeric(chunk["price"], errors="coerce").astype("float64")
+    # Only "$1,234.50" style cells need the slower string cleanup
+    retry = prices.isna() & chunk["price"].notna()
+    if retry.any():
+        cleaned = chunk["price"][retry].astype(str).str.replace(r"[$,\s]", "", regex=True)
+        prices[retry] = pd.to_numeric(cleaned, errors="coerce")
+
+    bad_date = dates.isna()
+    bad_price = ~bad_date & prices.isna()
+    no_category = ~bad_date & ~bad_price & chunk["category"].isna()
+    rejected["bad_date"] += int(bad_date.sum())
+    rejected["bad_price"] += int(bad_price.sum())
+    rejected["missing_category"] += int(no_category.sum())
+
+    keep = ~(bad_date | bad_price | no_category)
+    counts["credits"] += int((keep & (prices <= 0)).sum())
+    return pd.DataFrame({
+        "date": dates[keep],
+        "vendor": chunk["vendor"][keep],
+        "category": chunk["category"][keep],
+        "price": prices[keep],
+    })
+
+
+def _combine(chunks) -> pd.DataFrame:
+    if not chunks:
+        return pd.DataFrame({
+            "date": pd.Series(dtype="datetime64[ns]"),
+            "vendor": pd.Series(dtype="category"),
+            "category": pd.Series(dtype="category"),
+            "price": pd.Series(dtype="float64"),
+        })
+    combined = {
+        "date": pd.concat([c["date"] for c in chunks], ignore_index=True),
+        "price": pd.concat([c["price"] for c in chunks], ignore_index=True),
+    }
+    # Chunks carry different category sets; merge them without going through object
+    for col in ("vendor", "category"):
+        combined[col] = union_categoricals(
+            [c[col].astype("category").cat.remove_unused_categories() for c in chunks]
+        )
+    return pd.DataFrame(combined, columns=REQUIRED_COLUMNS)
+
+
+def _read_cache(cache_path):
+    """(frame, report) from a Parquet cache entry, or None if it is missing or unreadable."""
+    try:
+        with open(cache_path + ".json", "r", encoding="utf-8") as f:
+            report = json.load(f)
+        return pd.read_parquet(cache_path), report
+    except (OSError, ValueError):
+        return None
+
+
+def _write_cache(cache_path, frame, report):
+    """Write the sidecar report, then the Parquet file that makes the entry visible."""
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    # Temp names first so a half-written file is never served
+    tmp = f".{os.getpid()}.tmp"
+    with open(cache_path + ".json" + tmp, "w", encoding="utf-8") as f:
+        json.dump(report, f)
+    os.replace(cache_path + ".json" + tmp, cache_path + ".json")
+    frame.to_parquet(cache_path + tmp, index=False)
+    os.replace(cache_path + tmp, cache_path)
+
+
+def ingest_statement(source, cache_dir=None, chunk_rows=CHUNK_ROWS, date_format=DATE_FORMAT):
+    """Load a statement CSV into a typed frame, newest transaction first.
+
+    ``source`` is a path, raw bytes or a file object (e.g. a Streamlit
+    UploadedFile). Returns (frame, report): the frame has date
+    (datetime64), vendor / category (categorical) and price (float64);
+    the report has rows_read, rows_kept, rejected counts per reason,
+    credits (kept rows with a zero or negative price), flexible_dates
+    (dates not in ``date_format``), whether the Parquet cache was hit,
+    and elapsed seconds.
+
+    Raises ValueError if a required column is missing.
+    """
+    started = time.perf_counter()
+    cache_path = None
+    if cache_dir and HAS_PARQUET:
+        digest = file_hash(source)
+        cache_path = os.path.join(cache_dir, f"{digest}-v{NORMALIZE_VERSION}.parquet")
+        cached = _read_cache(cache_path)
+        if cached is not None:
+            frame, report = cached
+            report.update(cached=True, seconds=time.perf_counter() - started)
+            return frame, report
+
+    f = _open(source)
+    try:
+        header = pd.read_csv(f, nrows=0).columns
+        missing = set(REQUIRED_COLUMNS) - {c.strip().lower() for c in header}
+        if missing:
+            raise ValueError(f"Missing required columns: {sorted(missing)}. Expected: {sorted(REQUIRED_COLUMNS)}")
+        f.seek(0)
+
+        usecols = [c for c in header if c.strip().lower() in REQUIRED_COLUMNS]
+        dtypes = {c: READ_DTYPES[c.strip().lower()] for c in usecols}
+        rejected = {"bad_date": 0, "bad_price": 0, "missing_category": 0}
+        counts = {"credits": 0, "flexible_dates": 0}
+        rows_read = 0
+        chunks = []
+        for chunk in pd.read_csv(f, usecols=usecols, dtype=dtypes, chunksize=chunk_rows):
+            rows_read += len(chunk)
+            chunks.append(_normalize_chunk(chunk, rejected, counts, date_format))
+    finally:
+        if isinstance(source, (str, os.PathLike)):
+            f.close()
+
+    frame = _combine(chunks).sort_values("date", ascending=False, kind="stable", ignore_index=True)
+    report = {"rows_read": rows_read, "rows_kept": len(frame), "rejected": rejected, **counts, "cached": False}
+
+    if cache_path:
+        _write_cache(cache_path, frame, report)
+
+    report["seconds"] = time.perf_counter() - started
+    return frame, report
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from rewards_engine import INPUT_CATEGORIES, CardCatalog
+from signup_planner import plan_signups
+
+
+def _catalog():
+    return CardCatalog.from_cc_data({"credit_cards": [
+        {"card_name": "Flat", "annual_cost": "$0", "base_rate_x": 1.5},
+        {"card_name": "Premium", "annual_cost": "$550", "signup_bonus": "$750", "signup_min_spend": "$4000",
+         "base_rate_x": 1.0, "category_multipliers_x": {"dining": 3.0}},
+    ]})
+
+
+def _spend(catalog, **by_category):
+    spend = np.zeros(catalog.rates.shape[1])
+    for category, amount in by_category.items():
+        spend[INPUT_CATEGORIES.index(category)] = amount
+    return spend
+
+
+def test_high_fee_card_is_not_pushed_to_end_of_horizon():
+    # The card's rewards don't cover its fee, so it is only worth it for the bonus.
+    # With the fee billed in full at approval, opening it in the last months
+    # saves nothing; it should be opened while a full year of it is still used.
+    catalog = _catalog()
+    plan = plan_signups(catalog, _spend(catalog, dining=12000, groceries=12000), owned=[0])
+
+    assert [step["card"] for step in plan["steps"]] == ["Premium"]
+    assert plan["steps"][0]["month"] <= 24 - 12 + 1
+
+
+def test_fee_billed_at_approval_and_renewal():
+    catalog = _catalog()
+    plan = plan_signups(catalog, _spend(catalog, dining=60000), owned=[0])
+
+    (step,) = plan["steps"]
+    assert step["month"] == 1
+    months = plan["monthly_value"]
+    assert sum(months) == pytest.approx(plan["net_value"])
+    # Opening month: bonus minus fee; first renewal a year later
+    assert months[0] == pytest.approx(750 + 5000 * 0.03 - 550)
+    assert months[12] == pytest.approx(5000 * 0.03 - 550)
+    assert months[11] == pytest.approx(5000 * 0.03)
+
+
+def test_category_cap_limits_planned_rewards():
+    catalog = CardCatalog.from_cc_data({"credit_cards": [
+        {"card_name": "Grocer", "annual_cost": "$0", "base_rate_x": 1.0,
+         "category_multipliers_x": {"grocery_stores": 6.0}, "category_caps": {"grocery_stores": {"cap": 6000}}},
+    ]})
+    plan = plan_signups(catalog, _spend(catalog, groceries=12000), owned=[0])
+
+    # 6% on the first $6,000 a year, 1% on the rest
+    assert plan["category_rates"]["groceries"] == pytest.approx(3.5)
+    assert plan["baseline_value"] == pytest.approx(2 * (6000 * 0.06 + 6000 * 0.01))
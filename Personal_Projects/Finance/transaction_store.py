@@ -0,0 +1,217 @@
+# transaction_store.py
+# Columnar transaction table for the credit card optimizer session state
+# --------------------------------------------------------------
+# Typed NumPy columns instead of a list of dicts:
+# - datetime64 dates, float amounts
+# - vendor / category stored as integer codes into interned label lists
+# - a surrogate row id per transaction that never changes, so filtered
+#   edits are merged by id instead of by matching row contents
+# Append / update / delete work in place; deletes leave tombstones that
+# are compacted once they pile up.
+# fork() gives another session its own store over the same arrays; the
+# arrays are copied only when one side first changes (copy-on-write).
+# --------------------------------------------------------------
+
+import numpy as np
+import pandas as pd
+
+EDITABLE_COLUMNS = ["Date", "Vendor", "Category", "Amount"]
+
+
+def _intern(values, labels, codes) -> np.ndarray:
+    """Integer codes for ``values``, adding unseen labels to ``labels``/``codes``."""
+    local, uniques = pd.factorize(pd.Series(values))
+    # Missing values (code -1) land on a trailing "" entry
+    lookup = np.empty(len(uniques) + 1, dtype=np.int32)
+    for i, label in enumerate(list(uniques) + ([""] if (local < 0).any() else [])):
+        label = str(label)
+        if label not in codes:
+            codes[label] = len(labels)
+            labels.append(label)
+        lookup[i] = codes[label]
+    return lookup[local]
+
+
+class TransactionStore:
+    """Transactions in typed columns, addressed by stable row id."""
+
+    def __init__(self, capacity=1024):
+        capacity = max(int(capacity), 1)
+        self._ids = np.empty(capacity, dtype=np.int64)
+        self._dates = np.empty(capacity, dtype="datetime64[ns]")
+        self._vendors = np.empty(capacity, dtype=np.int32)
+        self._categories = np.empty(capacity, dtype=np.int32)
+        self._amounts = np.empty(capacity, dtype=np.float64)
+        self._live = np.zeros(capacity, dtype=bool)
+        self._positions = np.full(capacity, -1, dtype=np.int64)  # row id -> slot
+        self._size = 0  # slots in use, live or deleted
+        self._deleted = 0
+        self._next_id = 0
+        self._vendor_labels, self._vendor_codes = [], {}
+        self._category_labels, self._category_codes = [], {}
+        self._date_order = None  # cached newest-first slot order
+        self.version = 0  # bumped on every change, for caches built from the store
+        self._shared = False  # arrays also referenced by a fork
+
+    @classmethod
+    def from_frame(cls, frame) -> "TransactionStore":
+        """Build a store from a frame with Date / Vendor / Category / Amount columns."""
+        store = cls(capacity=len(frame))
+        store.append(frame)
+        return store
+
+    def __len__(self) -> int:
+        return self._size - self._deleted
+
+    # --- copy-on-write ------------------------------------------------
+    def fork(self) -> "TransactionStore":
+        """A store with the same rows that shares this one's arrays until either changes."""
+        other = object.__new__(TransactionStore)
+        other.__dict__.update(self.__dict__)
+        self._shared = other._shared = True
+        return other
+
+    def shares_data_with(self, other) -> bool:
+        """True while both stores still read the same arrays."""
+        return self._ids is other._ids
+
+    def _own(self):
+        if not self._shared:
+            return
+        for name in ("_ids", "_dates", "_vendors", "_categories", "_amounts", "_live", "_positions"):
+            setattr(self, name, getattr(self, name).copy())
+        self._vendor_labels, self._vendor_codes = list(self._vendor_labels), dict(self._vendor_codes)
+        self._category_labels, self._category_codes = list(self._category_labels), dict(self._category_codes)
+        self._shared = False
+
+    # --- sizing -------------------------------------------------------
+    def _grow(self, name, capacity, fill=None):
+        old = getattr(self, name)
+        new = np.empty(capacity, dtype=old.dtype) if fill is None else np.full(capacity, fill, dtype=old.dtype)
+        new[:len(old)] = old
+        setattr(self, name, new)
+
+    def _reserve(self, n):
+        if self._size + n > len(self._ids):
+            capacity = max(2 * len(self._ids), self._size + n)
+            for name in ("_ids", "_dates", "_vendors", "_categories", "_amounts"):
+                self._grow(name, capacity)
+            self._grow("_live", capacity, fill=False)
+        if self._next_id + n > len(self._positions):
+            self._grow("_positions", max(2 * len(self._positions), self._next_id + n), fill=-1)
+
+    def _compact(self):
+        keep = np.flatnonzero(self._live[:self._size])
+        for name in ("_ids", "_dates", "_vendors", "_categories", "_amounts"):
+            column = getattr(self, name)
+            column[:len(keep)] = column[keep]
+        self._live[:len(keep)] = True
+        self._live[len(keep):self._size] = False
+        self._size, self._deleted = len(keep), 0
+        self._positions[self._ids[:self._size]] = np.arange(self._size)
+
+    # --- mutation -----------------------------------------------------
+    def _slots(self, ids) -> np.ndarray:
+        ids = np.asarray(ids, dtype=np.int64)
+        slots = self._positions[ids]
+        if (slots < 0).any():
+            raise KeyError(f"Unknown transaction ids: {ids[slots < 0].tolist()}")
+        return slots
+
+    def _write(self, slots, frame):
+        if "Date" in frame:
+            self._dates[slots] = pd.to_datetime(frame["Date"], errors="coerce").to_numpy("datetime64[ns]")
+        if "Vendor" in frame:
+            self._vendors[slots] = _intern(frame["Vendor"], self._vendor_labels, self._vendor_codes)
+        if "Category" in frame:
+            self._categories[slots] = _intern(frame["Category"], self._category_labels, self._category_codes)
+        if "Amount" in frame:
+            self._amounts[slots] = pd.to_numeric(frame["Amount"], errors="coerce")
+        self._date_order = None
+        self.version += 1
+
+    def append(self, frame) -> np.ndarray:
+        """Add rows (Date / Vendor / Category / Amount columns); returns their new ids."""
+        n = len(frame)
+        self._own()
+        self._reserve(n)
+        slots = np.arange(self._size, self._size + n)
+        ids = np.arange(self._next_id, self._next_id + n, dtype=np.int64)
+        self._ids[slots] = ids
+        self._live[slots] = True
+        self._positions[ids] = slots
+        self._size += n
+        self._next_id += n
+        self._write(slots, frame)
+        return ids
+
+    def update(self, ids, frame):
+        """Overwrite the given rows in place with the columns present in ``frame``."""
+        self._own()
+        self._write(self._slots(ids), frame)
+
+    def delete(self, ids):
+        """Remove rows by id."""
+        ids = np.asarray(ids, dtype=np.int64)
+        if not len(ids):
+            return
+        self._own()
+        slots = self._slots(ids)
+        self._live[slots] = False
+        self._positions[ids] = -1
+        self._deleted += len(slots)
+        self._date_order = None
+        self.version += 1
+        if self._deleted > max(1024, self._size // 4):
+            self._compact()
+
+    # --- reads --------------------------------------------------------
+    def _order(self) -> np.ndarray:
+        if self._date_order is None:
+            live = np.flatnonzero(self._live[:self._size])
+            dates = self._dates[live]
+            # Newest first, missing dates last; stable so same-day rows keep insertion order
+            key = np.where(np.isnat(dates), np.iinfo(np.int64).max, -dates.view(np.int64))
+            self._date_order = live[np.argsort(key, kind="stable")]
+        return self._date_order
+
+    @property
+    def ids(self) -> np.ndarray:
+        """Live row ids, newest transaction first."""
+        return self._ids[self._order()]
+
+    def columns(self, ids=None) -> dict:
+        """Typed column arrays (newest first, or for the given ids)."""
+        return self._columns(self._order() if ids is None else self._slots(ids))
+
+    def _columns(self, slots) -> dict:
+        return {
+            "Date": self._dates[slots],
+            "Vendor": pd.Categorical.from_codes(self._vendors[slots], categories=self._vendor_labels),
+            "Category": pd.Categorical.from_codes(self._categories[slots], categories=self._category_labels),
+            "Amount": self._amounts[slots],
+        }
+
+    def to_frame(self, ids=None, categorical=True) -> pd.DataFrame:
+        """Rows as a DataFrame indexed by row id.
+
+        With ``categorical=False`` vendor / category come back as plain
+        strings, which is what st.data_editor needs for free-text editing.
+        """
+        slots = self._order() if ids is None else self._slots(ids)
+        columns = self._columns(slots)
+        if not categorical:
+            columns["Vendor"] = np.asarray(self._vendor_labels, dtype=object)[self._vendors[slots]]
+            columns["Category"] = np.asarray(self._category_labels, dtype=object)[self._categories[slots]]
+        return pd.DataFrame(columns, index=pd.Index(self._ids[slots], name="id"))
+
+    def memory_usage(self, include_shared=True) -> int:
+        """Approximate bytes held by the store, including label dictionaries.
+
+        With ``include_shared=False`` arrays still shared with a fork count as 0.
+        """
+        if self._shared and not include_shared:
+            return 0
+        arrays = (self._ids, self._dates, self._vendors, self._categories, self._amounts, self._live, self._positions)
+        labels = sum(len(label) + 49 for label in self._vendor_labels + self._category_labels)
+        return int(sum(a.nbytes for a in arrays) + labels)
@@ -4,6 +4,7 @@
 
 from pathlib import Path
 import re
+import sys
 import json
 import numpy as np
 import pandas as pd
@@ -19,7 +20,12 @@ except Exception:
 import requests
 import textwrap
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # shared perf_panel.py
+from perf_panel import render_panel, stage, start_rerun, timed
+
 st.set_page_config(page_title="Hotel Browser", layout="wide")
+# Stage timings for this rerun (sidebar panel with ?perf=1)
+perf = start_rerun("Hotel_app")
 
 # ---------- Safe CSS (prevent clipping, keep labels compact) ----------
 st.markdown("""
@@ -63,12 +69,14 @@ def _pick_addr(row):
 def _looks_like_postal(t):
     return bool(re.fullmatch(r"[0-9\-]{3,7}", t.strip().replace(" ", "")))
 
+@timed("load")
 @st.cache_data
 def load_data(path: Path):
     df = pd.read_csv(path, dtype=str, keep_default_na=False)
     df = df.drop(columns=[c for c in ["detail_url", "page_status"] if c in df.columns], errors="ignore")
     return df
 
+@timed("normalize")
 @st.cache_data
 def enrich_data(df):
     if df.empty:
@@ -119,7 +127,8 @@ with st.expander("🧠 Ask AI about this dataset", expanded=False):
         desc = data.describe(include="all").to_dict()
         return {"columns": cols, "n_rows": int(len(data)), "sample": sample.to_dict(orient="records"), "describe": desc}
 
-    ctx_top = build_ai_context_top(df)
+    with stage("normalize"):
+        ctx_top = build_ai_context_top(df)
 
     if "ai_history_top" not in st.session_state:
         st.session_state.ai_history_top = []
@@ -205,28 +214,33 @@ with filters_col:
 
 with map_col:
     st.subheader("🗺️ Map")
-    mask = pd.Series(True, index=df.index)
-    if country != "All": mask &= df["__country"] == country
-    if region != "All": mask &= df["__region"] == region
-    if price is not None: mask &= df["price_f"].between(price[0], price[1])
-    if rating is not None: mask &= df["rating_f"].between(rating[0], rating[1])
-    if distance is not None: mask &= df["distance_mi"].between(distance[0], distance[1])
-    filt = df[mask]
-    map_df = filt.dropna(subset=["lat", "lon"]) if {"lat", "lon"}.issubset(filt.columns) else pd.DataFrame(columns=["lat", "lon", "name"])
-    center_lat, center_lon = (map_df["lat"].mean(), map_df["lon"].mean()) if not map_df.empty else (40.4168, -3.7038)
-    if map_df.empty:
-        map_df = pd.DataFrame({"lat": [center_lat], "lon": [center_lon], "name": ["Madrid, Spain"]})
-    layer = pdk.Layer("ScatterplotLayer", data=map_df, get_position=["lon", "lat"], get_color=[255, 0, 0], get_radius=100, pickable=True)
-    st.pydeck_chart(pdk.Deck(layers=[layer], initial_view_state=pdk.ViewState(latitude=center_lat, longitude=center_lon, zoom=11), map_style="mapbox://styles/mapbox/light-v11", tooltip={"text": "{name}"}), use_container_width=True)
+    with stage("filter"):
+        mask = pd.Series(True, index=df.index)
+        if country != "All": mask &= df["__country"] == country
+        if region != "All": mask &= df["__region"] == region
+        if price is not None: mask &= df["price_f"].between(price[0], price[1])
+        if rating is not None: mask &= df["rating_f"].between(rating[0], rating[1])
+        if distance is not None: mask &= df["distance_mi"].between(distance[0], distance[1])
+        filt = df[mask]
+    with stage("chart"):
+        map_df = filt.dropna(subset=["lat", "lon"]) if {"lat", "lon"}.issubset(filt.columns) else pd.DataFrame(columns=["lat", "lon", "name"])
+        center_lat, center_lon = (map_df["lat"].mean(), map_df["lon"].mean()) if not map_df.empty else (40.4168, -3.7038)
+        if map_df.empty:
+            map_df = pd.DataFrame({"lat": [center_lat], "lon": [center_lon], "name": ["Madrid, Spain"]})
+        layer = pdk.Layer("ScatterplotLayer", data=map_df, get_position=["lon", "lat"], get_color=[255, 0, 0], get_radius=100, pickable=True)
+        st.pydeck_chart(pdk.Deck(layers=[layer], initial_view_state=pdk.ViewState(latitude=center_lat, longitude=center_lon, zoom=11), map_style="mapbox://styles/mapbox/light-v11", tooltip={"text": "{name}"}), use_container_width=True)
 
 st.markdown("---")
 st.subheader("📋 Filtered Hotels")
 st.caption(f"{len(filt):,} rows")
 cols_hide = ["__country", "__region", "price_f", "rating_f", "distance_mi"]
-st.dataframe(filt.drop(columns=cols_hide, errors="ignore"), use_container_width=True, height=520)
+with stage("render"):
+    st.dataframe(filt.drop(columns=cols_hide, errors="ignore"), use_container_width=True, height=520)
 
 with st.expander("Notes"):
     st.markdown("""- Filters left (1/3), map right (2/3), table full width below.
 - Country/Region parsed from address; price/rating/distance parsed from columns.
 - Map defaults to Madrid if no coordinates.
-- Collapsible AI chat added at top for quick insights.""")
\ No newline at end of file
+- Collapsible AI chat added at top for quick insights.""")
+
+render_panel(perf)
@@ -0,0 +1,218 @@
+# perf_panel.py
+# Per-rerun timing for the Streamlit apps
+# --------------------------------------------------------------
+# Records wall time, call count and (optionally) peak memory for named
+# stages of a rerun - load, normalize, optimize, filter, chart, render:
+#
+#   perf = start_rerun("cc_app")          # top of the script
+#   with stage("load"): ...               # a block
+#   @timed("optimize")                    # or every call of a function
+#   def optimize(...): ...
+#   render_panel(perf)                    # bottom of the script
+#
+# A rerun cut short by st.rerun(), st.stop() or an exception never
+# reaches render_panel(); the next start_rerun() closes it with the time
+# up to its last finished stage and marks it ``ended_early``.
+# The sidebar panel (stage table, rerun total, JSON export of recent
+# reruns) is only drawn when the page is opened with ?perf=1 or the
+# PERF_PANEL environment variable is set; timings are always recorded,
+# which costs a couple of perf_counter() calls per stage.
+# Peak memory uses tracemalloc, which slows Python down noticeably and
+# is process-wide (other sessions' allocations count too), so it is off
+# unless ticked in the panel.
+# The panel also lists this session's st.session_state by approximate
+# size; objects with a memory_usage(include_shared=...) method report
+# only what they don't share with other sessions.
+# --------------------------------------------------------------
+
+import json
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from functools import wraps
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+HISTORY = 20
+
+
+class RerunProfiler:
+    """Stage timings for one rerun of one app."""
+
+    def __init__(self, app, trace_memory=False):
+        self.app = app
+        self.started_at = time.time()
+        self.trace_memory = trace_memory
+        self.stages = {}  # name -> {"calls", "seconds", "peak_bytes"}
+        self.total_seconds = None
+        self.ended_early = False
+        self._started = time.perf_counter()
+        self._last_stage_end = self._started
+        self._stack = []  # open stages: [start current bytes, peak seen so far]
+
+    @contextmanager
+    def stage(self, name):
+        """Time a block; repeated and nested stages accumulate separately."""
+        tracing = self.trace_memory and tracemalloc.is_tracing()
+        if tracing:
+            current, peak = tracemalloc.get_traced_memory()
+            if self._stack:
+                # The enclosing stage keeps the peak it reached before this reset
+                self._stack[-1][1] = max(self._stack[-1][1], peak)
+            tracemalloc.reset_peak()
+            self._stack.append([current, current])
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._last_stage_end = time.perf_counter()
+            elapsed = self._last_stage_end - started
+            record = self.stages.setdefault(name, {"calls": 0, "seconds": 0.0, "peak_bytes": None})
+            record["calls"] += 1
+            record["seconds"] += elapsed
+            if tracing:
+                start_bytes, seen = self._stack.pop()
+                peak = max(seen, tracemalloc.get_traced_memory()[1])
+                if self._stack:
+                    self._stack[-1][1] = max(self._stack[-1][1], peak)
+                record["peak_bytes"] = max(record["peak_bytes"] or 0, peak - start_bytes)
+
+    def finish(self, early=False):
+        """Close the rerun's total; safe to call more than once.
+
+        ``early`` closes a rerun that stopped before its end, at its last
+        finished stage.
+        """
+        if self.total_seconds is None:
+            end = self._last_stage_end if early else time.perf_counter()
+            self.total_seconds = end - self._started
+            self.ended_early = early
+        return self
+
+    def table(self) -> pd.DataFrame:
+        """One row per stage, slowest first."""
+        rows = [{
+            "Stage": name,
+            "Calls": record["calls"],
+            "Time (ms)": round(record["seconds"] * 1000, 1),
+            "Peak memory (KB)": None if record["peak_bytes"] is None else round(record["peak_bytes"] / 1024, 1),
+        } for name, record in self.stages.items()]
+        return pd.DataFrame(rows, columns=["Stage", "Calls", "Time (ms)", "Peak memory (KB)"]).sort_values(
+            "Time (ms)", ascending=False, ignore_index=True)
+
+    def to_dict(self) -> dict:
+        return {
+            "app": self.app,
+            "started_at": self.started_at,
+            "total_seconds": self.total_seconds,
+            "ended_early": self.ended_early,
+            "trace_memory": self.trace_memory,
+            "stages": self.stages,
+        }
+
+
+# --- Session helpers -------------------------------------------------
+def start_rerun(app, history=HISTORY) -> RerunProfiler:
+    """New profiler for this rerun; the last ``history`` reruns are kept for export."""
+    trace_memory = bool(st.session_state.get("perf_trace_memory", False))
+    if trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    profiler = RerunProfiler(app, trace_memory=trace_memory)
+    runs = st.session_state.setdefault("perf_runs", [])
+    if runs:
+        runs[-1].finish(early=True)  # no-op unless it never reached render_panel()
+    runs.append(profiler)
+    del runs[:-history]
+    return profiler
+
+
+def current():
+    """This session's profiler for the running rerun, or None."""
+    runs = st.session_state.get("perf_runs")
+    return runs[-1] if runs else None
+
+
+@contextmanager
+def stage(name):
+    """Time a block against the current rerun's profiler (no-op without one)."""
+    profiler = current()
+    if profiler is None:
+        yield
+        return
+    with profiler.stage(name):
+        yield
+
+
+def timed(name):
+    """Decorator: time every call of the function as stage ``name``."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _deep_size(value, seen) -> int:
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    usage = getattr(value, "memory_usage", None)
+    if callable(usage):
+        try:
+            return int(usage(include_shared=False))
+        except TypeError:
+            return int(np.sum(usage()))
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(_deep_size(k, seen) + _deep_size(v, seen) for k, v in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(_deep_size(v, seen) for v in value)
+    return sys.getsizeof(value)
+
+
+def session_memory() -> pd.DataFrame:
+    """Approximate bytes per st.session_state key, largest first (shared data not counted)."""
+    seen = set()
+    rows = [{"Key": key, "Bytes": _deep_size(value, seen)} for key, value in st.session_state.to_dict().items()]
+    return pd.DataFrame(rows, columns=["Key", "Bytes"]).sort_values("Bytes", ascending=False, ignore_index=True)
+
+
+def panel_enabled() -> bool:
+    return st.query_params.get("perf") in ("1", "true") or bool(os.environ.get("PERF_PANEL"))
+
+
+def export_json(runs) -> str:
+    return json.dumps([run.to_dict() for run in runs], indent=2)
+
+
+def render_panel(profiler):
+    """Sidebar panel with this rerun's stages, when enabled (see panel_enabled)."""
+    profiler.finish()
+    if not panel_enabled():
+        return
+    with st.sidebar.expander("⏱️ Performance", expanded=True):
+        tracking = st.checkbox("Track peak memory (slower)", key="perf_trace_memory")
+        if not tracking and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        st.caption(f"Last rerun: {profiler.total_seconds * 1000:,.0f} ms")
+        st.dataframe(profiler.table(), use_container_width=True, hide_index=True)
+        memory = session_memory()
+        st.caption(f"Session state: {memory['Bytes'].sum() / 1e6:,.2f} MB")
+        st.dataframe(memory.head(10), use_container_width=True, hide_index=True)
+        runs = st.session_state.get("perf_runs", [])
+        st.download_button(
+            "⬇️ Export timings (JSON)",
+            data=export_json(runs),
+            file_name=f"{profiler.app}_perf.json",
+            mime="application/json",
+            key="perf_export",
+        )